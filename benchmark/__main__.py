@@ -0,0 +1,56 @@
+import argparse 
+import json 
+import platform 
+import subprocess 
+import time 
+
+from es_util.codec import get_json_backend 
+from .fake_es import FakeES 
+from .suite import BENCHMARKS, run_isolated 
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip() 
+    except Exception:
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='Run the es_util benchmarks against an in-process fake Elasticsearch.')
+    parser.add_argument('cases', nargs='*', default=list(BENCHMARKS), help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of latency added to every request')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of requests answered with a 503')
+    parser.add_argument('--reject-rate', type=float, default=0.0, help='fraction of bulk items rejected with a 429')
+    parser.add_argument('--output', default=None, help='write results as JSON to this file')
+    args = parser.parse_args() 
+    
+    results = [] 
+    
+    with FakeES(latency=args.latency, failure_rate=args.failure_rate, reject_rate=args.reject_rate) as es:
+        for name in args.cases:
+            # One process per case, so each reports its own peak RSS. 
+            result = run_isolated(name, es.host, es.port, num_docs=args.docs)
+            results.append(result)
+            
+            print(
+                f"{name:<22} {result['docs_per_sec']:>10.0f} docs/s {result['bytes_per_sec'] / 1024 / 1024:>8.2f} MB/s "
+                f"p50 {result['p50_ms']:>8.2f}ms p99 {result['p99_ms']:>8.2f}ms "
+                f"errors {result['errors']:>4} rss {result['peak_rss_mb']:.0f}MB (+{result['peak_rss_mb'] - result['base_rss_mb']:.0f}MB)"
+            )
+            
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump({
+                'revision': _git_revision(), 
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 
+                'python': platform.python_version(), 
+                'json_backend': get_json_backend(), 
+                'options': vars(args), 
+                'results': results, 
+            }, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main() 
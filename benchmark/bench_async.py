@@ -0,0 +1,39 @@
+import argparse 
+import asyncio 
+import time 
+
+from es_util import AsyncESClient 
+from .fake_es import FakeES 
+
+
+async def run(host: str,
+              port: int,
+              num_calls: int,
+              max_concurrency: int) -> float:
+    async with AsyncESClient(host=host, port=port, max_concurrency=max_concurrency) as client:
+        index = client.get_index('bench_async')
+        await index.bulk_insert([{ '_id': i, 'value': i } for i in range(100)])
+        
+        start = time.perf_counter() 
+        results = await asyncio.gather(*[index.query_by_id(i % 100) for i in range(num_calls)])
+        elapsed = time.perf_counter() - start 
+        
+        assert all(result is not None for result in results)
+        
+    return elapsed 
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent query_by_id through AsyncESIndex.')
+    parser.add_argument('--calls', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args() 
+    
+    with FakeES() as es:
+        elapsed = asyncio.run(run(es.host, es.port, args.calls, args.concurrency))
+        
+    print(f"{args.calls} concurrent calls in {elapsed:.2f}s ({args.calls / elapsed:.0f} calls/s)")
+
+
+if __name__ == '__main__':
+    main() 
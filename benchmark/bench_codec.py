@@ -0,0 +1,69 @@
+import argparse 
+import json 
+import time 
+
+from es_util.bulk import bulk_index_item 
+from es_util.codec import json_decode, get_json_backend, set_json_backend 
+
+
+def make_docs(num_docs: int) -> list[dict]:
+    return [
+        { '_id': i, 'title': f"document {i}", 'tags': ['a', 'b', 'c'], 'score': i * 0.5, 'flag': i % 2 == 0 }
+        for i in range(num_docs)
+    ]
+
+
+def bulk_body_str_concat(docs: list[dict]) -> bytes:
+    # The pre-codec implementation: stdlib dumps and repeated str concatenation. 
+    body = ''
+    
+    for doc in docs:
+        doc = dict(doc)
+        _id = str(doc.pop('_id'))
+        body += json.dumps({ 'index': { '_index': 'bench', '_id': _id } }, ensure_ascii=False) + '\n'
+        body += json.dumps(doc, ensure_ascii=False) + '\n'
+        
+    return body.encode('utf-8')
+
+
+def bulk_body_codec(docs: list[dict]) -> bytes:
+    return b''.join([bulk_index_item('bench', '_doc', doc) for doc in docs])
+
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    best = float('inf')
+    
+    for _ in range(repeat):
+        start = time.perf_counter() 
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+        
+    return best 
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON encode/decode cost on the bulk and search-response paths.')
+    parser.add_argument('--docs', type=int, default=100000)
+    args = parser.parse_args() 
+    
+    docs = make_docs(args.docs)
+    response = json.dumps({ 
+        'took': 1, 
+        'hits': { 'hits': [{ '_id': str(doc['_id']), '_source': doc } for doc in docs] }, 
+    }).encode('utf-8')
+    
+    default_backend = get_json_backend() 
+    
+    print(f"bulk body, str concat + json   : {timed(bulk_body_str_concat, docs):.3f}s")
+    
+    for backend in ['json', default_backend] if default_backend != 'json' else ['json']:
+        set_json_backend(backend)
+        
+        print(f"bulk body, bytes join + {backend:<7}: {timed(bulk_body_codec, docs):.3f}s")
+        print(f"search response decode, {backend:<7}: {timed(json_decode, response):.3f}s")
+        
+    set_json_backend(default_backend)
+
+
+if __name__ == '__main__':
+    main() 
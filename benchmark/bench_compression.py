@@ -0,0 +1,73 @@
+import argparse 
+import time 
+
+from es_util import ESClient 
+from es_util.codec import json_encode 
+from es_util.compression import compress, decompress, zstandard 
+from .bench_codec import make_docs, bulk_body_codec, timed 
+from .fake_es import FakeES 
+
+
+def _settings() -> list[tuple[str, int]]:
+    settings = [('gzip', 1), ('gzip', 6), ('gzip', 9), ('deflate', 6)]
+    
+    if zstandard is not None:
+        settings += [('zstd', 1), ('zstd', 3)]
+        
+    return settings 
+
+
+def bench_cpu(num_docs: int):
+    # Size and CPU cost per encoding for a bulk request body and a search response. 
+    docs = make_docs(num_docs)
+    payloads = {
+        'bulk body': bulk_body_codec(docs), 
+        'search response': json_encode({ 'hits': { 'hits': [{ '_id': str(doc['_id']), '_source': doc } for doc in docs] } }), 
+    }
+    
+    for name, data in payloads.items():
+        print(f"{name}: {len(data) / 1024 / 1024:.2f} MB")
+        
+        for encoding, level in _settings():
+            compress_time = timed(compress, data, encoding, level)
+            compressed = compress(data, encoding, level)
+            decompress_time = timed(decompress, compressed, encoding)
+            
+            print(
+                f"  {encoding:<7} level {level}: ratio {len(data) / len(compressed):>5.1f}x "
+                f"compress {len(data) / compress_time / 1024 / 1024:>7.1f} MB/s "
+                f"decompress {len(data) / decompress_time / 1024 / 1024:>7.1f} MB/s"
+            )
+
+
+def bench_wire(num_docs: int):
+    # Bytes on the wire and wall time for a bulk load plus a full scroll, end to end. 
+    for compression in [None, 'gzip', 'deflate']:
+        with FakeES(http_compression=compression is not None) as es:
+            client = ESClient(host=es.host, port=es.port, compression=compression)
+            index = client.get_index('bench')
+            
+            start = time.perf_counter() 
+            cpu_start = time.process_time() 
+            index.parallel_bulk_insert(({ '_id': doc.pop('_id'), **doc } for doc in make_docs(num_docs)), batch_size=1000)
+            num_scrolled = sum(1 for _ in index.scroll(scroll_size=1000))
+            elapsed = time.perf_counter() - start 
+            cpu = time.process_time() - cpu_start 
+            
+            print(
+                f"{str(compression):<7} sent {es.bytes_in / 1024 / 1024:>7.2f} MB received {es.bytes_out / 1024 / 1024:>7.2f} MB "
+                f"elapsed {elapsed:.2f}s cpu {cpu:.2f}s (client and fake server) docs {num_scrolled}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes on the wire versus CPU cost of request/response compression.')
+    parser.add_argument('--docs', type=int, default=50000)
+    args = parser.parse_args() 
+    
+    bench_cpu(args.docs)
+    bench_wire(args.docs)
+
+
+if __name__ == '__main__':
+    main() 
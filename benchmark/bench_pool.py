@@ -0,0 +1,39 @@
+import argparse 
+import time 
+
+from es_util import ESClient 
+from .fake_es import FakeES 
+
+
+def run(client: ESClient, 
+        num_calls: int) -> float:
+    index = client.get_index('bench_pool')
+    
+    start = time.perf_counter() 
+    
+    for i in range(num_calls):
+        index.query_by_id(i % 100)
+        
+    return time.perf_counter() - start 
+
+
+def main():
+    parser = argparse.ArgumentParser(description='query_by_id over a pooled vs an unpooled session.')
+    parser.add_argument('--calls', type=int, default=10000)
+    args = parser.parse_args() 
+    
+    with FakeES() as es:
+        setup = ESClient(host=es.host, port=es.port).get_index('bench_pool')
+        
+        for i in range(100):
+            setup.insert({ '_id': i, 'value': i })
+        
+        for name, keep_alive in [('pooled', True), ('unpooled', False)]:
+            client = ESClient(host=es.host, port=es.port, keep_alive=keep_alive)
+            elapsed = run(client, args.calls)
+            
+            print(f"{name:>9}: {args.calls} calls in {elapsed:.2f}s ({args.calls / elapsed:.0f} calls/s)")
+
+
+if __name__ == '__main__':
+    main() 
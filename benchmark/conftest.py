@@ -0,0 +1,20 @@
+import pytest 
+
+from es_util import ESClient 
+from .fake_es import FakeES 
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-docs', type=int, default=2000, help='documents per benchmark case')
+    parser.addoption('--bench-latency', type=float, default=0.0, help='seconds of latency added to every fake ES request')
+
+
+@pytest.fixture(scope='session')
+def num_docs(request) -> int:
+    return request.config.getoption('--bench-docs')
+
+
+@pytest.fixture(scope='session')
+def client(request):
+    with FakeES(latency=request.config.getoption('--bench-latency')) as es:
+        yield ESClient(host=es.host, port=es.port)
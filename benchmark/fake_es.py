@@ -0,0 +1,859 @@
+import copy 
+import datetime 
+import fnmatch 
+import functools 
+import gzip 
+import json 
+import random 
+import re 
+import threading 
+import time 
+import uuid 
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer 
+from typing import Any, Optional 
+from urllib.parse import urlsplit, parse_qs 
+
+from es_util.compression import decompress 
+from es_util.bulk import merge_partial_docs 
+
+__all__ = [
+    'FakeES', 
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True 
+    
+    def log_message(self, format, *args):
+        pass 
+    
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        encoding = self.headers.get('Content-Encoding')
+        self.server.es.bytes_in += len(body)
+        
+        return decompress(body, encoding) if encoding else body 
+    
+    def _send(self, 
+              status: int, 
+              obj: Any):
+        body = json.dumps(obj).encode('utf-8')
+        compressed = self.server.es.http_compression and 'gzip' in self.headers.get('Accept-Encoding', '')
+        
+        if compressed:
+            body = gzip.compress(body, compresslevel=1)
+        
+        self.server.es.bytes_out += len(body)
+        
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+            
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def _dispatch(self, 
+                  method: str):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        params = { k: v[-1] for k, v in parse_qs(url.query).items() }
+        body = self._read_body() 
+        
+        try:
+            status, obj = self.server.es.handle(method, parts, params, body)
+        except Exception as e:
+            status, obj = 500, { 'error': { 'type': type(e).__name__, 'reason': str(e) }, 'status': 500 }
+            
+        self._send(status, obj)
+        
+    def do_GET(self):
+        self._dispatch('GET')
+        
+    def do_POST(self):
+        self._dispatch('POST')
+        
+    def do_PUT(self):
+        self._dispatch('PUT')
+        
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def do_HEAD(self):
+        self._dispatch('HEAD')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True 
+    request_queue_size = 1024 
+
+
+def _match(doc: dict[str, Any],
+           _id: str,
+           query: dict[str, Any]) -> bool:
+    kind, spec = next(iter(query.items()))
+    
+    if kind == 'match_all':
+        return True 
+    elif kind == 'ids':
+        return _id in { str(v) for v in spec['values'] }
+    elif kind in ('term', 'match'):
+        field, value = next(iter(spec.items()))
+        
+        if isinstance(value, dict):
+            value = value.get('value', value.get('query'))
+            
+        return doc.get(field) == value 
+    elif kind == 'terms':
+        field, values = next(iter(spec.items()))
+        
+        return doc.get(field) in values 
+    elif kind == 'exists':
+        return doc.get(spec['field']) is not None 
+    elif kind == 'range':
+        field, bounds = next(iter(spec.items()))
+        value = doc.get(field)
+        
+        if value is None:
+            return False 
+        
+        return all([
+            'gt' not in bounds or value > bounds['gt'], 
+            'gte' not in bounds or value >= bounds['gte'], 
+            'lt' not in bounds or value < bounds['lt'], 
+            'lte' not in bounds or value <= bounds['lte'], 
+        ])
+    elif kind == 'bool':
+        def clauses(key: str) -> list[dict[str, Any]]:
+            value = spec.get(key, [])
+            
+            return value if isinstance(value, list) else [value]
+        
+        should = clauses('should')
+        
+        return (
+            all(_match(doc, _id, q) for q in clauses('must') + clauses('filter')) 
+            and not any(_match(doc, _id, q) for q in clauses('must_not')) 
+            and (not should or any(_match(doc, _id, q) for q in should))
+        )
+    else:
+        raise ValueError(f"unsupported query: {kind}")
+
+
+def _project(source: dict[str, Any],
+             spec: Any) -> Optional[dict[str, Any]]:
+    if spec is None or spec is True:
+        return source 
+    elif spec is False:
+        return None 
+    
+    if isinstance(spec, (str, list)):
+        spec = { 'includes': spec }
+    
+    includes = spec.get('includes') or [] 
+    excludes = spec.get('excludes') or [] 
+    includes = [includes] if isinstance(includes, str) else includes 
+    excludes = [excludes] if isinstance(excludes, str) else excludes 
+    
+    return {
+        k: v for k, v in source.items() 
+        if (not includes or k in includes) and k not in excludes 
+    }
+
+
+def _run_script(script: dict[str, Any],
+                source: dict[str, Any]):
+    # Only `;`-separated `ctx._source.<field> (=|+=|-=) params.<name>|<number>` statements. 
+    params = script.get('params', dict())
+    
+    for statement in filter(None, map(str.strip, script['source'].split(';'))):
+        match = re.fullmatch(r"ctx\._source\.(\w+)\s*([-+]?=)\s*(?:params\.(\w+)|(-?\d+(?:\.\d+)?))", statement)
+        
+        if match is None:
+            raise ValueError(f"unsupported script: {statement}")
+        
+        field, op, param, literal = match.groups()
+        value = params[param] if param is not None else json.loads(literal)
+        
+        if op == '=':
+            source[field] = value 
+        else:
+            source[field] = source.get(field, 0) + (value if op == '+=' else -value)
+
+
+_CALENDAR_UNITS = {
+    'minute': 'minute', '1m': 'minute', 'hour': 'hour', '1h': 'hour', 'day': 'day', '1d': 'day', 
+    'month': 'month', '1M': 'month', 'year': 'year', '1y': 'year', 
+}
+
+_FIXED_SECONDS = { 's': 1, 'm': 60, 'h': 3600, 'd': 86400 }
+
+
+def _date_bucket(value: str,
+                 spec: dict[str, Any]) -> tuple[int, str]:
+    # Dates are the repo's 'yyyy-MM-dd HH:mm:ss' strings, taken as UTC. 
+    moment = datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=datetime.timezone.utc)
+    
+    if 'calendar_interval' in spec:
+        unit = _CALENDAR_UNITS[spec['calendar_interval']]
+        fields = ['year', 'month', 'day', 'hour', 'minute']
+        moment = moment.replace(second=0, **{ 
+            name: 1 if name in ('month', 'day') else 0 
+            for name in fields[fields.index(unit) + 1:]
+        })
+    else:
+        interval = spec['fixed_interval']
+        seconds = int(interval[:-1]) * _FIXED_SECONDS[interval[-1]]
+        moment = datetime.datetime.fromtimestamp(moment.timestamp() // seconds * seconds, tz=datetime.timezone.utc)
+        
+    return int(moment.timestamp() * 1000), moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _aggregate(aggs: dict[str, Any],
+               docs: list[dict[str, Any]]) -> dict[str, Any]:
+    # terms, date_histogram, cardinality, stats and composite, with sub-aggregations. 
+    # Empty date_histogram buckets are not filled in. 
+    results = dict() 
+    
+    for name, clause in aggs.items():
+        sub_aggs = clause.get('aggs')
+        kind, spec = next((key, value) for key, value in clause.items() if key != 'aggs')
+        
+        def bucket(key: Any, members: list[dict[str, Any]], **extra) -> dict[str, Any]:
+            return { 'key': key, **extra, 'doc_count': len(members), **(_aggregate(sub_aggs, members) if sub_aggs else dict()) }
+        
+        if kind == 'terms':
+            groups = dict() 
+            
+            for doc in docs:
+                value = doc.get(spec['field'], spec.get('missing'))
+                
+                for value in (value if isinstance(value, list) else [value]):
+                    if value is not None:
+                        groups.setdefault(value, []).append(doc)
+                        
+            ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), str(item[0])))
+            results[name] = { 'buckets': [
+                bucket(key, members) for key, members in ordered[:spec.get('size', 10)] 
+                if len(members) >= spec.get('min_doc_count', 1)
+            ] }
+        elif kind == 'date_histogram':
+            groups = dict() 
+            
+            for doc in docs:
+                if doc.get(spec['field']) is not None:
+                    groups.setdefault(_date_bucket(doc[spec['field']], spec), []).append(doc)
+                    
+            results[name] = { 'buckets': [
+                bucket(key, members, key_as_string=key_as_string) 
+                for (key, key_as_string), members in sorted(groups.items())
+            ] }
+        elif kind == 'cardinality':
+            values = { json.dumps(doc[spec['field']]) for doc in docs if doc.get(spec['field']) is not None }
+            results[name] = { 'value': len(values) }
+        elif kind == 'stats':
+            values = [doc[spec['field']] for doc in docs if isinstance(doc.get(spec['field']), (int, float))]
+            results[name] = {
+                'count': len(values), 
+                'min': min(values, default=None), 
+                'max': max(values, default=None), 
+                'avg': sum(values) / len(values) if values else None, 
+                'sum': sum(values), 
+            }
+        elif kind == 'composite':
+            groups = dict() 
+            
+            for doc in docs:
+                key = [] 
+                
+                for source in spec['sources']:
+                    (source_name, source_spec), = source.items() 
+                    (source_kind, source_args), = source_spec.items() 
+                    value = doc.get(source_args['field'])
+                    
+                    if value is not None and source_kind == 'date_histogram':
+                        value = _date_bucket(value, source_args)[1]
+                        
+                    key.append((source_name, value))
+                    
+                if all(value is not None for _, value in key):
+                    groups.setdefault(tuple(key), []).append(doc)
+                    
+            ordered = sorted(groups.items(), key=lambda item: [value for _, value in item[0]])
+            
+            if 'after' in spec:
+                after = [spec['after'][source_name] for source_name, _ in ordered[0][0]] if ordered else [] 
+                ordered = [item for item in ordered if [value for _, value in item[0]] > after]
+                
+            buckets = [bucket(dict(key), members) for key, members in ordered[:spec.get('size', 10)]]
+            results[name] = { 'buckets': buckets }
+            
+            if buckets:
+                results[name]['after_key'] = buckets[-1]['key']
+        else:
+            raise ValueError(f"unsupported aggregation: {kind}")
+        
+    return results 
+
+
+def _hit(_id: str,
+         source: dict[str, Any],
+         spec: Any) -> dict[str, Any]:
+    hit = { '_id': _id, '_score': 1.0 }
+    source = _project(source, spec)
+    
+    if source is not None:
+        hit['_source'] = source 
+        
+    return hit 
+
+
+def _sort_spec(sort: Optional[list[Any]]) -> list[tuple[str, bool]]:
+    # `(field, descending)` pairs; `_shard_doc` stands for the snapshot position. 
+    spec = [] 
+    
+    for clause in sort or ['_shard_doc']:
+        if isinstance(clause, str):
+            spec.append((clause, False))
+        else:
+            field, order = next(iter(clause.items()))
+            order = order.get('order', 'asc') if isinstance(order, dict) else order 
+            spec.append((field, order == 'desc'))
+            
+    return spec 
+
+
+def _compare_sort_values(a: list[Any],
+                         b: list[Any],
+                         spec: list[tuple[str, bool]]) -> int:
+    # Missing values sort last in either direction, as in Elasticsearch. 
+    for x, y, (_, descending) in zip(a, b, spec):
+        if x == y:
+            continue 
+        if x is None:
+            return 1 
+        if y is None:
+            return -1 
+        
+        return (1 if x > y else -1) * (-1 if descending else 1)
+    
+    return 0 
+
+
+def _not_found(index_name: str) -> tuple[int, dict[str, Any]]:
+    return 404, {
+        'error': {
+            'type': 'index_not_found_exception', 
+            'reason': f"no such index [{index_name}]", 
+        },
+        'status': 404, 
+    }
+
+
+class FakeES:
+    """
+    A minimal in-process stand-in for the Elasticsearch endpoints used by `ESIndex`. 
+    """
+    
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 reject_rate: float = 0.0,
+                 latency: float = 0.0,
+                 failure_rate: float = 0.0,
+                 http_compression: bool = False):
+        # `latency` seconds are added to every request, `failure_rate` of requests 
+        # fail with a 503, and `reject_rate` of bulk items are rejected with a 429. 
+        self.reject_rate = reject_rate 
+        self.latency = latency 
+        self.failure_rate = failure_rate 
+        # Like `http.compression` in Elasticsearch: gzip responses for clients that accept it. 
+        self.http_compression = http_compression 
+        # Body bytes as they crossed the wire, i.e. compressed when compression is on. 
+        self.bytes_in = 0 
+        self.bytes_out = 0 
+        self.settings: dict[str, dict[str, str]] = dict() 
+        self.pits: dict[str, tuple[str, list[tuple[str, dict[str, Any]]]]] = dict() 
+        self.scrolls: dict[str, tuple[list[dict[str, Any]], int]] = dict() 
+        self.indices: dict[str, dict[str, dict[str, Any]]] = dict() 
+        self.aliases: dict[str, set[str]] = dict() 
+        self.tasks: dict[str, dict[str, Any]] = dict() 
+        # Extra `host:port` addresses reported by `_nodes/http`, to fake a cluster. 
+        self.peers: list[str] = [] 
+        self.lock = threading.Lock() 
+        
+        self.server = _Server((host, port), _Handler)
+        self.server.es = self 
+        self.thread: Optional[threading.Thread] = None 
+        
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+    
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+    
+    def start(self) -> 'FakeES':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start() 
+        
+        return self 
+    
+    def stop(self):
+        self.server.shutdown() 
+        self.server.server_close() 
+        
+    def __enter__(self) -> 'FakeES':
+        return self.start() 
+    
+    def __exit__(self, *exc):
+        self.stop() 
+        
+    def handle(self,
+               method: str,
+               parts: list[str],
+               params: dict[str, str],
+               body: bytes) -> tuple[int, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+            
+        if self.failure_rate and random.random() < self.failure_rate:
+            return 503, { 'error': { 'type': 'unavailable_shards_exception', 'reason': 'injected failure' }, 'status': 503 }
+        
+        if parts and parts[-1] == '_bulk':
+            return self._handle_bulk(parts[0] if len(parts) > 1 else None, body)
+        
+        if parts and parts[-1] == '_msearch':
+            return self._handle_msearch(parts[0], body)
+        
+        req = json.loads(body) if body.strip() else dict() 
+        
+        if parts[:2] == ['_search', 'scroll']:
+            return self._handle_scroll(method, params, req)
+        
+        if parts == ['_pit']:
+            with self.lock:
+                self.pits.pop(req.get('id'), None)
+                
+            return 200, { 'succeeded': True, 'num_freed': 1 }
+        
+        if parts == ['_search'] and 'pit' in req:
+            return self._handle_pit_search(req)
+        
+        if parts[:2] == ['_cluster', 'health']:
+            return 200, { 'status': 'green', 'timed_out': False }
+        
+        if parts and parts[0] in ('_alias', '_aliases', '_cat', '_reindex', '_tasks'):
+            with self.lock:
+                return self._handle_admin(method, parts, req)
+        
+        if parts == ['_nodes', 'http']:
+            addresses = [f"{self.host}:{self.port}", *self.peers]
+            
+            return 200, { 'nodes': {
+                f"node-{i}": { 'roles': ['data', 'master'], 'http': { 'publish_address': address } } 
+                for i, address in enumerate(addresses)
+            } }
+        
+        if not parts:
+            return 200, { 'version': { 'number': '8.0.0' }, 'tagline': 'You Know, for Search' }
+        
+        index_name = parts[0]
+        
+        with self.lock:
+            if len(self.aliases.get(index_name, ())) == 1:
+                index_name = next(iter(self.aliases[index_name]))
+                
+            if len(parts) == 1:
+                if method == 'PUT':
+                    if index_name in self.indices:
+                        return 400, { 'error': { 'reason': f"index [{index_name}] already exists" } }
+                    
+                    self.indices[index_name] = dict() 
+                    
+                    return 200, { 'acknowledged': True }
+                elif method == 'DELETE':
+                    if self.indices.pop(index_name, None) is None:
+                        return 404, { 'error': { 'reason': f"no such index [{index_name}]" } }
+                    
+                    return 200, { 'acknowledged': True }
+            
+            if parts[1] == '_count':
+                if index_name not in self.indices:
+                    return _not_found(index_name)
+                
+                return 200, { 'count': len(self.indices[index_name]) }
+            
+            if parts[-1] == '_pit':
+                if index_name not in self.indices:
+                    return _not_found(index_name)
+                
+                pit_id = uuid.uuid4().hex 
+                self.pits[pit_id] = (index_name, list(self.indices[index_name].items()))
+                
+                return 200, { 'id': pit_id }
+            
+            if parts[-1] == '_search':
+                if index_name not in self.indices:
+                    return _not_found(index_name)
+                
+                return self._handle_search(index_name, params, req)
+            
+            if parts[-1] == '_mget':
+                docs = self.indices.get(index_name, dict())
+                
+                return 200, { 'docs': [
+                    { '_id': _id, 'found': True, '_source': docs[_id] } if _id in docs else { '_id': _id, 'found': False } 
+                    for _id in map(str, req['ids'])
+                ] }
+            
+            if parts[1] == '_settings':
+                settings = self.settings.setdefault(index_name, dict())
+                
+                if method == 'PUT':
+                    for key, value in req.items():
+                        if value is None:
+                            settings.pop(key, None)
+                        else:
+                            settings[key] = str(value)
+                            
+                    return 200, { 'acknowledged': True }
+                
+                return 200, { index_name: { 'settings': dict(settings) } }
+            
+            if parts[1] in ('_delete_by_query', '_update_by_query'):
+                if index_name not in self.indices:
+                    return _not_found(index_name)
+                
+                return self._handle_by_query(parts[1], index_name, req)
+            
+            if parts[1] in ('_flush', '_refresh', '_forcemerge'):
+                return 200, { '_shards': { 'failed': 0 } }
+            
+            if len(parts) >= 2 and not parts[1].startswith('_search'):
+                return self._handle_doc(method, index_name, parts[2:] if len(parts) > 2 else [], req)
+        
+        return 400, { 'error': { 'type': 'unsupported', 'reason': f"{method} /{'/'.join(parts)}" } }
+    
+    def _handle_admin(self,
+                      method: str,
+                      parts: list[str],
+                      req: dict[str, Any]) -> tuple[int, Any]:
+        if parts[0] == '_alias':
+            index_names = self.aliases.get(parts[1], set())
+            
+            if not index_names:
+                return 404, { 'error': f"alias [{parts[1]}] missing", 'status': 404 }
+            
+            return 200, { name: { 'aliases': { parts[1]: dict() } } for name in index_names }
+        
+        if parts[0] == '_aliases':
+            for action in req['actions']:
+                (kind, spec), = action.items()
+                
+                if kind == 'add':
+                    self.aliases.setdefault(spec['alias'], set()).add(spec['index'])
+                elif kind == 'remove':
+                    self.aliases.get(spec['alias'], set()).discard(spec['index'])
+                elif kind == 'remove_index':
+                    self.indices.pop(spec['index'], None)
+                    
+            return 200, { 'acknowledged': True }
+        
+        if parts[0] == '_cat':
+            pattern = parts[2] if len(parts) > 2 else '*'
+            
+            return 200, [{ 'index': name } for name in self.indices if fnmatch.fnmatch(name, pattern)]
+        
+        if parts[0] == '_reindex':
+            source = req['source']['index']
+            source = next(iter(self.aliases[source])) if len(self.aliases.get(source, ())) == 1 else source 
+            
+            if source not in self.indices:
+                return _not_found(source)
+            
+            docs = self.indices[source]
+            self.indices.setdefault(req['dest']['index'], dict()).update(copy.deepcopy(docs))
+            
+            return 200, { 'task': self._completed_task(total=len(docs), created=len(docs)) }
+        
+        if parts[0] == '_tasks':
+            if parts[1] not in self.tasks:
+                return 404, { 'error': { 'type': 'resource_not_found_exception', 'reason': f"task [{parts[1]}] isn't running" } }
+            
+            if parts[-1] == '_cancel':
+                return 200, { 'nodes': dict() }
+            
+            return 200, self.tasks[parts[1]]
+        
+        return 400, { 'error': { 'type': 'unsupported', 'reason': f"{method} /{'/'.join(parts)}" } }
+    
+    def _completed_task(self,
+                        **counts) -> str:
+        # Tasks finish synchronously here; `_tasks` reports them as already completed. 
+        task_id = f"fake:{len(self.tasks) + 1}"
+        self.tasks[task_id] = {
+            'completed': True, 
+            'task': { 'status': dict(counts) }, 
+            'response': { **counts, 'failures': [] }, 
+        }
+        
+        return task_id 
+    
+    def _handle_by_query(self,
+                         endpoint: str,
+                         index_name: str,
+                         req: dict[str, Any]) -> tuple[int, Any]:
+        docs = self.indices[index_name]
+        matched = [_id for _id, doc in docs.items() if _match(doc, _id, req.get('query') or { 'match_all': {} })]
+        
+        if endpoint == '_delete_by_query':
+            for _id in matched:
+                del docs[_id]
+                
+            return 200, { 'task': self._completed_task(total=len(matched), deleted=len(matched)) }
+        
+        for _id in matched:
+            if 'script' in req:
+                _run_script(req['script'], docs[_id])
+                
+        return 200, { 'task': self._completed_task(total=len(matched), updated=len(matched)) }
+    
+    def _handle_doc(self,
+                    method: str,
+                    index_name: str,
+                    rest: list[str],
+                    req: dict[str, Any]) -> tuple[int, Any]:
+        docs = self.indices.setdefault(index_name, dict())
+        
+        if not rest:
+            _id = uuid.uuid4().hex 
+            docs[_id] = req 
+            
+            return 201, { '_id': _id, 'result': 'created' }
+        
+        _id = rest[0]
+        
+        if len(rest) > 1 and rest[1] == '_update':
+            if _id not in docs:
+                return 404, { 'error': { 'type': 'document_missing_exception' } }
+            
+            docs[_id] = merge_partial_docs(docs[_id], req.get('doc', dict()))
+            
+            return 200, { '_id': _id, 'result': 'updated' }
+        
+        if method == 'GET':
+            if _id in docs:
+                return 200, { '_id': _id, 'found': True, '_source': docs[_id] }
+            else:
+                return 404, { '_id': _id, 'found': False }
+        elif method == 'DELETE':
+            if docs.pop(_id, None) is None:
+                return 404, { '_id': _id, 'result': 'not_found' }
+            
+            return 200, { '_id': _id, 'result': 'deleted' }
+        else:
+            result = 'updated' if _id in docs else 'created'
+            docs[_id] = req 
+            
+            return 200, { '_id': _id, 'result': result }
+
+    def _handle_bulk(self,
+                     default_index: Optional[str],
+                     body: bytes) -> tuple[int, Any]:
+        lines = [line for line in body.split(b'\n') if line.strip()]
+        items = [] 
+        i = 0 
+        
+        with self.lock:
+            while i < len(lines):
+                action = json.loads(lines[i])
+                op, meta = next(iter(action.items()))
+                i += 1 
+                
+                if op == 'delete':
+                    source = None 
+                else:
+                    source = json.loads(lines[i])
+                    i += 1 
+                    
+                docs = self.indices.setdefault(meta.get('_index', default_index), dict())
+                _id = str(meta.get('_id') or uuid.uuid4().hex)
+                
+                if self.reject_rate and random.random() < self.reject_rate:
+                    items.append({ op: { '_id': _id, 'status': 429, 'error': { 'type': 'es_rejected_execution_exception', 'reason': 'rejected execution' } } })
+                elif op == 'delete':
+                    found = docs.pop(_id, None) is not None 
+                    items.append({ op: { '_id': _id, 'status': 200 if found else 404, 'result': 'deleted' if found else 'not_found' } })
+                elif op == 'update':
+                    upsert = source.get('doc_as_upsert') or 'upsert' in source 
+                    
+                    if _id not in docs and not upsert:
+                        items.append({ op: { '_id': _id, 'status': 404, 'error': { 'type': 'document_missing_exception', 'reason': 'document missing' } } })
+                    elif 'script' in source:
+                        if _id not in docs:
+                            docs[_id] = dict(source['upsert'])
+                            
+                            if not source.get('scripted_upsert'):
+                                items.append({ op: { '_id': _id, 'status': 201, 'result': 'created' } })
+                                continue 
+                                
+                        try:
+                            _run_script(source['script'], docs[_id])
+                            items.append({ op: { '_id': _id, 'status': 200, 'result': 'updated' } })
+                        except ValueError as e:
+                            items.append({ op: { '_id': _id, 'status': 400, 'error': { 'type': 'illegal_argument_exception', 'reason': str(e) } } })
+                    else:
+                        docs[_id] = merge_partial_docs(docs.get(_id, dict()), source.get('doc', dict()))
+                        items.append({ op: { '_id': _id, 'status': 200, 'result': 'updated' } })
+                else:
+                    result = 'updated' if _id in docs else 'created'
+                    docs[_id] = source 
+                    items.append({ op: { '_id': _id, 'status': 201 if result == 'created' else 200, 'result': result } })
+                    
+        errors = any('error' in next(iter(item.values())) for item in items)
+        
+        return 200, { 'took': 1, 'errors': errors, 'items': items }
+
+    def _knn_hits(self,
+                  index_name: str,
+                  req: dict[str, Any]) -> list[dict[str, Any]]:
+        knn = req['knn']
+        field = knn['field']
+        query_vector = knn['query_vector']
+        filter_ = knn.get('filter') or { 'match_all': {} }
+        scored = [] 
+        
+        for _id, doc in self.indices[index_name].items():
+            if doc.get(field) is None or not _match(doc, _id, filter_):
+                continue 
+            
+            distance = sum((a - b) ** 2 for a, b in zip(doc[field], query_vector))
+            scored.append((1 / (1 + distance), _id, doc))
+            
+        scored.sort(key=lambda x: -x[0])
+        hits = [] 
+        
+        for score, _id, doc in scored[:knn['k']]:
+            hit = _hit(_id, doc, req.get('_source'))
+            hit['_score'] = score 
+            hits.append(hit)
+            
+        return hits 
+    
+    def _search_hits(self,
+                     index_name: str,
+                     req: dict[str, Any]) -> list[dict[str, Any]]:
+        if 'knn' in req:
+            return self._knn_hits(index_name, req)
+        
+        query = req.get('query') or { 'match_all': {} }
+        slice_ = req.get('slice')
+        
+        return [
+            _hit(_id, doc, req.get('_source'))
+            for _id, doc in self.indices[index_name].items() 
+            if _match(doc, _id, query) 
+            and (slice_ is None or hash(_id) % slice_['max'] == slice_['id'])
+        ]
+    
+    def _handle_search(self,
+                       index_name: str,
+                       params: dict[str, str],
+                       req: dict[str, Any]) -> tuple[int, Any]:
+        hits = self._search_hits(index_name, req)
+        size = int(params.get('size', req.get('size', 10)))
+        resp = { 'took': 1, 'timed_out': False, 'hits': { 'total': { 'value': len(hits), 'relation': 'eq' } } }
+        
+        if 'aggs' in req:
+            resp['aggregations'] = _aggregate(req['aggs'], [hit['_source'] for hit in hits])
+        
+        if 'scroll' in params:
+            scroll_id = uuid.uuid4().hex 
+            self.scrolls[scroll_id] = (hits[size:], size)
+            resp['_scroll_id'] = scroll_id 
+            
+        resp['hits']['hits'] = hits[:size]
+        
+        return 200, resp 
+    
+    def _handle_scroll(self,
+                       method: str,
+                       params: dict[str, str],
+                       req: dict[str, Any]) -> tuple[int, Any]:
+        with self.lock:
+            if method == 'DELETE':
+                scroll_ids = req.get('scroll_id', [])
+                scroll_ids = [scroll_ids] if isinstance(scroll_ids, str) else scroll_ids 
+                num_freed = sum(self.scrolls.pop(scroll_id, None) is not None for scroll_id in scroll_ids)
+                
+                return 200, { 'succeeded': True, 'num_freed': num_freed }
+            
+            scroll_id = req['scroll_id']
+            
+            if scroll_id not in self.scrolls:
+                return 404, { 'error': { 'type': 'search_context_missing_exception' } }
+            
+            remaining, size = self.scrolls[scroll_id]
+            self.scrolls[scroll_id] = (remaining[size:], size)
+            
+        return 200, { '_scroll_id': scroll_id, 'took': 1, 'hits': { 'hits': remaining[:size] } }
+
+    def _handle_pit_search(self,
+                           req: dict[str, Any]) -> tuple[int, Any]:
+        pit_id = req['pit']['id']
+        
+        with self.lock:
+            if pit_id not in self.pits:
+                return 404, { 'error': { 'type': 'search_context_missing_exception' } }
+            
+            _, snapshot = self.pits[pit_id]
+            
+        query = req.get('query') or { 'match_all': {} }
+        spec = _sort_spec(req.get('sort'))
+        search_after = req.get('search_after')
+        size = req.get('size', 10)
+        rows = [] 
+        
+        for position, (_id, doc) in enumerate(snapshot):
+            if _match(doc, _id, query):
+                values = [position if field == '_shard_doc' else doc.get(field) for field, _ in spec]
+                
+                if search_after is None or _compare_sort_values(values, search_after, spec) > 0:
+                    rows.append((values, _id, doc))
+                    
+        rows.sort(key=functools.cmp_to_key(lambda a, b: _compare_sort_values(a[0], b[0], spec)))
+        hits = [] 
+        
+        for values, _id, doc in rows[:size]:
+            hit = _hit(_id, doc, req.get('_source'))
+            hit['sort'] = values 
+            hits.append(hit)
+                
+        return 200, { 'pit_id': pit_id, 'took': 1, 'hits': { 'hits': hits } }
+
+    def _handle_msearch(self,
+                        index_name: str,
+                        body: bytes) -> tuple[int, Any]:
+        lines = [line for line in body.split(b'\n') if line.strip()]
+        responses = [] 
+        
+        for header, line in zip(lines[0::2], lines[1::2]):
+            target = json.loads(header).get('index', index_name)
+            
+            if target not in self.indices:
+                responses.append({ **_not_found(target)[1], 'status': 404 })
+            else:
+                try:
+                    status, resp = self._handle_search(target, dict(), json.loads(line))
+                except ValueError as e:
+                    status, resp = 400, { 'error': { 'type': 'parsing_exception', 'reason': str(e) } }
+                    
+                responses.append({ **resp, 'status': status })
+                
+        return 200, { 'took': 1, 'responses': responses }
@@ -0,0 +1,217 @@
+import multiprocessing 
+import resource 
+import time 
+from concurrent.futures import ProcessPoolExecutor 
+from typing import Any 
+from collections.abc import Callable 
+
+from es_util import ESClient, ESIndex 
+from es_util.error import ESError 
+
+__all__ = [
+    'BenchContext', 
+    'BENCHMARKS', 
+    'seeded', 
+    'run_benchmark', 
+    'run_isolated', 
+]
+
+
+class BenchContext:
+    """
+    Per-case measurement state: the index under test, call latencies and the bytes 
+    that crossed the wire in both directions. 
+    """
+    
+    def __init__(self,
+                 client: ESClient,
+                 index_name: str,
+                 num_docs: int):
+        self.client = client 
+        self.index: ESIndex = client.get_index(index_name)
+        self.num_docs = num_docs 
+        self.latencies: list[float] = [] 
+        self.num_bytes = 0 
+        self.num_errors = 0 
+        self.start_time = time.perf_counter() 
+        
+        client.session.hooks['response'].append(self._count_bytes)
+        
+    def _count_bytes(self, resp, *args, **kwargs):
+        body = resp.request.body 
+        self.num_bytes += (len(body) if isinstance(body, (bytes, str)) else 0) + len(resp.content)
+        
+    def close(self):
+        self.client.session.hooks['response'].remove(self._count_bytes)
+        
+    def timed(self,
+              fn: Callable[..., Any],
+              *args,
+              **kwargs) -> Any:
+        start = time.perf_counter() 
+        
+        try:
+            return fn(*args, **kwargs)
+        except ESError:
+            self.num_errors += 1 
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+            
+    def seed(self):
+        # Loading the data set is setup, not part of the measured run. 
+        self.index.parallel_bulk_insert(_docs(self), batch_size=1000)
+        self.num_bytes = 0 
+        self.start_time = time.perf_counter() 
+
+
+def _percentile(values: list[float],
+                q: float) -> float:
+    if not values:
+        return 0.0 
+    
+    values = sorted(values)
+    
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _docs(ctx: BenchContext):
+    return ({ '_id': i, 'value': i, 'name': f"doc {i}" } for i in range(ctx.num_docs))
+
+
+def seeded(fn: Callable[[BenchContext], int]) -> Callable[[BenchContext], int]:
+    """
+    Mark a case that reads from a seeded index; the seed is loaded before the case 
+    is timed. 
+    """
+    fn.seeded = True 
+    
+    return fn 
+
+
+def bench_bulk_insert(ctx: BenchContext) -> int:
+    batch = [] 
+    
+    for doc in _docs(ctx):
+        batch.append(doc)
+        
+        if len(batch) >= 1000:
+            ctx.timed(ctx.index.bulk_insert, batch)
+            batch = [] 
+            
+    if batch:
+        ctx.timed(ctx.index.bulk_insert, batch)
+        
+    return ctx.num_docs 
+
+
+def bench_bulk_insert_old(ctx: BenchContext) -> int:
+    ctx.timed(ctx.index.bulk_insert_old, _docs(ctx), batch_size=1000, use_tqdm=False)
+    
+    return ctx.num_docs 
+
+
+def bench_parallel_bulk_insert(ctx: BenchContext) -> int:
+    ctx.timed(ctx.index.parallel_bulk_insert, _docs(ctx), batch_size=1000)
+    
+    return ctx.num_docs 
+
+
+@seeded 
+def bench_scroll(ctx: BenchContext) -> int:
+    return ctx.timed(lambda: sum(1 for _ in ctx.index.scroll(scroll_size=1000))) or 0 
+
+
+@seeded 
+def bench_query_by_id(ctx: BenchContext) -> int:
+    num_calls = min(ctx.num_docs, 5000)
+    
+    for i in range(num_calls):
+        ctx.timed(ctx.index.query_by_id, i)
+        
+    return num_calls 
+
+
+@seeded 
+def bench_query_id_in_x(ctx: BenchContext) -> int:
+    num_docs = 0 
+    
+    for start in range(0, ctx.num_docs, 100):
+        num_docs += len(ctx.timed(ctx.index.query_id_in_x, range(start, min(start + 100, ctx.num_docs))) or [])
+        
+    return num_docs 
+
+
+BENCHMARKS: dict[str, Callable[[BenchContext], int]] = {
+    name[len('bench_'):]: fn 
+    for name, fn in list(globals().items()) 
+    if name.startswith('bench_') and callable(fn)
+}
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM is the high-water mark of this process's own memory and starts afresh 
+    # on exec; ru_maxrss (KiB on Linux) is carried across exec from the parent. 
+    try:
+        with open('/proc/self/status', encoding='ascii') as fp:
+            for line in fp:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024 
+    except OSError:
+        pass 
+    
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 
+
+
+def run_benchmark(name: str,
+                  client: ESClient,
+                  num_docs: int) -> dict[str, Any]:
+    """
+    Run one case with `client`. The RSS figures are those of the whole process, so 
+    they are only the case's own in a fresh one; see `run_isolated`. 
+    """
+    base_rss_mb = _peak_rss_mb() 
+    ctx = BenchContext(client, index_name=f"bench_{name}", num_docs=num_docs)
+    
+    try:
+        if getattr(BENCHMARKS[name], 'seeded', False):
+            ctx.seed() 
+            
+        num_processed = BENCHMARKS[name](ctx)
+        elapsed = time.perf_counter() - ctx.start_time 
+    finally:
+        ctx.close() 
+        
+    return {
+        'name': name, 
+        'docs': num_processed, 
+        'elapsed': elapsed, 
+        'docs_per_sec': num_processed / elapsed if elapsed > 0 else 0.0, 
+        'bytes_per_sec': ctx.num_bytes / elapsed if elapsed > 0 else 0.0, 
+        'calls': len(ctx.latencies), 
+        'errors': ctx.num_errors, 
+        'p50_ms': _percentile(ctx.latencies, 0.50) * 1000, 
+        'p99_ms': _percentile(ctx.latencies, 0.99) * 1000, 
+        'base_rss_mb': base_rss_mb, 
+        'peak_rss_mb': _peak_rss_mb(), 
+    }
+
+
+def _run_in_child(name: str,
+                  host: str,
+                  port: int,
+                  num_docs: int) -> dict[str, Any]:
+    return run_benchmark(name, ESClient(host=host, port=port), num_docs=num_docs)
+
+
+def run_isolated(name: str,
+                 host: str,
+                 port: int,
+                 num_docs: int) -> dict[str, Any]:
+    """
+    `run_benchmark` in a freshly spawned process, so `peak_rss_mb` is this case's 
+    peak rather than the largest of every case run before it; `base_rss_mb` is 
+    the interpreter and imports alone. A forked child would share the parent's 
+    pages and start from its high-water mark, hence spawn. 
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_run_in_child, name, host, port, num_docs).result() 
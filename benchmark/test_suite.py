@@ -0,0 +1,33 @@
+import pytest 
+
+pytest.importorskip('pytest_benchmark')
+
+from .suite import BENCHMARKS, BenchContext 
+
+
+@pytest.mark.parametrize('name', list(BENCHMARKS))
+def test_case(benchmark, client, num_docs, name):
+    # The same cases as `python -m benchmark`, timed by pytest-benchmark over several 
+    # rounds; seeding happens in `setup`, outside the timing. 
+    fn = BENCHMARKS[name]
+    contexts = [] 
+    
+    def setup():
+        ctx = BenchContext(client, index_name=f"bench_{name}", num_docs=num_docs)
+        contexts.append(ctx)
+        
+        if getattr(fn, 'seeded', False):
+            ctx.seed() 
+            
+        return (ctx,), dict() 
+    
+    try:
+        num_processed = benchmark.pedantic(fn, setup=setup, rounds=5)
+    finally:
+        for ctx in contexts:
+            ctx.close() 
+    
+    benchmark.extra_info['docs'] = num_processed 
+    
+    assert num_processed == (min(num_docs, 5000) if name == 'query_by_id' else num_docs)
+    assert all(ctx.num_errors == 0 for ctx in contexts)
@@ -1,3 +1,8 @@
 from .client import * 
 from .index import * 
 from . import es_type as ESType 
+from .aio import * 
+from .query import * 
+from .aggs import * 
+from .schema import * 
+from .results import * 
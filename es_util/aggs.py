@@ -0,0 +1,277 @@
+from typing import Any, Optional, Union 
+from collections.abc import Iterable 
+
+__all__ = [
+    'Agg', 
+    'Terms', 
+    'Cardinality', 
+    'Stats', 
+    'DateHistogram', 
+    'Composite', 
+    'to_columns', 
+]
+
+
+class Agg:
+    """
+    Base class of aggregation builders. `to_dict` gives the request clause and 
+    `parse` turns the matching part of the response into plain Python values. 
+    """
+    
+    def to_dict(self) -> dict[str, Any]:
+        raise NotImplementedError 
+    
+    def parse(self,
+              raw: dict[str, Any]) -> Any:
+        raise NotImplementedError 
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})" 
+
+
+def _compile_aggs(aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]]) -> dict[str, Any]:
+    return { name: agg.to_dict() if isinstance(agg, Agg) else agg for name, agg in (aggs or dict()).items() }
+
+
+def _parse_aggs(aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]],
+                raw: dict[str, Any]) -> dict[str, Any]:
+    return { name: agg.parse(raw[name]) if isinstance(agg, Agg) else raw[name] for name, agg in (aggs or dict()).items() }
+
+
+def _flatten(prefix: str,
+             value: Any) -> dict[str, Any]:
+    if isinstance(value, dict):
+        flat = dict() 
+        
+        for key, sub_value in value.items():
+            flat.update(_flatten(f"{prefix}.{key}", sub_value))
+        
+        return flat 
+    else:
+        return { prefix: value }
+
+
+def to_columns(rows: Iterable[dict[str, Any]]) -> dict[str, list[Any]]:
+    """
+    Transpose rows into `{column: values}`, ready for `pandas.DataFrame(columns)` or 
+    `numpy.asarray(columns[name])`. Nested values become dotted column names and 
+    missing values become None. 
+    """
+    flat_rows = []
+    
+    for row in rows:
+        flat_row = dict() 
+        
+        for key, value in row.items():
+            flat_row.update(_flatten(key, value))
+        
+        flat_rows.append(flat_row)
+    
+    names = list(dict.fromkeys(name for row in flat_rows for name in row))
+    
+    return { name: [row.get(name) for row in flat_rows] for name in names }
+
+
+class _BucketAgg(Agg):
+    # Bucket aggregations parse into `{key: doc_count}`, or `{key: {doc_count, <sub-aggs>}}` 
+    # when they have sub-aggregations; `rows` gives one flat dict per bucket instead. 
+    
+    key_field = 'key' 
+    
+    def __init__(self,
+                 aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]] = None):
+        self.aggs = aggs 
+    
+    def _with_aggs(self,
+                   clause: dict[str, Any]) -> dict[str, Any]:
+        if self.aggs:
+            clause['aggs'] = _compile_aggs(self.aggs)
+        
+        return clause 
+    
+    def _bucket_key(self,
+                    bucket: dict[str, Any]) -> Any:
+        return bucket.get(self.key_field, bucket['key'])
+    
+    def rows(self,
+             raw: dict[str, Any]) -> list[dict[str, Any]]:
+        return [
+            { 'key': self._bucket_key(bucket), 'doc_count': bucket['doc_count'], **_parse_aggs(self.aggs, bucket) }
+            for bucket in raw['buckets']
+        ]
+    
+    def parse(self,
+              raw: dict[str, Any]) -> dict[Any, Any]:
+        if not self.aggs:
+            return { self._bucket_key(bucket): bucket['doc_count'] for bucket in raw['buckets'] }
+        
+        return {
+            self._bucket_key(bucket): { 'doc_count': bucket['doc_count'], **_parse_aggs(self.aggs, bucket) }
+            for bucket in raw['buckets']
+        }
+
+
+class Terms(_BucketAgg):
+    def __init__(self,
+                 field: str,
+                 size: int = 10, 
+                 min_doc_count: int = 1, 
+                 missing: Any = None, 
+                 order: Optional[dict[str, str]] = None, 
+                 aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]] = None):
+        super().__init__(aggs)
+        self.field = field 
+        self.size = size 
+        self.min_doc_count = min_doc_count 
+        self.missing = missing 
+        self.order = order 
+    
+    def to_dict(self) -> dict[str, Any]:
+        terms = { 'field': self.field, 'size': self.size, 'min_doc_count': self.min_doc_count }
+        
+        if self.missing is not None:
+            terms['missing'] = self.missing 
+        if self.order is not None:
+            terms['order'] = self.order 
+        
+        return self._with_aggs({ 'terms': terms })
+
+
+class DateHistogram(_BucketAgg):
+    """
+    Buckets are keyed by `key_as_string`, formatted with `format` (the repo's date 
+    format by default). 
+    """
+    
+    key_field = 'key_as_string' 
+    
+    def __init__(self,
+                 field: str,
+                 calendar_interval: Optional[str] = None, 
+                 fixed_interval: Optional[str] = None, 
+                 format: str = 'yyyy-MM-dd HH:mm:ss', 
+                 time_zone: Optional[str] = None, 
+                 min_doc_count: int = 0, 
+                 aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]] = None):
+        if (calendar_interval is None) == (fixed_interval is None):
+            raise ValueError('exactly one of calendar_interval and fixed_interval is required')
+        
+        super().__init__(aggs)
+        self.field = field 
+        self.calendar_interval = calendar_interval 
+        self.fixed_interval = fixed_interval 
+        self.format = format 
+        self.time_zone = time_zone 
+        self.min_doc_count = min_doc_count 
+    
+    def to_dict(self) -> dict[str, Any]:
+        histogram = { 'field': self.field, 'format': self.format, 'min_doc_count': self.min_doc_count }
+        
+        if self.calendar_interval is not None:
+            histogram['calendar_interval'] = self.calendar_interval 
+        else:
+            histogram['fixed_interval'] = self.fixed_interval 
+        
+        if self.time_zone is not None:
+            histogram['time_zone'] = self.time_zone 
+        
+        return self._with_aggs({ 'date_histogram': histogram })
+
+
+class Cardinality(Agg):
+    """
+    Approximate distinct count; exact below `precision_threshold`. 
+    """
+    
+    def __init__(self,
+                 field: str,
+                 precision_threshold: Optional[int] = None):
+        self.field = field 
+        self.precision_threshold = precision_threshold 
+    
+    def to_dict(self) -> dict[str, Any]:
+        cardinality = { 'field': self.field }
+        
+        if self.precision_threshold is not None:
+            cardinality['precision_threshold'] = self.precision_threshold 
+        
+        return { 'cardinality': cardinality }
+    
+    def parse(self,
+              raw: dict[str, Any]) -> int:
+        return raw['value']
+
+
+class Stats(Agg):
+    def __init__(self,
+                 field: str):
+        self.field = field 
+    
+    def to_dict(self) -> dict[str, Any]:
+        return { 'stats': { 'field': self.field } }
+    
+    def parse(self,
+              raw: dict[str, Any]) -> dict[str, Any]:
+        return { key: raw.get(key) for key in ['count', 'min', 'max', 'avg', 'sum'] }
+
+
+class Composite(Agg):
+    """
+    Composite aggregation over `sources`, each a field name (a terms source) or a 
+    `Terms` / `DateHistogram` builder. Use `ESIndex.iter_composite` to page through 
+    every bucket with `after_key`. 
+    """
+    
+    def __init__(self,
+                 sources: dict[str, Union[str, Terms, DateHistogram]],
+                 size: int = 1000, 
+                 after: Optional[dict[str, Any]] = None, 
+                 aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]] = None):
+        self.sources = sources 
+        self.size = size 
+        self.after = after 
+        self.aggs = aggs 
+    
+    def _source_dict(self,
+                     source: Union[str, Terms, DateHistogram]) -> dict[str, Any]:
+        if isinstance(source, str):
+            return { 'terms': { 'field': source } }
+        elif isinstance(source, Terms):
+            terms = { 'field': source.field }
+            
+            if source.missing is not None:
+                terms['missing_bucket'] = True 
+            
+            return { 'terms': terms }
+        else:
+            histogram = source.to_dict()['date_histogram']
+            histogram.pop('min_doc_count', None)
+            
+            return { 'date_histogram': histogram }
+    
+    def to_dict(self) -> dict[str, Any]:
+        composite = {
+            'size': self.size, 
+            'sources': [{ name: self._source_dict(source) } for name, source in self.sources.items()], 
+        }
+        
+        if self.after is not None:
+            composite['after'] = self.after 
+        
+        clause = { 'composite': composite }
+        
+        if self.aggs:
+            clause['aggs'] = _compile_aggs(self.aggs)
+        
+        return clause 
+    
+    def rows(self,
+             raw: dict[str, Any]) -> list[dict[str, Any]]:
+        return [
+            { **bucket['key'], 'doc_count': bucket['doc_count'], **_parse_aggs(self.aggs, bucket) }
+            for bucket in raw['buckets']
+        ]
+    
+    def parse(self,
+              raw: dict[str, Any]) -> list[dict[str, Any]]:
+        return self.rows(raw)
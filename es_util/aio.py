@@ -0,0 +1,789 @@
+from .error import *
+from .util import *
+from .codec import *
+from .bulk import *
+from .query import *
+from .instrument import *
+from .node import *
+from .compression import *
+from .index import _hit_entry 
+
+import asyncio 
+import ssl 
+import time 
+from contextlib import aclosing 
+from typing import Optional, Any, Union, Callable 
+from collections.abc import Iterable, AsyncIterator, AsyncIterable 
+
+try:
+    import aiohttp 
+except ImportError:
+    aiohttp = None 
+
+__all__ = [
+    'AsyncESClient', 
+    'AsyncESIndex', 
+]
+
+
+def _is_connect_error(error: BaseException) -> bool:
+    # aiohttp only gained a distinct connect timeout in 3.10. 
+    return isinstance(error, (aiohttp.ClientConnectorError, getattr(aiohttp, 'ConnectionTimeoutError', ())))
+
+
+class AsyncESClient:
+    def __init__(self,
+                 host: Union[str, list[str]],
+                 port: int = 9200, 
+                 username: str = 'elastic', 
+                 password: Optional[str] = None, 
+                 pool_maxsize: int = 100, 
+                 pool_maxsize_per_host: int = 0, 
+                 keepalive_timeout: float = 15.0, 
+                 max_concurrency: int = 100, 
+                 hooks: Optional[list[Instrumentation]] = None, 
+                 scheme: str = 'http', 
+                 selector: str = 'round_robin', 
+                 dead_timeout: float = 1.0, 
+                 sniff_on_start: bool = False, 
+                 sniff_interval: Optional[float] = None, 
+                 verify_certs: bool = True, 
+                 ca_certs: Optional[str] = None, 
+                 compression: Optional[str] = None, 
+                 compression_level: Optional[int] = None, 
+                 compression_min_size: int = 1024, 
+                 timeout: Optional[float] = 60.0, 
+                 bulk_timeout: Optional[float] = None, 
+                 retry_non_idempotent: bool = False):
+        if aiohttp is None:
+            raise ImportError("AsyncESClient requires aiohttp: pip install aiohttp")
+        
+        self.host = host 
+        self.port = port 
+        
+        urls = [parse_node(node, scheme=scheme, default_port=port) for node in ([host] if isinstance(host, str) else host)]
+        
+        self.nodes = NodePool(
+            nodes = urls, 
+            selector = selector, 
+            dead_timeout = dead_timeout, 
+            sniff_on_start = sniff_on_start, 
+            sniff_interval = sniff_interval, 
+            scheme = urls[0].split('://')[0], 
+        )
+        
+        if ca_certs is not None:
+            self.ssl: Union[bool, ssl.SSLContext] = ssl.create_default_context(cafile=ca_certs)
+        else:
+            self.ssl = verify_certs 
+        
+        # aiohttp sends `Accept-Encoding: gzip, deflate` and decompresses responses itself. 
+        if compression is not None:
+            self.compressor: Optional[BodyCompressor] = BodyCompressor(compression, level=compression_level, min_size=compression_min_size)
+        else:
+            self.compressor = None 
+        
+        if password:
+            self.auth = aiohttp.BasicAuth(username, password)
+        else:
+            self.auth = None 
+        
+        self.pool_maxsize = pool_maxsize 
+        self.pool_maxsize_per_host = pool_maxsize_per_host 
+        self.keepalive_timeout = keepalive_timeout 
+        self.timeout = timeout 
+        self.bulk_timeout = bulk_timeout 
+        self.retry_non_idempotent = retry_non_idempotent 
+        self.max_concurrency = max_concurrency 
+        self.hooks = list(hooks) if hooks else []
+        
+        # The session and semaphore bind to the running event loop, so they are 
+        # created on first use rather than here. 
+        self._session: Optional[aiohttp.ClientSession] = None 
+        self._semaphore: Optional[asyncio.Semaphore] = None 
+    
+    @property 
+    def session(self) -> 'aiohttp.ClientSession':
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector = aiohttp.TCPConnector(
+                    limit = self.pool_maxsize, 
+                    limit_per_host = self.pool_maxsize_per_host, 
+                    keepalive_timeout = self.keepalive_timeout, 
+                    ssl = self.ssl, 
+                ),
+                auth = self.auth, 
+                # Per connection attempt and per read, like the sync client, rather 
+                # than for the whole request; a timed-out node fails over. 
+                timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout), 
+            )
+        
+        return self._session 
+    
+    @property 
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        return self._semaphore 
+    
+    def get_index(self,
+                  index_name: str,
+                  type_name: str = '_doc') -> 'AsyncESIndex':
+        return AsyncESIndex(
+            client = self, 
+            index_name = index_name, 
+            type_name = type_name, 
+        )
+    
+    async def request(self,
+                      method: str,
+                      path: str,
+                      idempotent: bool = False,
+                      **kwargs) -> tuple[int, Any]:
+        if kwargs.get('json') is not None:
+            kwargs['data'] = json_encode(kwargs.pop('json'))
+            kwargs['headers'] = { 'Content-Type': 'application/json', **kwargs.get('headers', dict()) }
+        
+        if self.compressor is not None and self.compressor.should_compress(kwargs.get('data')):
+            if len(kwargs['data']) >= self.compressor.offload_size:
+                kwargs['data'] = await asyncio.get_running_loop().run_in_executor(None, self.compressor.compress, kwargs['data'])
+            else:
+                kwargs['data'] = self.compressor.compress(kwargs['data'])
+            
+            kwargs['headers'] = { **kwargs.get('headers', dict()), 'Content-Encoding': self.compressor.encoding }
+        
+        if self.nodes.sniff_due():
+            await self.sniff() 
+        
+        event = RequestEvent(method, path, request_bytes=len(kwargs.get('data') or b'')) if self.hooks else None 
+        
+        if event is not None:
+            for hook in self.hooks:
+                hook.before_request(event)
+        
+        async with self.semaphore:
+            start = time.perf_counter() 
+            
+            try:
+                status, content = await self._perform(method, path, event, idempotent=idempotent, **kwargs)
+            except BaseException as e:
+                if event is not None:
+                    event.error = e 
+                    event.wall_time = time.perf_counter() - start 
+                    
+                    for hook in self.hooks:
+                        hook.after_request(event)
+                
+                raise 
+        
+        if event is not None:
+            event.wall_time = time.perf_counter() - start 
+            event.status = status 
+            event.response_bytes = len(content)
+            event.took = parse_took(content)
+            
+            for hook in self.hooks:
+                hook.after_request(event)
+        
+        return status, json_decode(content)
+    
+    async def _perform(self,
+                       method: str,
+                       path: str,
+                       event: Optional[RequestEvent] = None, 
+                       idempotent: bool = False, 
+                       **kwargs) -> tuple[int, bytes]:
+        # The async twin of `NodePool.perform`: each node is tried at most once, 
+        # moving on after a connection error or a gateway status. 
+        num_attempts = len(self.nodes.nodes)
+        # As in `ESIndex._request`: a non-idempotent request that may have reached the 
+        # node is not sent to another one, and read-only POSTs pass `idempotent`. 
+        retryable = self.retry_non_idempotent or idempotent or method in IDEMPOTENT_METHODS 
+        
+        for attempt in range(num_attempts):
+            node = self.nodes.select() 
+            
+            if event is not None:
+                event.node = node.url 
+            
+            try:
+                async with self.session.request(
+                    method = method, 
+                    url = f"{node.url}/{path}", 
+                    **kwargs,
+                ) as resp:
+                    content = await resp.read() 
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.nodes.release(node, failed=True)
+                
+                if attempt == num_attempts - 1 or not (retryable or _is_connect_error(e)):
+                    raise 
+                
+                continue 
+            except BaseException:
+                self.nodes.release(node)
+                
+                raise 
+            
+            failed = resp.status in FAILOVER_STATUSES 
+            self.nodes.release(node, failed=failed)
+            
+            if not failed or attempt == num_attempts - 1:
+                return resp.status, content 
+    
+    async def sniff(self):
+        status, content = await self._perform('GET', '_nodes/http')
+        resp_json = json_decode(content)
+        
+        if 'nodes' in resp_json:
+            self.nodes.apply_sniff(resp_json)
+        else:
+            raise UnknownError(resp_json)
+    
+    def add_hook(self,
+                 hook: Instrumentation):
+        self.hooks.append(hook)
+    
+    def remove_hook(self,
+                    hook: Instrumentation):
+        self.hooks.remove(hook)
+    
+    async def test_connection(self):
+        status, resp_json = await self.request(method='GET', path='')
+        
+        if status != 200:
+            raise UnknownError(resp_json)
+    
+    async def close(self):
+        if self._session is not None:
+            await self._session.close() 
+    
+    async def __aenter__(self) -> 'AsyncESClient':
+        return self 
+    
+    async def __aexit__(self, *exc):
+        await self.close() 
+
+
+class AsyncESIndex:
+    def __init__(self,
+                 client: AsyncESClient,
+                 index_name: str,
+                 type_name: str = '_doc') -> None:
+        self.client = client 
+        self.index_name = index_name 
+        self.type_name = type_name 
+    
+    async def exists(self) -> bool:
+        try:
+            await self.count() 
+        except IndexNotExistError:
+            return False 
+        else:
+            return True 
+    
+    async def count(self) -> int:
+        _, resp_json = await self.client.request(
+            method = 'GET', 
+            path = f"{self.index_name}/_count", 
+        )
+        
+        if 'count' in resp_json:
+            return int(resp_json['count'])
+        elif explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+            raise IndexNotExistError 
+        else:
+            raise UnknownError(resp_json)
+    
+    async def insert(self,
+                     document: dict[str, Any]) -> str:
+        if '_id' in document:
+            _id = str(document.pop('_id'))
+            
+            _, resp_json = await self.client.request(
+                method = 'PUT', 
+                path = f"{self.index_name}/{self.type_name}/{_id}", 
+                json = document, 
+            )
+            
+            if resp_json.get('result') in ['created', 'updated', 'noop']:
+                return _id 
+            else:
+                raise UnknownError(resp_json)
+        
+        else:
+            _, resp_json = await self.client.request(
+                method = 'POST', 
+                path = f"{self.index_name}/{self.type_name}", 
+                json = document, 
+            )
+            
+            if resp_json.get('result') == 'created':
+                return resp_json['_id']
+            else:
+                raise UnknownError(resp_json)
+    
+    async def update_by_id(self,
+                           _id: Any,
+                           **kwargs):
+        _, resp_json = await self.client.request(
+            method = 'POST', 
+            path = f"{self.index_name}/{self.type_name}/{_id}/_update", 
+            json = { 'doc': kwargs }, 
+        )
+        
+        if resp_json.get('result') in ['created', 'updated', 'noop']:
+            pass 
+        else:
+            raise UnknownError(resp_json)
+    
+    async def query_by_id(self,
+                          id: Any) -> Optional[dict[str, Any]]:
+        _, resp_json = await self.client.request(
+            method = 'GET', 
+            path = f"{self.index_name}/{self.type_name}/{id}", 
+        )
+        
+        if resp_json.get('found') == True:
+            return resp_json['_source']
+        elif resp_json.get('found') == False:
+            return None 
+        else:
+            raise UnknownError(resp_json)
+    
+    async def delete_by_id(self,
+                           id: Any) -> bool:
+        _, resp_json = await self.client.request(
+            method = 'DELETE', 
+            path = f"{self.index_name}/{self.type_name}/{id}", 
+        )
+        
+        if resp_json.get('result') == 'deleted':
+            return True 
+        elif resp_json.get('result') == 'not_found':
+            return False 
+        else:
+            raise UnknownError(resp_json)
+    
+    async def _search_pages(self,
+                            body: dict[str, Any],
+                            page_size: int = 1000, 
+                            keep_alive: str = '1m') -> AsyncIterator[list[dict[str, Any]]]:
+        _, resp_json = await self.client.request(
+            method = 'POST', 
+            path = f"{self.index_name}/_pit?keep_alive={keep_alive}", 
+            idempotent = True, 
+        )
+        
+        if 'id' not in resp_json:
+            if explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+                raise IndexNotExistError 
+            else:
+                raise UnknownError(resp_json)
+        
+        pit_id = resp_json['id']
+        sort = list(body.get('sort') or [])
+        
+        if not any(clause == '_shard_doc' or (isinstance(clause, dict) and '_shard_doc' in clause) for clause in sort):
+            sort.append({ '_shard_doc': 'asc' })
+        
+        body = {
+            **body,
+            'size': page_size, 
+            'sort': sort, 
+            'track_total_hits': False, 
+        }
+        
+        try:
+            while True:
+                body['pit'] = { 'id': pit_id, 'keep_alive': keep_alive }
+                
+                _, resp_json = await self.client.request(method='POST', path='_search', json=body, idempotent=True)
+                
+                if 'hits' not in resp_json:
+                    raise UnknownError(resp_json)
+                
+                hits = resp_json['hits']['hits']
+                pit_id = resp_json.get('pit_id', pit_id)
+                
+                if not hits:
+                    break 
+                
+                yield [_hit_entry(hit) for hit in hits]
+                
+                if len(hits) < page_size:
+                    break 
+                
+                body['search_after'] = hits[-1]['sort']
+        finally:
+            await self.client.request(method='DELETE', path='_pit', json={ 'id': pit_id })
+    
+    async def _search_iter(self,
+                           body: dict[str, Any],
+                           page_size: int = 1000, 
+                           keep_alive: str = '1m') -> AsyncIterator[dict[str, Any]]:
+        body = dict(body)
+        limit = body.pop('size', None)
+        
+        if limit is not None:
+            page_size = min(page_size, limit)
+        
+        num_yielded = 0 
+        
+        # aclosing releases the point in time as soon as the limit is reached. 
+        async with aclosing(self._search_pages(body, page_size=page_size, keep_alive=keep_alive)) as pages:
+            async for page in pages:
+                for entry in page:
+                    if limit is not None and num_yielded >= limit:
+                        return 
+                    
+                    yield entry 
+                    num_yielded += 1 
+    
+    async def _search(self,
+                      body: dict[str, Any],
+                      lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        if lazy:
+            return self._search_iter(body)
+        
+        if body.get('size') is None:
+            body = { **body, 'size': DEFAULT_SEARCH_SIZE }
+        
+        _, resp_json = await self.client.request(
+            method = 'GET', 
+            path = f"{self.index_name}/{self.type_name}/_search", 
+            json = body, 
+        )
+        
+        if 'hits' in resp_json:
+            return [_hit_entry(hit) for hit in resp_json['hits']['hits']]
+        else:
+            raise UnknownError(resp_json)
+    
+    async def search(self,
+                     query: Union[None, Query, dict[str, Any]] = None, 
+                     source: Any = None, 
+                     size: Optional[int] = None, 
+                     sort: Optional[list[Any]] = None, 
+                     track_total_hits: Union[bool, int, None] = False, 
+                     lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        """
+        Like `ESIndex.search`. With `lazy`, the awaited result is an async iterator 
+        that pages through the hits with a point in time and `search_after`. 
+        """
+        return await self._search(build_search_body(
+            query = query, 
+            source = source, 
+            size = size, 
+            sort = sort, 
+            track_total_hits = track_total_hits, 
+        ), lazy=lazy)
+    
+    async def query_id_in_x(self,
+                            x: Iterable[Any],
+                            limit: Optional[int] = None, 
+                            lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': { 'ids': { 'values': list(x) } }, 
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_eq_x(self,
+                           X: str,
+                           x: Any,
+                           limit: Optional[int] = None, 
+                           lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': { 'match': { X: x } }, 
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_eq_x_and_Y_eq_y(self,
+                                      X: str,
+                                      x: Any,
+                                      Y: str,
+                                      y: Any,
+                                      limit: Optional[int] = None, 
+                                      lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': {
+                'bool': {
+                    'must': [
+                        { 'match': { X: x } }, 
+                        { 'match': { Y: y } }, 
+                    ]
+                }
+            },
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_eq_x_or_Y_eq_y(self,
+                                     X: str,
+                                     x: Any,
+                                     Y: str,
+                                     y: Any,
+                                     limit: Optional[int] = None, 
+                                     lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': {
+                'bool': {
+                    'should': [
+                        { 'match': { X: x } }, 
+                        { 'match': { Y: y } }, 
+                    ]
+                }
+            },
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_in_x_or_Y_in_y(self,
+                                     X: str,
+                                     x: Any,
+                                     Y: str,
+                                     y: Any,
+                                     limit: Optional[int] = None, 
+                                     lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': {
+                'bool': {
+                    'should': [
+                        { 'terms': { X: list(x) } }, 
+                        { 'terms': { Y: list(y) } }, 
+                    ]
+                }
+            },
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_in_x_and_Y_eq_y(self,
+                                      X: str,
+                                      x: Any,
+                                      Y: str,
+                                      y: Any,
+                                      limit: Optional[int] = None, 
+                                      lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': {
+                'bool': {
+                    'must': [
+                        { 'terms': { X: list(x) } }, 
+                        { 'match': { Y: y } }, 
+                    ]
+                }
+            },
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_in_x_and_Y_in_y(self,
+                                      X: str,
+                                      x: Any,
+                                      Y: str,
+                                      y: Any,
+                                      limit: Optional[int] = None, 
+                                      lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': {
+                'bool': {
+                    'must': [
+                        { 'terms': { X: list(x) } }, 
+                        { 'terms': { Y: list(y) } }, 
+                    ]
+                }
+            },
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def query_X_in_x(self,
+                           X: str,
+                           x: Iterable[Any],
+                           limit: Optional[int] = None, 
+                           lazy: bool = False) -> Union[list[dict[str, Any]], AsyncIterator[dict[str, Any]]]:
+        return await self._search({
+            'query': { 'terms': { X: list(x) } }, 
+            'size': limit, 
+        }, lazy=lazy)
+    
+    async def scroll(self,
+                     scroll_size: int = 1000, 
+                     scroll_time: str = '5m', 
+                     query: Optional[dict[str, Any]] = None, 
+                     source: Any = None) -> AsyncIterator[dict[str, Any]]:
+        body = {
+            'query': query or { 'match_all': {} }, 
+            'sort': ['_doc'], 
+        }
+        
+        if source is not None:
+            body['_source'] = source 
+        
+        _, resp_json = await self.client.request(
+            method = 'POST', 
+            path = f"{self.index_name}/_search?scroll={scroll_time}&size={scroll_size}", 
+            json = body, 
+            idempotent = True, 
+        )
+        
+        if '_scroll_id' not in resp_json:
+            if explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+                raise IndexNotExistError 
+            else:
+                raise UnknownError(resp_json)
+        
+        scroll_id = resp_json['_scroll_id'].strip() 
+        
+        try:
+            while True:
+                hits = resp_json['hits']['hits']
+                
+                if not hits:
+                    break 
+                
+                for hit in hits:
+                    yield _hit_entry(hit)
+                
+                _, resp_json = await self.client.request(
+                    method = 'POST', 
+                    path = f"_search/scroll?scroll={scroll_time}", 
+                    json = { 'scroll_id': scroll_id }, 
+                    idempotent = True, 
+                )
+                
+                if '_scroll_id' not in resp_json:
+                    raise UnknownError(resp_json)
+                
+                scroll_id = resp_json['_scroll_id'].strip() 
+        finally:
+            await self.client.request(method='DELETE', path='_search/scroll', json={ 'scroll_id': [scroll_id] })
+    
+    async def _send_bulk(self,
+                         batch: list[bytes],
+                         max_retries: int = 3, 
+                         retry_backoff: float = 0.5, 
+                         dead_letter: Optional[Callable[[dict[str, Any]], None]] = None) -> int:
+        failed = []
+        
+        for attempt in range(max_retries + 1):
+            status, resp_json = await self.client.request(
+                method = 'POST', 
+                path = '_bulk', 
+                headers = { 'Content-Type': 'application/json' }, 
+                data = b''.join(batch), 
+                # As in `ESClient`: a bulk may take minutes, see `bulk_timeout`. 
+                timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.client.timeout, sock_read=self.client.bulk_timeout), 
+            )
+            
+            retry, permanent = split_bulk_response(batch, status, resp_json)
+            failed.extend(permanent)
+            
+            if not retry:
+                break 
+            elif attempt == max_retries:
+                failed.extend(bulk_failure(item, result) for item, result in retry)
+            else:
+                batch = [item for item, _ in retry]
+                await asyncio.sleep(backoff_delay(attempt, retry_backoff))
+        
+        if failed:
+            if dead_letter is None:
+                raise BulkError(failed)
+            
+            for failure in failed:
+                dead_letter(failure)
+        
+        return len(failed)
+    
+    async def bulk_insert(self,
+                          entry_list: list[dict[str, Any]],
+                          max_retries: int = 3, 
+                          retry_backoff: float = 0.5, 
+                          dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None) -> int:
+        if not entry_list:
+            return 0 
+        
+        return await self._send_bulk(
+            batch = [bulk_index_item(self.index_name, self.type_name, entry) for entry in entry_list], 
+            max_retries = max_retries, 
+            retry_backoff = retry_backoff, 
+            dead_letter = DeadLetterFile(dead_letter) if isinstance(dead_letter, str) else dead_letter, 
+        )
+    
+    async def parallel_bulk_insert(self,
+                                   entry_sequence: Union[Iterable[dict[str, Any]], AsyncIterable[dict[str, Any]]],
+                                   batch_size: int = 1000, 
+                                   batch_bytes: Optional[int] = 10 * 1024 * 1024, 
+                                   max_in_flight: int = 8, 
+                                   max_retries: int = 3, 
+                                   retry_backoff: float = 0.5, 
+                                   dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None) -> BulkStats:
+        if isinstance(dead_letter, str):
+            dead_letter = DeadLetterFile(dead_letter)
+        
+        stats = BulkStats() 
+        pending = set() 
+        
+        async def send(batch: list[bytes]):
+            num_failed = await self._send_bulk(batch, max_retries=max_retries, retry_backoff=retry_backoff, dead_letter=dead_letter)
+            stats.add_batch(len(batch), sum(map(len, batch)), num_failed)
+        
+        async def submit(batch: list[bytes]):
+            nonlocal pending 
+            
+            if len(pending) >= max_in_flight:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    task.result() 
+            
+            pending.add(asyncio.ensure_future(send(batch)))
+        
+        try:
+            if isinstance(entry_sequence, AsyncIterable):
+                batch = []
+                size = 0 
+                
+                async for entry in entry_sequence:
+                    item = bulk_index_item(self.index_name, self.type_name, entry)
+                    
+                    if batch and batch_bytes and size + len(item) > batch_bytes:
+                        await submit(batch)
+                        batch, size = [], 0 
+                    
+                    batch.append(item)
+                    size += len(item)
+                    
+                    if len(batch) >= batch_size:
+                        await submit(batch)
+                        batch, size = [], 0 
+                
+                if batch:
+                    await submit(batch)
+            else:
+                items = (bulk_index_item(self.index_name, self.type_name, entry) for entry in entry_sequence)
+                
+                for batch in iter_bulk_batches(items, batch_size=batch_size, batch_bytes=batch_bytes):
+                    await submit(batch)
+            
+            if pending:
+                for task in (await asyncio.wait(pending))[0]:
+                    task.result() 
+        except BaseException:
+            for task in pending:
+                task.cancel() 
+            
+            raise 
+        
+        stats.finish() 
+        
+        return stats 
+    
+    async def flush(self):
+        status, resp_json = await self.client.request(
+            method = 'POST', 
+            path = f"{self.index_name}/_flush", 
+        )
+        
+        if status == 200:
+            pass 
+        else:
+            raise UnknownError(resp_json)
@@ -0,0 +1,478 @@
+import random 
+import threading 
+import time 
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED 
+from typing import Any, Optional, Callable 
+from collections.abc import Iterable, Iterator 
+
+from .util import * 
+from .codec import * 
+from .error import * 
+
+__all__ = [
+    'BulkStats', 
+    'DeadLetterFile', 
+    'is_retryable_bulk_item', 
+    'bulk_failure', 
+    'schema_failure', 
+    'bulk_index_item', 
+    'bulk_update_item', 
+    'bulk_delete_item', 
+    'merge_partial_docs', 
+    'collapse_updates', 
+    'split_bulk_response', 
+    'backoff_delay', 
+    'iter_bulk_batches', 
+    'parallel_bulk', 
+    'AdaptiveBulkController', 
+]
+
+
+class BulkStats:
+    def __init__(self):
+        self.num_docs = 0 
+        self.num_bytes = 0 
+        self.num_batches = 0 
+        self.num_failed = 0 
+        self.params: Optional[dict[str, Any]] = None 
+        self.start_time = time.perf_counter() 
+        self.elapsed = 0.0 
+        
+    def add_batch(self,
+                  num_docs: int,
+                  num_bytes: int,
+                  num_failed: int = 0):
+        self.num_docs += num_docs 
+        self.num_bytes += num_bytes 
+        self.num_batches += 1 
+        self.num_failed += num_failed 
+        
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.start_time 
+        
+    @property
+    def docs_per_sec(self) -> float:
+        return self.num_docs / self.elapsed if self.elapsed > 0 else 0.0 
+    
+    @property
+    def mb_per_sec(self) -> float:
+        return self.num_bytes / 1024 / 1024 / self.elapsed if self.elapsed > 0 else 0.0 
+    
+    def __repr__(self) -> str:
+        return (
+            f"BulkStats(docs={self.num_docs}, failed={self.num_failed}, batches={self.num_batches}, "
+            f"MB={self.num_bytes / 1024 / 1024:.2f}, elapsed={self.elapsed:.2f}s, "
+            f"docs/s={self.docs_per_sec:.0f}, MB/s={self.mb_per_sec:.2f})"
+        )
+
+
+class DeadLetterFile:
+    """
+    Dead-letter sink that appends each permanently failed bulk item to a JSONL file. 
+    """
+    
+    def __init__(self,
+                 path: str):
+        self.path = path 
+        self.lock = threading.Lock() 
+        
+    def __call__(self,
+                 failure: dict[str, Any]):
+        line = json_dump(failure) + '\n'
+        
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as fp:
+                fp.write(line)
+
+
+RETRYABLE_ERROR_TYPES = {
+    'es_rejected_execution_exception', 
+}
+
+
+def is_retryable_bulk_item(result: dict[str, Any]) -> bool:
+    return result.get('status') == 429 or explore_dict(result, 'error/type') in RETRYABLE_ERROR_TYPES 
+
+
+def bulk_failure(item: bytes,
+                 result: dict[str, Any]) -> dict[str, Any]:
+    lines = item.decode('utf-8').rstrip('\n').split('\n')
+    
+    return {
+        'status': result.get('status'), 
+        'error': result.get('error'), 
+        'action': json_decode(lines[0]), 
+        'source': json_decode(lines[1]) if len(lines) > 1 else None, 
+    }
+
+
+def schema_failure(error: SchemaError,
+                   source: Any,
+                   action: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    """
+    Dead-letter record, shaped like `bulk_failure`, for a document that failed its 
+    schema and was never sent. 
+    """
+    return {
+        'status': None, 
+        'error': { 'type': 'schema_error', 'path': error.path, 'reason': error.reason }, 
+        'action': action, 
+        'source': source, 
+    }
+
+
+def bulk_index_item(index_name: str,
+                    type_name: str,
+                    entry: dict[str, Any]) -> bytes:
+    if '_id' in entry:
+        entry = dict(entry)
+        _id = str(entry.pop('_id'))
+    else:
+        _id = None 
+        
+    action = { '_index': index_name }
+    
+    if type_name != '_doc':
+        action['_type'] = type_name 
+    if _id:
+        action['_id'] = _id 
+        
+    return b''.join([json_encode({ 'index': action }), b'\n', json_encode(entry), b'\n'])
+
+
+def bulk_update_item(index_name: str,
+                     type_name: str,
+                     _id: Any,
+                     doc: Optional[dict[str, Any]] = None,
+                     script: Optional[str] = None,
+                     params: Optional[dict[str, Any]] = None,
+                     doc_as_upsert: bool = False,
+                     retry_on_conflict: Optional[int] = None,
+                     lang: str = 'painless') -> bytes:
+    """
+    Encode one `update` action: a partial `doc`, or a `script` with `params`. 
+    With `doc_as_upsert` a missing document is created from `doc`, or for a script 
+    the script runs against an empty document (`scripted_upsert`). 
+    """
+    action = { '_index': index_name, '_id': str(_id) }
+    
+    if type_name != '_doc':
+        action['_type'] = type_name 
+    if retry_on_conflict:
+        action['retry_on_conflict'] = retry_on_conflict 
+        
+    if script is not None:
+        body = { 'script': { 'source': script, 'lang': lang } }
+        
+        if params:
+            body['script']['params'] = params 
+        if doc_as_upsert:
+            body['scripted_upsert'] = True 
+            body['upsert'] = dict() 
+    else:
+        body = { 'doc': doc }
+        
+        if doc_as_upsert:
+            body['doc_as_upsert'] = True 
+            
+    return b''.join([json_encode({ 'update': action }), b'\n', json_encode(body), b'\n'])
+
+
+def bulk_delete_item(index_name: str,
+                     type_name: str,
+                     _id: Any) -> bytes:
+    action = { '_index': index_name, '_id': str(_id) }
+    
+    if type_name != '_doc':
+        action['_type'] = type_name 
+        
+    return json_encode({ 'delete': action }) + b'\n'
+
+
+def merge_partial_docs(old: dict[str, Any],
+                       new: dict[str, Any]) -> dict[str, Any]:
+    """
+    Merge partial doc `new` over `old` the way Elasticsearch applies a partial update: 
+    nested objects are merged recursively, any other value (lists included) replaces 
+    the old one. Neither argument is modified. 
+    """
+    merged = dict(old)
+    
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_partial_docs(merged[key], value)
+        else:
+            merged[key] = value 
+            
+    return merged 
+
+
+def collapse_updates(updates: Iterable[tuple],
+                     window: int) -> Iterator[tuple]:
+    """
+    Merge partial-doc updates `(id, doc)` to the same id with `merge_partial_docs`, 
+    later fields winning, until `window` updates are pending. Script updates 
+    `(id, script[, params])` are kept as they are and in order: a doc update after 
+    a script on the same id is not merged across it. 
+    """
+    pending = [] 
+    last = dict() 
+    
+    for update in updates:
+        _id = update[0]
+        position = last.get(_id)
+        
+        if isinstance(update[1], dict) and position is not None and isinstance(pending[position][1], dict):
+            pending[position] = (_id, merge_partial_docs(pending[position][1], update[1]))
+        else:
+            last[_id] = len(pending)
+            pending.append(update)
+            
+        if len(pending) >= window:
+            yield from pending 
+            
+            pending = [] 
+            last = dict() 
+            
+    yield from pending 
+
+
+def split_bulk_response(batch: list[bytes],
+                        status_code: int,
+                        resp_json: dict[str, Any]) -> tuple[list[tuple[bytes, dict[str, Any]]], list[dict[str, Any]]]:
+    """
+    Split the items of a _bulk request into `(item, result)` pairs worth retrying and 
+    permanent failures. 
+    """
+    if status_code == 429:
+        return [(item, { 'status': 429, 'error': resp_json.get('error') }) for item in batch], [] 
+    elif 'items' not in resp_json:
+        raise UnknownError(resp_json)
+    elif resp_json.get('errors') == False:
+        return [], [] 
+    
+    retry = [] 
+    failed = [] 
+    
+    for item, result in zip(batch, resp_json['items']):
+        result = next(iter(result.values()))
+        
+        if 'error' not in result:
+            pass 
+        elif is_retryable_bulk_item(result):
+            retry.append((item, result))
+        else:
+            failed.append(bulk_failure(item, result))
+            
+    return retry, failed 
+
+
+def backoff_delay(attempt: int,
+                  base: float,
+                  cap: float = 30.0) -> float:
+    # Exponential backoff with full jitter. 
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveBulkController:
+    """
+    AIMD controller for bulk batch size (documents and bytes) and concurrency. 
+    
+    Every bulk request reports its latency, server `took` and whether anything was 
+    rejected. A rejection, a latency over `target_latency`, or a `took` well above 
+    its moving average halves the batch limits and drops one concurrent request; a 
+    request within budget grows the limits additively, and `increase_every` 
+    consecutive good requests add one concurrent request. 
+    
+    Each decrease starts a new epoch. Senders read `epoch` before a request and 
+    pass it back to `observe`; congestion reported by a request sent in an earlier 
+    epoch was already answered by that decrease and is ignored, so one congestion 
+    event halves the limits once rather than once per request in flight. 
+    """
+    
+    def __init__(self,
+                 target_latency: float = 1.0,
+                 batch_size: int = 500,
+                 batch_bytes: int = 5 * 1024 * 1024,
+                 concurrency: int = 2,
+                 min_batch_size: int = 50,
+                 max_batch_size: int = 20000,
+                 min_batch_bytes: int = 256 * 1024,
+                 max_batch_bytes: int = 50 * 1024 * 1024,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 16,
+                 batch_size_step: int = 250,
+                 batch_bytes_step: int = 1024 * 1024,
+                 increase_every: int = 4,
+                 took_spike_ratio: float = 2.0):
+        self.target_latency = target_latency 
+        self.batch_size = batch_size 
+        self.batch_bytes = batch_bytes 
+        self.concurrency = concurrency 
+        self.min_batch_size = min_batch_size 
+        self.max_batch_size = max_batch_size 
+        self.min_batch_bytes = min_batch_bytes 
+        self.max_batch_bytes = max_batch_bytes 
+        self.min_concurrency = min_concurrency 
+        self.max_concurrency = max_concurrency 
+        self.batch_size_step = batch_size_step 
+        self.batch_bytes_step = batch_bytes_step 
+        self.increase_every = increase_every 
+        self.took_spike_ratio = took_spike_ratio 
+        
+        self.lock = threading.Lock() 
+        self.took_avg: Optional[float] = None 
+        self.latency_avg: Optional[float] = None 
+        self.num_good = 0 
+        self.num_increases = 0 
+        self.num_decreases = 0 
+        self.num_rejections = 0 
+        self.epoch = 0 
+        
+    def observe(self,
+                latency: float,
+                took: Optional[int] = None,
+                rejected: bool = False,
+                epoch: Optional[int] = None):
+        with self.lock:
+            self.latency_avg = latency if self.latency_avg is None else 0.8 * self.latency_avg + 0.2 * latency 
+            took_spike = (
+                took is not None and self.took_avg is not None 
+                and took > self.took_spike_ratio * self.took_avg 
+            )
+            
+            if took is not None:
+                self.took_avg = took if self.took_avg is None else 0.8 * self.took_avg + 0.2 * took 
+                
+            if rejected:
+                self.num_rejections += 1 
+                
+            if rejected or took_spike or latency > self.target_latency:
+                if epoch is not None and epoch < self.epoch:
+                    return 
+                
+                self.epoch += 1 
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+                self.batch_bytes = max(self.min_batch_bytes, self.batch_bytes // 2)
+                self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+                self.num_good = 0 
+                self.num_decreases += 1 
+            else:
+                self.batch_size = min(self.max_batch_size, self.batch_size + self.batch_size_step)
+                self.batch_bytes = min(self.max_batch_bytes, self.batch_bytes + self.batch_bytes_step)
+                self.num_good += 1 
+                self.num_increases += 1 
+                
+                if self.num_good >= self.increase_every:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self.num_good = 0 
+                    
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                'batch_size': self.batch_size, 
+                'batch_bytes': self.batch_bytes, 
+                'concurrency': self.concurrency, 
+                'latency_avg': self.latency_avg, 
+                'took_avg': self.took_avg, 
+                'increases': self.num_increases, 
+                'decreases': self.num_decreases, 
+                'rejections': self.num_rejections, 
+            }
+
+
+def iter_bulk_batches(items: Iterable[bytes],
+                      batch_size: int,
+                      batch_bytes: Optional[int],
+                      controller: Optional[AdaptiveBulkController] = None) -> Iterator[list[bytes]]:
+    """
+    Group encoded bulk items (action line plus optional source line) into batches, 
+    flushing on whichever of `batch_size` documents or `batch_bytes` bytes is hit first. 
+    With a `controller` both limits are re-read from it at the start of every batch. 
+    """
+    batch = [] 
+    size = 0 
+    
+    for item in items:
+        if controller is not None and not batch:
+            batch_size, batch_bytes = controller.batch_size, controller.batch_bytes 
+            
+        if batch and batch_bytes and size + len(item) > batch_bytes:
+            yield batch 
+            
+            batch = [] 
+            size = 0 
+        
+        batch.append(item)
+        size += len(item)
+        
+        if len(batch) >= batch_size:
+            yield batch 
+            
+            batch = [] 
+            size = 0 
+            
+    if batch:
+        yield batch 
+
+
+def parallel_bulk(send_batch: Callable[[list[bytes]], Optional[int]],
+                  items: Iterable[bytes],
+                  batch_size: int = 1000,
+                  batch_bytes: Optional[int] = 10 * 1024 * 1024,
+                  num_workers: int = 4,
+                  max_in_flight: Optional[int] = None,
+                  controller: Optional[AdaptiveBulkController] = None,
+                  stats: Optional[BulkStats] = None) -> BulkStats:
+    """
+    Send batches through `send_batch` on a thread pool. At most `max_in_flight` batches 
+    are queued or running at once; the producer blocks until one finishes, so memory 
+    stays bounded no matter how long `items` is. `send_batch` may return the number 
+    of items that failed permanently. 
+    
+    With a `controller`, batch limits come from it and the number of batches in 
+    flight follows `controller.concurrency`, up to `controller.max_concurrency` workers. 
+    
+    Pass `stats` to have the producer record failures into it as well, such as 
+    documents rejected before they were encoded. 
+    """
+    if controller is not None:
+        num_workers = controller.max_concurrency 
+    if max_in_flight is None:
+        max_in_flight = num_workers * 2 
+    if stats is None:
+        stats = BulkStats() 
+    
+    def run(batch: list[bytes]):
+        num_failed = send_batch(batch) or 0 
+        
+        return len(batch), sum(map(len, batch)), num_failed
+    
+    def collect(done: Iterable[Future]):
+        for future in done:
+            stats.add_batch(*future.result())
+    
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        pending = set() 
+        
+        try:
+            for batch in iter_bulk_batches(items, batch_size=batch_size, batch_bytes=batch_bytes, controller=controller):
+                while len(pending) >= (controller.concurrency if controller is not None else max_in_flight):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                    
+                pending.add(executor.submit(run, batch))
+                
+            collect(wait(pending).done)
+        except BaseException:
+            for future in pending:
+                future.cancel() 
+                
+            raise 
+        
+    stats.finish() 
+    
+    if controller is not None:
+        stats.params = controller.snapshot() 
+    
+    return stats 
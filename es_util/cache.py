@@ -0,0 +1,94 @@
+import threading 
+import time 
+from collections import OrderedDict 
+from typing import Any, Optional 
+
+__all__ = [
+    'DocumentCache', 
+]
+
+MISSING = object() 
+
+
+class DocumentCache:
+    """
+    Thread-safe LRU cache of documents keyed by `_id`, with a per-entry TTL. 
+    
+    A cached `None` records a document known not to exist. Lookups return a shallow 
+    copy so callers can modify top-level fields without touching the cached entry. 
+    """
+    
+    def __init__(self,
+                 max_size: int = 10000,
+                 ttl: Optional[float] = 60.0):
+        self.max_size = max_size 
+        self.ttl = ttl 
+        self.lock = threading.Lock() 
+        self.entries: OrderedDict[str, tuple[float, Optional[dict[str, Any]]]] = OrderedDict() 
+        
+        self.hits = 0 
+        self.misses = 0 
+        self.evictions = 0 
+        self.expirations = 0 
+        
+    def get(self,
+            id: Any) -> Any:
+        key = str(id)
+        
+        with self.lock:
+            entry = self.entries.get(key)
+            
+            if entry is None:
+                self.misses += 1 
+                
+                return MISSING 
+            
+            expires_at, doc = entry 
+            
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.expirations += 1 
+                self.misses += 1 
+                
+                return MISSING 
+            
+            self.entries.move_to_end(key)
+            self.hits += 1 
+            
+        return None if doc is None else dict(doc)
+    
+    def put(self,
+            id: Any,
+            doc: Optional[dict[str, Any]]):
+        key = str(id)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+        
+        with self.lock:
+            self.entries[key] = (expires_at, None if doc is None else dict(doc))
+            self.entries.move_to_end(key)
+            
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1 
+                
+    def invalidate(self,
+                   id: Any):
+        with self.lock:
+            self.entries.pop(str(id), None)
+            
+    def clear(self):
+        with self.lock:
+            self.entries.clear() 
+            
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'size': len(self.entries), 
+                'hits': self.hits, 
+                'misses': self.misses, 
+                'evictions': self.evictions, 
+                'expirations': self.expirations, 
+            }
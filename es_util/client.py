@@ -1,9 +1,13 @@
 from .index import * 
 from .error import * 
 from .util import * 
+from .codec import * 
+from .session import * 
+from .instrument import * 
+from .node import * 
+from .compression import * 
 
-import requests 
-from typing import Optional 
+from typing import Optional, Any, Union 
 
 __all__ = [
     'ESClient', 
@@ -12,12 +16,73 @@ __all__ = [
 
 class ESClient:
     def __init__(self,
-                 host: str,
+                 host: Union[str, list[str]],
                  port: int = 9200,
                  username: str = 'elastic',
-                 password: Optional[str] = None):
+                 password: Optional[str] = None,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 max_retries: int = 3,
+                 hooks: Optional[list[Instrumentation]] = None,
+                 scheme: str = 'http',
+                 selector: str = 'round_robin',
+                 dead_timeout: float = 1.0,
+                 sniff_on_start: bool = False,
+                 sniff_interval: Optional[float] = None,
+                 verify_certs: bool = True,
+                 ca_certs: Optional[str] = None,
+                 compression: Optional[str] = None,
+                 compression_level: Optional[int] = None,
+                 compression_min_size: int = 1024,
+                 timeout: Optional[float] = 60.0,
+                 bulk_timeout: Optional[float] = None,
+                 retry_non_idempotent: bool = False):
+        # `host` may be a list of nodes, each `host`, `host:port` or `scheme://host:port`. 
+        # `timeout` bounds connecting and each wait for response data; a node that 
+        # times out is marked dead and the request moves on to the next node. A _bulk 
+        # request can legitimately take minutes, so its wait for the response is bounded 
+        # by `bulk_timeout` instead (None: no limit); connecting still uses `timeout`. 
+        # POST requests (_bulk, auto-id inserts, scripted updates) are not sent again 
+        # after a read error unless `retry_non_idempotent`, as they may have been applied. 
         self.host = host 
         self.port = port 
+        self.timeout = timeout 
+        self.bulk_timeout = bulk_timeout 
+        self.retry_non_idempotent = retry_non_idempotent 
+        
+        urls = [parse_node(node, scheme=scheme, default_port=port) for node in ([host] if isinstance(host, str) else host)]
+        
+        self.nodes = NodePool(
+            nodes = urls, 
+            selector = selector, 
+            dead_timeout = dead_timeout, 
+            sniff_on_start = sniff_on_start, 
+            sniff_interval = sniff_interval, 
+            sniffer = self._fetch_nodes, 
+            scheme = urls[0].split('://')[0], 
+        )
+        
+        self.session = create_session(
+            pool_connections = pool_connections, 
+            pool_maxsize = pool_maxsize, 
+            pool_block = pool_block, 
+            keep_alive = keep_alive, 
+            max_retries = max_retries, 
+            retry_non_idempotent = retry_non_idempotent, 
+        )
+        self.session.verify = ca_certs or verify_certs 
+        
+        # Responses need no setup: requests already sends `Accept-Encoding: gzip, deflate` 
+        # and decodes compressed responses as they stream in. 
+        if compression is not None:
+            self.compressor = BodyCompressor(compression, level=compression_level, min_size=compression_min_size)
+        else:
+            self.compressor = None 
+        
+        # Shared with every index from `get_index`, so hooks added later apply to them too. 
+        self.hooks = list(hooks) if hooks else [] 
         
         if password:
             self.auth = (username, password)
@@ -33,14 +98,47 @@ class ESClient:
             auth = self.auth, 
             index_name = index_name, 
             type_name = type_name, 
+            session = self.session, 
+            hooks = self.hooks, 
+            nodes = self.nodes, 
+            compressor = self.compressor, 
+            timeout = self.timeout, 
+            bulk_timeout = self.bulk_timeout, 
+            retry_non_idempotent = self.retry_non_idempotent, 
+        )
+        
+    def add_hook(self,
+                 hook: Instrumentation):
+        self.hooks.append(hook)
+        
+    def remove_hook(self,
+                    hook: Instrumentation):
+        self.hooks.remove(hook)
+
+    def _fetch_nodes(self,
+                     base_url: str) -> dict[str, Any]:
+        resp = self.session.get(
+            url = f"{base_url}/_nodes/http", 
+            auth = self.auth, 
+            timeout = self.timeout, 
         )
+        resp_json = json_decode(resp.content)
+        
+        if 'nodes' in resp_json:
+            return resp_json 
+        else:
+            raise UnknownError(resp_json)
+        
+    def sniff(self):
+        self.nodes.sniff() 
 
     def test_connection(self):
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}", 
+        resp = self.nodes.perform(lambda base_url: self.session.get(
+            url = base_url, 
             auth = self.auth, 
-        )
+            timeout = self.timeout, 
+        ), failover=lambda resp: resp.status_code in FAILOVER_STATUSES)
         
         if resp.status_code != 200:
-            resp_json = resp.json()
+            resp_json = json_decode(resp.content)
             raise UnknownError(resp_json)
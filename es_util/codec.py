@@ -0,0 +1,105 @@
+import json 
+from typing import Any, Union 
+
+try:
+    import orjson 
+except ImportError:
+    orjson = None 
+
+try:
+    import msgspec 
+except ImportError:
+    msgspec = None 
+
+__all__ = [
+    'json_encode', 
+    'json_decode', 
+    'get_json_backend', 
+    'set_json_backend', 
+]
+
+
+class _StdlibCodec:
+    name = 'json'
+    
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class _OrjsonCodec:
+    name = 'orjson'
+    
+    def __init__(self):
+        # NON_STR_KEYS keeps parity with json.dumps for int keys; SERIALIZE_NUMPY lets 
+        # vectors and other arrays pass through without a tolist() round trip. 
+        self.option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY 
+    
+    def encode(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=self.option)
+    
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class _MsgspecCodec:
+    name = 'msgspec'
+    
+    def __init__(self):
+        self.encoder = msgspec.json.Encoder() 
+        self.decoder = msgspec.json.Decoder() 
+    
+    def encode(self, obj: Any) -> bytes:
+        return self.encoder.encode(obj)
+    
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return self.decoder.decode(data)
+
+
+def _make_codec(name: str):
+    if name == 'orjson':
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        
+        return _OrjsonCodec() 
+    elif name == 'msgspec':
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        
+        return _MsgspecCodec() 
+    elif name == 'json':
+        return _StdlibCodec() 
+    else:
+        raise ValueError(f"unknown JSON backend: {name}")
+
+
+def _default_codec():
+    if orjson is not None:
+        return _OrjsonCodec() 
+    elif msgspec is not None:
+        return _MsgspecCodec() 
+    else:
+        return _StdlibCodec() 
+
+
+_codec = _default_codec() 
+
+
+def get_json_backend() -> str:
+    return _codec.name 
+
+
+def set_json_backend(name: str):
+    global _codec 
+    
+    _codec = _make_codec(name)
+
+
+def json_encode(obj: Any) -> bytes:
+    return _codec.encode(obj)
+
+
+def json_decode(data: Union[bytes, str]) -> Any:
+    return _codec.decode(data)
@@ -0,0 +1,87 @@
+import gzip 
+import zlib 
+from typing import Optional 
+
+try:
+    import zstandard 
+except ImportError:
+    zstandard = None 
+
+__all__ = [
+    'CONTENT_ENCODINGS', 
+    'compress', 
+    'decompress', 
+    'BodyCompressor', 
+]
+
+# Stock Elasticsearch accepts gzip and deflate request bodies; zstd is only 
+# useful behind a proxy or server that understands it. 
+CONTENT_ENCODINGS = ('gzip', 'deflate', 'zstd')
+
+
+def compress(data: bytes,
+             encoding: str,
+             level: Optional[int] = None) -> bytes:
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic for identical bodies. 
+        return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    elif encoding == 'deflate':
+        return zlib.compress(data, -1 if level is None else level)
+    elif encoding == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires zstandard: pip install zstandard")
+        
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    else:
+        raise ValueError(f"unknown content encoding: {encoding}")
+
+
+def decompress(data: bytes,
+               encoding: str) -> bytes:
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    elif encoding == 'deflate':
+        return zlib.decompress(data)
+    elif encoding == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires zstandard: pip install zstandard")
+        
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    else:
+        raise ValueError(f"unknown content encoding: {encoding}")
+
+
+class BodyCompressor:
+    """
+    Compress request bodies of at least `min_size` bytes with `Content-Encoding: encoding`. 
+    Smaller bodies are sent as they are, since the header and CPU cost outweigh the 
+    bytes saved. 
+    
+    Compression runs on the thread that sends the request, so parallel bulk workers 
+    compress their own batches; zlib releases the GIL while it works. The async 
+    client moves bodies of `offload_size` bytes or more to a thread pool so they 
+    don't stall the event loop. 
+    """
+    
+    def __init__(self,
+                 encoding: str = 'gzip', 
+                 level: Optional[int] = None, 
+                 min_size: int = 1024, 
+                 offload_size: int = 256 * 1024):
+        if encoding not in CONTENT_ENCODINGS:
+            raise ValueError(f"unknown content encoding: {encoding}")
+        if encoding == 'zstd' and zstandard is None:
+            raise ImportError("zstd compression requires zstandard: pip install zstandard")
+        
+        self.encoding = encoding 
+        self.level = level 
+        self.min_size = min_size 
+        self.offload_size = offload_size 
+    
+    def should_compress(self,
+                        data: Optional[bytes]) -> bool:
+        return isinstance(data, bytes) and len(data) >= self.min_size 
+    
+    def compress(self,
+                 data: bytes) -> bytes:
+        return compress(data, self.encoding, self.level)
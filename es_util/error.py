@@ -7,6 +7,8 @@ __all__ = [
     'UnknownError',
     'IndexAlreadyExistError', 
     'AuthenticationError', 
+    'BulkError', 
+    'SchemaError', 
 ]
 
 
@@ -31,4 +33,26 @@ class IndexAlreadyExistError(ESError):
 
 
 class AuthenticationError(ESError):
-    pass 
+    pass
+
+
+class BulkError(UnknownError):
+    # An UnknownError, which bulk failures used to raise, so existing handlers still 
+    # catch it. 
+    def __init__(self, 
+                 failed_items: list[dict[str, Any]]):
+        self.failed_items = failed_items 
+        
+        msg = f"{len(failed_items)} bulk item(s) failed:\n{pprint.pformat(failed_items[:10])}"
+        
+        ESError.__init__(self, msg) 
+
+
+class SchemaError(ESError, ValueError):
+    def __init__(self, 
+                 path: str, 
+                 reason: str):
+        self.path = path 
+        self.reason = reason 
+        
+        super().__init__(f"{path}: {reason}") 
@@ -1,3 +1,5 @@
+from typing import Any, Optional 
+
 __all__ = [
     'KEYWORD',
     'TEXT',
@@ -8,6 +10,7 @@ __all__ = [
     'BOOLEAN',
     'DATE', 
     'DENSE_VECTOR_768', 
+    'dense_vector', 
 ]
 
 KEYWORD = 0
@@ -19,3 +22,34 @@ KEYWORD_TEXT = 5
 BOOLEAN = 6 
 DATE = 7 
 DENSE_VECTOR_768 = 8 
+
+
+_QUANTIZED_INDEX_TYPES = {
+    'int8': 'int8_hnsw', 
+    'int4': 'int4_hnsw', 
+    'bbq': 'bbq_hnsw', 
+}
+
+
+def dense_vector(dims: int,
+                 similarity: str = 'l2_norm',
+                 index: bool = True,
+                 quantization: Optional[str] = None) -> dict[str, Any]:
+    """
+    Mapping for a `dense_vector` field of any size. `quantization` is one of 
+    `int8`, `int4` or `bbq` and selects the matching quantized HNSW index. 
+    """
+    prop = { 
+        'type': 'dense_vector', 
+        'dims': dims,
+        'index': index, 
+        'similarity': similarity,
+    }
+    
+    if quantization is not None:
+        if quantization not in _QUANTIZED_INDEX_TYPES:
+            raise ValueError(f"unknown quantization: {quantization}")
+        
+        prop['index_options'] = { 'type': _QUANTIZED_INDEX_TYPES[quantization] }
+        
+    return prop 
@@ -0,0 +1,417 @@
+from .codec import * 
+from .error import * 
+from .bulk import * 
+from .schema import * 
+
+import bz2 
+import csv 
+import gzip 
+import io 
+import lzma 
+import os 
+import tempfile 
+from collections import deque 
+from concurrent.futures import ProcessPoolExecutor 
+from typing import Any, Optional, Union, IO 
+from collections.abc import Callable, Iterable, Iterator 
+
+try:
+    import zstandard 
+except ImportError:
+    zstandard = None 
+
+try:
+    import pyarrow 
+    import pyarrow.parquet 
+except ImportError:
+    pyarrow = None 
+
+__all__ = [
+    'FILE_FORMATS', 
+    'detect_format', 
+    'open_file', 
+    'iter_import_items', 
+    'ExportWriter', 
+]
+
+FILE_FORMATS = ('ndjson', 'csv', 'parquet')
+
+_FORMAT_SUFFIXES = {
+    '.ndjson': 'ndjson', 
+    '.jsonl': 'ndjson', 
+    '.json': 'ndjson', 
+    '.csv': 'csv', 
+    '.parquet': 'parquet', 
+}
+
+_COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip', 
+    '.bz2': 'bz2', 
+    '.xz': 'xz', 
+    '.zst': 'zstd', 
+}
+
+
+def detect_format(path: str) -> tuple[str, Optional[str]]:
+    """
+    Guess `(format, compression)` from a file name such as `docs.ndjson.gz`. 
+    """
+    root, ext = os.path.splitext(path.lower())
+    compression = _COMPRESSION_SUFFIXES.get(ext)
+    
+    if compression is not None:
+        root, ext = os.path.splitext(root)
+    
+    if ext not in _FORMAT_SUFFIXES:
+        raise ValueError(f"can't tell the format of {path}; pass format explicitly")
+    
+    return _FORMAT_SUFFIXES[ext], compression 
+
+
+def open_file(path: str,
+              mode: str = 'rb', 
+              compression: Optional[str] = None) -> IO[bytes]:
+    """
+    Open `path` as a binary stream, (de)compressing on the fly. 
+    """
+    if compression is None:
+        return open(path, mode)
+    elif compression == 'gzip':
+        return gzip.open(path, mode)
+    elif compression == 'bz2':
+        return bz2.open(path, mode)
+    elif compression == 'xz':
+        return lzma.open(path, mode)
+    elif compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires zstandard: pip install zstandard")
+        
+        return zstandard.open(path, mode)
+    else:
+        raise ValueError(f"unknown compression: {compression}")
+
+
+def _entry_items(entries: Iterable[dict[str, Any]],
+                 index_name: str,
+                 type_name: str,
+                 id_field: Optional[str],
+                 schema: Optional[Schema]) -> list[Union[bytes, dict[str, Any]]]:
+    # The schema travels to worker processes as is; its encoder is compiled once per chunk. 
+    encoder = SchemaEncoder(schema) if schema is not None else None 
+    items = []
+    
+    for entry in entries:
+        if id_field is not None and entry.get(id_field) is not None:
+            entry['_id'] = entry[id_field]
+            
+        if encoder is not None:
+            try:
+                entry = encoder.coerce(entry)
+            except SchemaError as e:
+                items.append(schema_failure(e, entry))
+                
+                continue 
+        
+        items.append(bulk_index_item(index_name, type_name, entry))
+    
+    return items 
+
+
+def _encode_ndjson_chunk(lines: list[bytes],
+                         index_name: str,
+                         type_name: str,
+                         id_field: Optional[str],
+                         schema: Optional[Schema]) -> list[Union[bytes, dict[str, Any]]]:
+    return _entry_items((json_decode(line) for line in lines if line.strip()), index_name, type_name, id_field, schema)
+
+
+def _encode_csv_chunk(rows: list[list[str]],
+                      fieldnames: list[str],
+                      converters: Optional[dict[str, Callable[[str], Any]]],
+                      index_name: str,
+                      type_name: str,
+                      id_field: Optional[str],
+                      schema: Optional[Schema]) -> list[Union[bytes, dict[str, Any]]]:
+    entries = []
+    
+    for row in rows:
+        # Empty cells are left out rather than indexed as empty strings. 
+        entry = { key: value for key, value in zip(fieldnames, row) if value != '' }
+        
+        for key, convert in (converters or dict()).items():
+            if key in entry:
+                entry[key] = convert(entry[key])
+        
+        entries.append(entry)
+    
+    return _entry_items(entries, index_name, type_name, id_field, schema)
+
+
+def _chunked(iterable: Iterable[Any],
+             chunk_size: int) -> Iterator[list[Any]]:
+    chunk = []
+    
+    for item in iterable:
+        chunk.append(item)
+        
+        if len(chunk) >= chunk_size:
+            yield chunk 
+            chunk = []
+    
+    if chunk:
+        yield chunk 
+
+
+def _raw_chunks(path: str,
+                format: str,
+                compression: Optional[str],
+                chunk_size: int,
+                converters: Optional[dict[str, Callable[[str], Any]]],
+                index_name: str,
+                type_name: str,
+                id_field: Optional[str],
+                schema: Optional[Schema]) -> Iterator[tuple[Callable[..., list[Union[bytes, dict[str, Any]]]], tuple]]:
+    # Yields `(encode, args)` pairs so the CPU-bound part can run in another process. 
+    if format == 'ndjson':
+        with open_file(path, 'rb', compression) as fp:
+            for lines in _chunked(fp, chunk_size):
+                yield _encode_ndjson_chunk, (lines, index_name, type_name, id_field, schema)
+    elif format == 'csv':
+        with open_file(path, 'rb', compression) as fp:
+            reader = csv.reader(io.TextIOWrapper(fp, encoding='utf-8', newline=''))
+            fieldnames = next(reader, None)
+            
+            for rows in _chunked(reader, chunk_size):
+                yield _encode_csv_chunk, (rows, fieldnames, converters, index_name, type_name, id_field, schema)
+    else:
+        raise ValueError(f"unknown format: {format}")
+
+
+def _iter_parquet_items(path: str,
+                        chunk_size: int,
+                        index_name: str,
+                        type_name: str,
+                        id_field: Optional[str],
+                        schema: Optional[Schema]) -> Iterator[Union[bytes, dict[str, Any]]]:
+    if pyarrow is None:
+        raise ImportError("Parquet files require pyarrow: pip install pyarrow")
+    
+    # Columns are decoded natively by pyarrow, one record batch at a time. 
+    for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield from _entry_items(batch.to_pylist(), index_name, type_name, id_field, schema)
+
+
+def iter_import_items(path: str,
+                      index_name: str,
+                      type_name: str = '_doc', 
+                      format: Optional[str] = None, 
+                      compression: Optional[str] = None, 
+                      chunk_size: int = 1000, 
+                      id_field: Optional[str] = None, 
+                      converters: Optional[dict[str, Callable[[str], Any]]] = None, 
+                      num_processes: int = 0, 
+                      schema: Optional[Schema] = None) -> Iterator[Union[bytes, dict[str, Any]]]:
+    """
+    Stream the documents of an NDJSON, CSV or Parquet file as bulk items, reading 
+    `chunk_size` records at a time. 
+    
+    With `num_processes` > 0, NDJSON and CSV chunks are parsed and encoded in a 
+    process pool, at most two chunks per process ahead of the consumer, so memory 
+    stays bounded by the chunk size rather than the file size. `converters` then 
+    has to be picklable (no lambdas). 
+    
+    With `schema`, documents are checked and coerced on the way; one that fails is 
+    yielded as a `schema_failure` record instead of a bulk item. 
+    """
+    if format is None:
+        format, detected = detect_format(path)
+        compression = compression or detected 
+    
+    if format == 'parquet':
+        yield from _iter_parquet_items(path, chunk_size, index_name, type_name, id_field, schema)
+        
+        return 
+    
+    chunks = _raw_chunks(path, format, compression, chunk_size, converters, index_name, type_name, id_field, schema)
+    
+    if num_processes <= 0:
+        for encode, args in chunks:
+            yield from encode(*args)
+        
+        return 
+    
+    with ProcessPoolExecutor(num_processes) as executor:
+        pending = deque() 
+        
+        try:
+            for encode, args in chunks:
+                pending.append(executor.submit(encode, *args))
+                
+                if len(pending) >= num_processes * 2:
+                    yield from pending.popleft().result() 
+            
+            while pending:
+                yield from pending.popleft().result() 
+        finally:
+            for future in pending:
+                future.cancel() 
+
+
+class ExportWriter:
+    """
+    Write documents to an NDJSON, CSV or Parquet file. Parquet rows are buffered 
+    into row groups of `batch_size`; NDJSON is written as it arrives. 
+    
+    CSV needs every column before the header: given `columns`, rows are written as 
+    they arrive and a field outside them raises `ValueError`; otherwise rows are 
+    spooled to a temporary file and the CSV, with the union of all fields as its 
+    columns, is written on `close`. For Parquet, `columns` fixes the columns and 
+    their order up front; without it the first row group decides, and a later 
+    document with a new field raises `ValueError`. 
+    
+    For Parquet, `compression` is the column codec (e.g. 'snappy', 'zstd'); 
+    for the text formats it wraps the whole file. 
+    """
+    
+    def __init__(self,
+                 path: str,
+                 format: Optional[str] = None, 
+                 compression: Optional[str] = None, 
+                 batch_size: int = 10000,
+                 columns: Optional[list[str]] = None):
+        if format is None:
+            format, detected = detect_format(path)
+            compression = compression or detected 
+        
+        if format not in FILE_FORMATS:
+            raise ValueError(f"unknown format: {format}")
+        
+        self.path = path 
+        self.format = format 
+        self.compression = compression 
+        self.batch_size = batch_size 
+        self.columns = list(columns) if columns is not None else None 
+        self.num_docs = 0 
+        
+        self._rows: list[dict[str, Any]] = []
+        self._parquet_writer = None 
+        self._csv_writer: Optional[csv.DictWriter] = None 
+        self._spool: Optional[IO[bytes]] = None 
+        self._spool_columns: dict[str, None] = dict() 
+        
+        if format == 'parquet':
+            if pyarrow is None:
+                raise ImportError("Parquet files require pyarrow: pip install pyarrow")
+            
+            self._fp = None 
+        else:
+            self._fp = open_file(path, 'wb', compression)
+            
+        if format == 'csv':
+            if self.columns is not None:
+                self._start_csv(self.columns)
+            else:
+                self._spool = tempfile.TemporaryFile() 
+    
+    def _start_csv(self,
+                   columns: list[str]):
+        self._text = io.TextIOWrapper(self._fp, encoding='utf-8', newline='')
+        self._csv_writer = csv.DictWriter(self._text, fieldnames=columns)
+        self._csv_writer.writeheader() 
+    
+    def _write_csv_row(self,
+                       entry: dict[str, Any]):
+        self._csv_writer.writerow({
+            key: json_encode(value).decode('utf-8') if isinstance(value, (dict, list)) else value 
+            for key, value in entry.items() 
+        })
+    
+    def _check_columns(self,
+                       keys: Iterable[str],
+                       columns: Iterable[str]):
+        unknown = set(keys).difference(columns)
+        
+        if unknown:
+            raise ValueError(f"fields not in the export columns: {', '.join(sorted(unknown))}")
+    
+    def write(self,
+              entry: dict[str, Any]):
+        self.num_docs += 1 
+        
+        if self.format == 'ndjson':
+            self._fp.write(json_encode(entry) + b'\n')
+        elif self.format == 'csv':
+            if self._spool is not None:
+                self._spool_columns.update(dict.fromkeys(entry))
+                self._spool.write(json_encode(entry) + b'\n')
+            else:
+                self._check_columns(entry, self.columns)
+                self._write_csv_row(entry)
+        else:
+            self._rows.append(entry)
+            
+            if len(self._rows) >= self.batch_size:
+                self._flush_rows() 
+    
+    def write_many(self,
+                   entries: Iterable[dict[str, Any]]):
+        for entry in entries:
+            self.write(entry)
+    
+    def _flush_rows(self):
+        if not self._rows:
+            return 
+        
+        keys = set().union(*self._rows)
+        
+        if self._parquet_writer is None:
+            table = pyarrow.Table.from_pylist(self._rows)
+            
+            if self.columns is not None:
+                self._check_columns(keys, self.columns)
+                table = pyarrow.table({ 
+                    column: table.column(column) if column in keys else pyarrow.nulls(len(table)) 
+                    for column in self.columns 
+                })
+                
+            self._open_parquet(table.schema)
+        else:
+            # `from_pylist` would drop fields outside the schema without a word. 
+            self._check_columns(keys, self._parquet_writer.schema.names)
+            table = pyarrow.Table.from_pylist(self._rows, schema=self._parquet_writer.schema)
+        
+        self._parquet_writer.write_table(table)
+        self._rows = []
+    
+    def _open_parquet(self,
+                      schema: 'pyarrow.Schema'):
+        self._parquet_writer = pyarrow.parquet.ParquetWriter(self.path, schema, compression=self.compression or 'snappy')
+    
+    def close(self):
+        if self.format == 'parquet':
+            self._flush_rows() 
+            
+            if self._parquet_writer is None:
+                # No documents: the file still exists, with the known columns. 
+                self._open_parquet(pyarrow.schema([(column, pyarrow.null()) for column in self.columns or []]))
+                
+            self._parquet_writer.close() 
+        elif self.format == 'csv':
+            if self._spool is not None:
+                self._start_csv(list(self._spool_columns))
+                self._spool.seek(0)
+                
+                for line in self._spool:
+                    self._write_csv_row(json_decode(line))
+                    
+                self._spool.close() 
+                
+            self._text.close() 
+        else:
+            self._fp.close() 
+    
+    def __enter__(self) -> 'ExportWriter':
+        return self 
+    
+    def __exit__(self, *exc):
+        self.close() 
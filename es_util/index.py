@@ -1,32 +1,160 @@
 from .error import * 
 from .es_type import * 
 from .util import * 
+from .codec import * 
+from .session import * 
+from .bulk import * 
+from .scroll import * 
+from .mget import * 
+from .cache import * 
+from .cache import MISSING 
+from .query import * 
+from .aggs import * 
+from .schema import * 
+from .vector import * 
+from .instrument import * 
+from .node import * 
+from .file_io import * 
+from .compression import * 
+from .results import * 
 
 import requests 
+import urllib3 
 from pprint import pprint 
-import json 
+import time 
+import functools 
+import contextlib 
+from contextlib import contextmanager 
+from concurrent.futures import ThreadPoolExecutor 
 from tqdm import tqdm 
-from typing import Optional, Any 
-from collections.abc import Iterable 
+from typing import Optional, Any, Union, Callable 
+from collections.abc import Iterable, Iterator 
 
 __all__ = [
     'ESIndex', 
 ]
 
 
+def _is_connect_error(error: BaseException) -> bool:
+    # The request never reached the node, so even a POST can go to another one. 
+    if isinstance(error, requests.ConnectTimeout):
+        return True 
+    
+    reason = getattr(error.args[0], 'reason', None) if error.args else None 
+    
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+def _hit_entry(hit: dict[str, Any]) -> dict[str, Any]:
+    entry = hit.get('_source', dict())
+    entry['_id'] = hit['_id']
+    
+    return entry 
+
+
 class ESIndex:
     def __init__(self,
                  host: str, 
                  port: int,
                  auth: Optional[tuple], 
                  index_name: str,
-                 type_name: str = '_doc') -> None:
+                 type_name: str = '_doc',
+                 session: Optional[requests.Session] = None,
+                 hooks: Optional[list[Instrumentation]] = None,
+                 nodes: Optional[NodePool] = None,
+                 compressor: Optional[BodyCompressor] = None,
+                 timeout: Optional[float] = 60.0,
+                 bulk_timeout: Optional[float] = None,
+                 retry_non_idempotent: bool = False) -> None:
         self.host = host  
         self.port = port 
         self.auth = auth 
+        self.nodes = nodes if nodes is not None else NodePool([parse_node(host, default_port=port)])
+        self.compressor = compressor 
+        self.timeout = timeout 
+        self.bulk_timeout = bulk_timeout 
+        self.retry_non_idempotent = retry_non_idempotent 
+        self.encoder: Optional[SchemaEncoder] = None 
         self.index_name = index_name 
         self.type_name = type_name 
         
+        if session is None:
+            session = create_session() 
+            
+        self.session = session 
+        self.hooks = hooks if hooks is not None else [] 
+        self.coalescer: Optional[MGetCoalescer] = None 
+        self.cache: Optional[DocumentCache] = None 
+        
+    def _request(self,
+                 method: str,
+                 path: str,
+                 json: Any = None,
+                 idempotent: bool = False,
+                 **kwargs) -> requests.Response:
+        # Calls that block server-side for longer pass their own `timeout`. Read-only 
+        # calls sent as POST (searches, _mget) pass `idempotent` to be retried and 
+        # failed over like a GET. 
+        kwargs.setdefault('timeout', self.timeout)
+        
+        if json is not None:
+            kwargs['data'] = json_encode(json)
+            kwargs['headers'] = { 'Content-Type': 'application/json', **kwargs.get('headers', dict()) }
+            
+        if self.compressor is not None and self.compressor.should_compress(kwargs.get('data')):
+            kwargs['data'] = self.compressor.compress(kwargs['data'])
+            kwargs['headers'] = { **kwargs.get('headers', dict()), 'Content-Encoding': self.compressor.encoding }
+            
+        if self.nodes.sniff_due():
+            self.nodes.sniff() 
+            
+        event = RequestEvent(method, path, request_bytes=len(kwargs.get('data') or b'')) if self.hooks else None 
+        
+        # After a read error a non-idempotent request may already have been applied, 
+        # so it only fails over when it provably never reached the node. 
+        idempotent = idempotent or method in IDEMPOTENT_METHODS 
+        can_retry = None if self.retry_non_idempotent or idempotent else _is_connect_error 
+        
+        def send(base_url: str) -> requests.Response:
+            if event is not None:
+                event.node = base_url 
+                
+            with idempotent_requests() if idempotent else contextlib.nullcontext():
+                return self.session.request(
+                    method = method, 
+                    url = f"{base_url}/{path}", 
+                    auth = self.auth, 
+                    **kwargs, 
+                )
+            
+        if event is None:
+            return self.nodes.perform(send, failover=lambda resp: resp.status_code in FAILOVER_STATUSES, can_retry=can_retry)
+        
+        for hook in self.hooks:
+            hook.before_request(event)
+            
+        start = time.perf_counter() 
+        
+        try:
+            resp = self.nodes.perform(send, failover=lambda resp: resp.status_code in FAILOVER_STATUSES, can_retry=can_retry)
+            
+            event.status = resp.status_code 
+            event.response_bytes = len(resp.content)
+            event.took = parse_took(resp.content)
+            retries = getattr(resp.raw, 'retries', None)
+            event.retries = len(retries.history) if retries is not None else 0 
+            
+            return resp 
+        except BaseException as e:
+            event.error = e 
+            
+            raise 
+        finally:
+            event.wall_time = time.perf_counter() - start 
+            
+            for hook in self.hooks:
+                hook.after_request(event)
+        
     def exists(self) -> bool:
         try:
             self.count() 
@@ -36,11 +164,11 @@ class ESIndex:
             return True 
 
     def count(self) -> int:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/_count", 
-            auth = self.auth, 
+        resp = self._request(
+            method = 'GET', 
+            path = f"{self.index_name}/_count", 
         )
-        resp_json = resp.json() 
+        resp_json = json_decode(resp.content) 
         
         if 'count' in resp_json:
             return int(resp_json['count'])
@@ -50,59 +178,28 @@ class ESIndex:
             raise UnknownError(resp_json)
 
     def create_mapping(self,
-                       mapping: dict[str, int],
+                       mapping: Union[Schema, dict[str, Union[int, dict[str, Any]]]],
                        dynamic: bool = False):
-        properties = dict() 
+        """
+        Create the index from a `Schema`, or from `{name: es_type constant or mapping dict}`. 
+        A `Schema` also becomes the index's document encoder (see `set_schema`). 
+        """
+        if isinstance(mapping, Schema):
+            schema = mapping 
+        else:
+            schema = Schema.from_mapping(mapping, dynamic=dynamic)
+            
+        body = { 'mappings': schema.mapping() }
         
-        for k, v in mapping.items():
-            if v == KEYWORD:
-                properties[k] = { 
-                    'type': 'keyword',
-                    'ignore_above': 512, 
-                }
-            elif v == TEXT:
-                properties[k] = { 'type': 'text' }
-            elif v == LONG:
-                properties[k] = { 'type': 'long' }
-            elif v == INTEGER:
-                properties[k] = { 'type': 'integer' }
-            elif v == DOUBLE:
-                properties[k] = { 'type': 'double' }
-            elif v == KEYWORD_TEXT:
-                properties[k] = { 
-                    'type': 'keyword',
-                    'ignore_above': 512, 
-                    'fields': {
-                        'text': {
-                            'type': 'text', 
-                        },
-                    },
-                }
-            elif v == BOOLEAN:
-                properties[k] = { 'type': 'boolean' }
-            elif v == DATE:
-                properties[k] = { 'type': 'date', 'format': 'yyyy-MM-dd HH:mm:ss' }
-            elif v == DENSE_VECTOR_768:
-                properties[k] = { 
-                    'type': 'dense_vector', 
-                    'dims': 768,
-                    'index': True, 
-                    'similarity': 'l2_norm',
-                }
-            else:
-                raise TypeError
+        if schema.settings():
+            body['settings'] = schema.settings() 
 
-        resp = requests.put(
-            url = f"http://{self.host}:{self.port}/{self.index_name}",
-            json = {
-                'mappings': {
-                    'properties': properties, 
-                    'dynamic': 'true' if dynamic else 'strict', 
-                },
-            },
-            auth = self.auth, 
+        resp = self._request(
+            method = 'PUT', 
+            path = self.index_name,
+            json = body,
         )
-        resp_json = resp.json() 
+        resp_json = json_decode(resp.content) 
         
         if resp_json.get('acknowledged') == True:
             pass 
@@ -110,13 +207,25 @@ class ESIndex:
             raise IndexAlreadyExistError
         else:
             raise UnknownError(resp_json)
+        
+        if isinstance(mapping, Schema):
+            self.set_schema(schema)
+            
+    def set_schema(self,
+                   schema: Optional[Schema]):
+        """
+        Validate and coerce every document written by `insert` and the bulk methods 
+        against `schema`. Bad documents raise `SchemaError` before they are sent, or 
+        go to the dead-letter sink when the bulk call has one. 
+        """
+        self.encoder = schema.compile() if schema is not None else None 
     
     def delete_index(self) -> bool:
-        resp = requests.delete(
-            url = f"http://{self.host}:{self.port}/{self.index_name}",
-            auth = self.auth, 
+        resp = self._request(
+            method = 'DELETE', 
+            path = self.index_name,
         )           
-        resp_json = resp.json()
+        resp_json = json_decode(resp.content)
         
         if resp_json.get('acknowledged') == True:
             return True 
@@ -127,30 +236,39 @@ class ESIndex:
     
     def insert(self,
                document: dict[str, Any]) -> str:
+        if self.encoder is not None:
+            document = self.encoder.coerce(document)
+            
         if '_id' in document:
             _id = str(document.pop('_id'))
             
-            resp = requests.put(
-                url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/{_id}",
+            resp = self._request(
+                method = 'PUT', 
+                path = f"{self.index_name}/{self.type_name}/{_id}",
                 json = document, 
-                auth = self.auth, 
             )           
-            resp_json = resp.json()
+            resp_json = json_decode(resp.content)
             
             if resp_json.get('result') in ['created', 'updated', 'noop']:
+                if self.cache is not None:
+                    self.cache.put(_id, document)
+                    
                 return _id  
             else:
                 raise UnknownError(resp_json)
 
         else:
-            resp = requests.post(
-                url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}",
+            resp = self._request(
+                method = 'POST', 
+                path = f"{self.index_name}/{self.type_name}",
                 json = document, 
-                auth = self.auth, 
             )           
-            resp_json = resp.json()
+            resp_json = json_decode(resp.content)
 
             if resp_json.get('result') == 'created':
+                if self.cache is not None:
+                    self.cache.put(resp_json['_id'], document)
+                    
                 return resp_json['_id'] 
             else:
                 raise UnknownError(resp_json)
@@ -158,12 +276,15 @@ class ESIndex:
     def update_by_id(self,
                      _id: Any, 
                      **kwargs):
-        resp = requests.post(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/{_id}/_update",
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/{self.type_name}/{_id}/_update",
             json = { 'doc': kwargs }, 
-            auth = self.auth, 
         )           
-        resp_json = resp.json()
+        resp_json = json_decode(resp.content)
+        
+        if self.cache is not None:
+            self.cache.invalidate(_id)
         
         if resp_json.get('result') in ['created', 'updated', 'noop']:
             pass 
@@ -172,11 +293,29 @@ class ESIndex:
     
     def query_by_id(self,
                     id: Any) -> Optional[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/{id}",
-            auth = self.auth, 
+        if self.cache is not None:
+            doc = self.cache.get(id)
+            
+            if doc is not MISSING:
+                return doc 
+            
+        if self.coalescer is not None:
+            doc = self.coalescer.get(id)
+        else:
+            doc = self._get(id)
+            
+        if self.cache is not None:
+            self.cache.put(id, doc)
+            
+        return doc 
+    
+    def _get(self,
+             id: Any) -> Optional[dict[str, Any]]:
+        resp = self._request(
+            method = 'GET', 
+            path = f"{self.index_name}/{self.type_name}/{id}",
         )           
-        resp_json = resp.json()
+        resp_json = json_decode(resp.content)
         
         if resp_json.get('found') == True:
             return resp_json['_source']
@@ -185,13 +324,86 @@ class ESIndex:
         else:
             raise UnknownError(resp_json)
         
+    def _mget(self,
+              ids: list[Any]) -> list[Optional[dict[str, Any]]]:
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/{self.type_name}/_mget",
+            json = { 'ids': [str(id) for id in ids] }, 
+            idempotent = True, 
+        )           
+        resp_json = json_decode(resp.content)
+        
+        if 'docs' not in resp_json:
+            raise UnknownError(resp_json)
+        
+        result_list = [] 
+        
+        for doc in resp_json['docs']:
+            if doc.get('found') == True:
+                result_list.append(doc['_source'])
+            elif doc.get('found') == False:
+                result_list.append(None)
+            else:
+                raise UnknownError(doc)
+            
+        return result_list 
+        
+    def get_many(self,
+                 ids: Iterable[Any],
+                 chunk_size: int = 1000,
+                 num_workers: int = 4) -> list[Optional[dict[str, Any]]]:
+        ids = list(ids)
+        
+        if self.cache is not None:
+            result_list = [self.cache.get(id) for id in ids]
+            missing_ids = [id for id, doc in zip(ids, result_list) if doc is MISSING]
+        else:
+            result_list = [MISSING] * len(ids)
+            missing_ids = ids 
+            
+        chunks = [missing_ids[i: i + chunk_size] for i in range(0, len(missing_ids), chunk_size)]
+        
+        if len(chunks) <= 1 or num_workers <= 1:
+            fetched = [doc for chunk in chunks for doc in self._mget(chunk)]
+        else:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                fetched = [doc for docs in executor.map(self._mget, chunks) for doc in docs]
+                
+        if self.cache is not None:
+            for id, doc in zip(missing_ids, fetched):
+                self.cache.put(id, doc)
+                
+        fetched_iter = iter(fetched)
+        
+        return [next(fetched_iter) if doc is MISSING else doc for doc in result_list]
+        
+    def enable_coalescing(self,
+                          window: float = 0.002,
+                          max_batch: int = 1000):
+        self.coalescer = MGetCoalescer(fetch=self._mget, window=window, max_batch=max_batch)
+        
+    def disable_coalescing(self):
+        self.coalescer = None 
+        
+    def enable_cache(self,
+                     max_size: int = 10000,
+                     ttl: Optional[float] = 60.0):
+        self.cache = DocumentCache(max_size=max_size, ttl=ttl)
+        
+    def disable_cache(self):
+        self.cache = None 
+        
     def delete_by_id(self,
                     id: Any) -> bool:
-        resp = requests.delete(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/{id}",
-            auth = self.auth, 
+        resp = self._request(
+            method = 'DELETE', 
+            path = f"{self.index_name}/{self.type_name}/{id}",
         )           
-        resp_json = resp.json()
+        resp_json = json_decode(resp.content)
+        
+        if self.cache is not None:
+            self.cache.invalidate(id)
         
         if resp_json.get('result') == 'deleted':
             return True
@@ -200,395 +412,1471 @@ class ESIndex:
         else:
             raise UnknownError(resp_json)
         
-    def query_id_in_x(self, 
-                      x: Iterable[Any],
-                      limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'ids': {
-                        'values': list(x)
-                    }
-                }, 
-                'size': limit, 
-            },
+    def _search(self,
+                body: dict[str, Any],
+                lazy: bool = False,
+                source: Any = None,
+                compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        # Without a limit (`size` None), a lazy search pages through every hit and an 
+        # eager one returns the first DEFAULT_SEARCH_SIZE. 
+        if lazy and compact:
+            raise ValueError('lazy and compact cannot be combined')
+        
+        if source is not None:
+            body = { **body, '_source': source }
+            
+        if lazy:
+            return self._search_iter(body)
+        
+        if body.get('size') is None:
+            body = { **body, 'size': DEFAULT_SEARCH_SIZE }
+            
+        if compact:
+            resp = self._request(
+                method = 'GET', 
+                path = f"{self.index_name}/{self.type_name}/_search",
+                json = body, 
+                params = { 'filter_path': COMPACT_FILTER_PATH }, 
+            )
+            
+            return CompactHits(resp.content)
+        
+        resp = self._request(
+            method = 'GET', 
+            path = f"{self.index_name}/{self.type_name}/_search",
+            json = body, 
         )           
-        resp_json = resp.json()
+        resp_json = json_decode(resp.content)
         
         if 'hits' in resp_json:
-            entry_list = [] 
+            return [_hit_entry(hit) for hit in resp_json['hits']['hits']]
+        else:
+            raise UnknownError(resp_json)
+        
+    def _search_pages(self,
+                      body: dict[str, Any],
+                      page_size: int = 1000,
+                      keep_alive: str = '1m') -> Iterator[list[dict[str, Any]]]:
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/_pit?keep_alive={keep_alive}",
+            idempotent = True, 
+        )           
+        resp_json = json_decode(resp.content)
+        
+        if 'id' not in resp_json:
+            if explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+                raise IndexNotExistError
+            else:
+                raise UnknownError(resp_json)
             
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
+        pit_id = resp_json['id']
+        
+        # `_shard_doc` is a unique, cheap tiebreaker within a point in time, so 
+        # search_after never skips or repeats hits that share the other sort values. 
+        sort = list(body.get('sort') or [])
+        
+        if not any(clause == '_shard_doc' or (isinstance(clause, dict) and '_shard_doc' in clause) for clause in sort):
+            sort.append({ '_shard_doc': 'asc' })
+        
+        body = { 
+            **body, 
+            'size': page_size, 
+            'sort': sort, 
+            'track_total_hits': False, 
+        }
+        
+        try:
+            while True:
+                body['pit'] = { 'id': pit_id, 'keep_alive': keep_alive }
+                
+                resp = self._request(method='POST', path='_search', json=body, idempotent=True)
+                resp_json = json_decode(resp.content)
+                
+                if 'hits' not in resp_json:
+                    raise UnknownError(resp_json)
+                
+                hits = resp_json['hits']['hits']
+                pit_id = resp_json.get('pit_id', pit_id)
+                
+                if not hits:
+                    break 
                 
-            return entry_list
+                yield [_hit_entry(hit) for hit in hits]
+                
+                if len(hits) < page_size:
+                    break 
+                
+                body['search_after'] = hits[-1]['sort']
+        finally:
+            self._request(method='DELETE', path='_pit', json={ 'id': pit_id })
+            
+    def _search_iter(self,
+                     body: dict[str, Any],
+                     page_size: int = 1000,
+                     keep_alive: str = '1m') -> Iterator[dict[str, Any]]:
+        body = dict(body)
+        limit = body.pop('size', None)
+        
+        if limit is not None:
+            page_size = min(page_size, limit)
+        
+        num_yielded = 0 
+        
+        for page in self._search_pages(body, page_size=page_size, keep_alive=keep_alive):
+            for entry in page:
+                if limit is not None and num_yielded >= limit:
+                    return 
+                
+                yield entry 
+                num_yielded += 1 
+                
+    def search_iter(self,
+                    query: Union[None, Query, dict[str, Any]] = None,
+                    source: Any = None,
+                    sort: Optional[list[Any]] = None,
+                    limit: Optional[int] = None,
+                    page_size: int = 1000,
+                    keep_alive: str = '1m') -> Iterator[dict[str, Any]]:
+        body = build_search_body(query=query, source=source, size=limit, sort=sort)
+        
+        return self._search_iter(body, page_size=page_size, keep_alive=keep_alive)
+        
+    def search(self,
+               query: Union[None, Query, dict[str, Any]] = None,
+               source: Any = None,
+               size: Optional[int] = None,
+               sort: Optional[list[Any]] = None,
+               track_total_hits: Union[bool, int, None] = False,
+               lazy: bool = False,
+               compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        """
+        `size` caps the number of hits. Left as None, a lazy search pages through all 
+        of them and an eager one returns at most `DEFAULT_SEARCH_SIZE`; the same goes 
+        for `limit` in the `query_*` methods. 
+        """
+        return self._search(build_search_body(
+            query = query, 
+            source = source, 
+            size = size, 
+            sort = sort, 
+            track_total_hits = track_total_hits, 
+        ), lazy=lazy, compact=compact)
+        
+    def _msearch_items(self,
+                       items: list[bytes]) -> list[dict[str, Any]]:
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/_msearch",
+            headers = { 'Content-Type': 'application/x-ndjson' }, 
+            data = b''.join(items), 
+            idempotent = True, 
+        )           
+        resp_json = json_decode(resp.content)
+        
+        if 'responses' in resp_json:
+            return resp_json['responses']
         else:
             raise UnknownError(resp_json)
         
-    def query_X_eq_x(self,
-                     X: str,
-                     x: Any,
-                     limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'match': {
-                        X: x, 
-                    }
-                },
-                'size': limit, 
-            },
-        )           
-        resp_json = resp.json()
+    def _msearch(self,
+                 bodies: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return self._msearch_items([b'{}\n' + json_encode(body) + b'\n' for body in bodies])
+    
+    def aggregate(self,
+                  aggs: dict[str, Union[Agg, dict[str, Any]]],
+                  query: Union[None, Query, dict[str, Any]] = None,
+                  columnar: bool = False) -> dict[str, Any]:
+        """
+        Run aggregations without fetching hits. `Agg` builders come back parsed 
+        (bucket aggregations as `{key: doc_count}`, or as `{column: values}` with 
+        `columnar`); raw dict clauses come back as Elasticsearch returns them. 
+        """
+        body = build_search_body(query=query, size=0)
+        body['aggs'] = { name: agg.to_dict() if isinstance(agg, Agg) else agg for name, agg in aggs.items() }
         
-        if 'hits' in resp_json:
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/_search",
+            json = body, 
+            idempotent = True, 
+        )
+        resp_json = json_decode(resp.content) 
+        
+        if 'aggregations' not in resp_json:
+            if explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+                raise IndexNotExistError
+            else:
+                raise UnknownError(resp_json)
+            
+        results = dict() 
+        
+        for name, agg in aggs.items():
+            raw = resp_json['aggregations'][name]
+            
+            if not isinstance(agg, Agg):
+                results[name] = raw 
+            elif columnar and hasattr(agg, 'rows'):
+                results[name] = to_columns(agg.rows(raw))
+            else:
+                results[name] = agg.parse(raw)
+                
+        return results 
+    
+    def iter_composite(self,
+                       sources: dict[str, Union[str, Terms, DateHistogram]],
+                       query: Union[None, Query, dict[str, Any]] = None,
+                       aggs: Optional[dict[str, Union[Agg, dict[str, Any]]]] = None,
+                       page_size: int = 1000,
+                       columnar: bool = False) -> Iterator[Union[dict[str, Any], dict[str, list[Any]]]]:
+        """
+        Stream every bucket of a composite aggregation, one `after_key` page at a time. 
+        Yields a row per bucket (source values, `doc_count`, sub-aggregations), or with 
+        `columnar` one `{column: values}` dict per page. 
+        """
+        after = None 
+        
+        while True:
+            composite = Composite(sources, size=page_size, after=after, aggs=aggs)
+            raw = self.aggregate({ 'composite': composite.to_dict() }, query=query)['composite']
+            rows = composite.rows(raw)
+            
+            if columnar:
+                if rows:
+                    yield to_columns(rows)
+            else:
+                yield from rows 
+                
+            after = raw.get('after_key')
+            
+            if after is None or len(raw['buckets']) < page_size:
+                break 
+    
+    def multi_search(self,
+                     queries: Iterable[Union[None, Query, dict[str, Any]]],
+                     source: Any = None,
+                     size: int = 10000,
+                     max_searches: int = 100,
+                     max_bytes: Optional[int] = 10 * 1024 * 1024,
+                     num_workers: int = 4) -> list[Union[list[dict[str, Any]], ESError]]:
+        items = [
+            b'{}\n' + json_encode(build_search_body(query=query, source=source, size=size)) + b'\n'
+            for query in queries 
+        ]
+        chunks = list(iter_bulk_batches(items, batch_size=max_searches, batch_bytes=max_bytes))
+        
+        if len(chunks) <= 1 or num_workers <= 1:
+            responses = [resp_json for chunk in chunks for resp_json in self._msearch_items(chunk)]
+        else:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                responses = [resp_json for resp_jsons in executor.map(self._msearch_items, chunks) for resp_json in resp_jsons]
+                
+        result_list = [] 
+        
+        for resp_json in responses:
+            if 'hits' in resp_json:
+                result_list.append([_hit_entry(hit) for hit in resp_json['hits']['hits']])
+            elif explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+                result_list.append(IndexNotExistError())
+            else:
+                result_list.append(UnknownError(resp_json))
+                
+        return result_list 
+        
+    def knn_search(self,
+                   field: str,
+                   vectors: Any,
+                   k: int = 10,
+                   num_candidates: Optional[int] = None,
+                   query: Union[None, Query, dict[str, Any]] = None,
+                   source: Any = None) -> Union[list[dict[str, Any]], list[list[dict[str, Any]]]]:
+        single = is_single_vector(vectors)
+        matrix = as_vector_matrix(vectors)
+        
+        bodies = [] 
+        
+        for vector in matrix:
+            knn = {
+                'field': field, 
+                'query_vector': vector_to_json(vector), 
+                'k': k, 
+                'num_candidates': num_candidates or max(100, 2 * k), 
+            }
+            
+            if query is not None:
+                knn['filter'] = build_search_body(query)['query']
+                
+            body = { 'knn': knn, 'size': k, 'track_total_hits': False }
+            
+            if source is not None:
+                body['_source'] = source 
+                
+            bodies.append(body)
+            
+        result_list = [] 
+        
+        for resp_json in self._msearch(bodies):
+            if 'hits' not in resp_json:
+                raise UnknownError(resp_json)
+            
             entry_list = [] 
             
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
+            for hit in resp_json['hits']['hits']:
+                entry = _hit_entry(hit)
+                entry['_score'] = hit['_score']
                 entry_list.append(entry)
                 
-            return entry_list
-        else:
-            raise UnknownError(resp_json)
+            result_list.append(entry_list)
+            
+        return result_list[0] if single else result_list 
+        
+    def query_id_in_x(self, 
+                      x: Iterable[Any],
+                      limit: Optional[int] = None,
+                      lazy: bool = False,
+                      source: Any = None,
+                      compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'ids': {
+                    'values': list(x)
+                }
+            }, 
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
+        
+    def query_X_eq_x(self,
+                     X: str,
+                     x: Any,
+                     limit: Optional[int] = None,
+                     lazy: bool = False,
+                     source: Any = None,
+                     compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'match': {
+                    X: x, 
+                }
+            },
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
         
     def query_X_eq_x_and_Y_eq_y(self,
                                 X: str,
                                 x: Any,
                                 Y: str,
                                 y: Any,
-                                limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'bool': {
-                        'must': [
-                            { 'match': { X: x } }, 
-                            { 'match': { Y: y } }, 
-                        ]
-                    }
-                },
-                'size': limit, 
+                                limit: Optional[int] = None,
+                                lazy: bool = False,
+                                source: Any = None,
+                                compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'bool': {
+                    'must': [
+                        { 'match': { X: x } }, 
+                        { 'match': { Y: y } }, 
+                    ]
+                }
             },
-        )           
-        resp_json = resp.json()
-        
-        if 'hits' in resp_json:
-            entry_list = [] 
-            
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
-                
-            return entry_list
-        else:
-            raise UnknownError(resp_json) 
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
         
     def query_X_eq_x_or_Y_eq_y(self,
                                X: str,
                                x: Any,
                                Y: str,
                                y: Any,
-                               limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'bool': {
-                        'should': [
-                            { 'match': { X: x } }, 
-                            { 'match': { Y: y } }, 
-                        ]
-                    }
-                },
-                'size': limit, 
+                               limit: Optional[int] = None,
+                               lazy: bool = False,
+                               source: Any = None,
+                               compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'bool': {
+                    'should': [
+                        { 'match': { X: x } }, 
+                        { 'match': { Y: y } }, 
+                    ]
+                }
             },
-        )           
-        resp_json = resp.json()
-        
-        if 'hits' in resp_json:
-            entry_list = [] 
-            
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
-                
-            return entry_list
-        else:
-            raise UnknownError(resp_json)
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
         
     def query_X_in_x_or_Y_in_y(self,
                                X: str,
                                x: Any,
                                Y: str,
                                y: Any,
-                               limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'bool': {
-                        'should': [
-                            { 'terms': { X: list(x) } },
-                            { 'terms': { Y: list(y) } },
-                        ]
-                    }
-                },
-                'size': limit, 
+                               limit: Optional[int] = None,
+                               lazy: bool = False,
+                               source: Any = None,
+                               compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'bool': {
+                    'should': [
+                        { 'terms': { X: list(x) } },
+                        { 'terms': { Y: list(y) } },
+                    ]
+                }
             },
-        )           
-        resp_json = resp.json()
-        
-        if 'hits' in resp_json:
-            entry_list = [] 
-            
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
-                
-            return entry_list
-        else:
-            raise UnknownError(resp_json)
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
         
     def query_X_in_x_and_Y_eq_y(self,
                                 X: str,
                                 x: Any,
                                 Y: str,
                                 y: Any,
-                                limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'bool': {
-                        'must': [
-                            { 'terms': { X: list(x) } }, 
-                            { 'match': { Y: y } }, 
-                        ]
-                    }
-                },
-                'size': limit, 
+                                limit: Optional[int] = None,
+                                lazy: bool = False,
+                                source: Any = None,
+                                compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'bool': {
+                    'must': [
+                        { 'terms': { X: list(x) } }, 
+                        { 'match': { Y: y } }, 
+                    ]
+                }
             },
-        )           
-        resp_json = resp.json()
-        
-        if 'hits' in resp_json:
-            entry_list = [] 
-            
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
-                
-            return entry_list
-        else:
-            raise UnknownError(resp_json)
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
         
     def query_X_in_x_and_Y_in_y(self,
                                 X: str,
                                 x: Any,
                                 Y: str,
                                 y: Any,
-                                limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'bool': {
-                        'must': [
-                            { 'terms': { X: list(x) } }, 
-                            { 'terms': { Y: list(y) } }, 
-                        ]
-                    }
-                },
-                'size': limit, 
+                                limit: Optional[int] = None,
+                                lazy: bool = False,
+                                source: Any = None,
+                                compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'bool': {
+                    'must': [
+                        { 'terms': { X: list(x) } }, 
+                        { 'terms': { Y: list(y) } }, 
+                    ]
+                }
             },
-        )           
-        resp_json = resp.json()
-        
-        if 'hits' in resp_json:
-            entry_list = [] 
-            
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
-                
-            return entry_list
-        else:
-            raise UnknownError(resp_json)
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
     
     def query_X_in_x(self,
                      X: str,
                      x: Iterable[Any],
-                     limit: int = 10000) -> list[dict[str, Any]]:
-        resp = requests.get(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/{self.type_name}/_search",
-            auth = self.auth, 
-            json = {
-                'query': {
-                    'terms': {
-                        X: list(x), 
-                    }
-                },
-                'size': limit, 
+                     limit: Optional[int] = None,
+                     lazy: bool = False,
+                     source: Any = None,
+                     compact: bool = False) -> Union[list[dict[str, Any]], Iterator[dict[str, Any]], CompactHits]:
+        return self._search({
+            'query': {
+                'terms': {
+                    X: list(x), 
+                }
             },
-        )           
-        resp_json = resp.json()
+            'size': limit, 
+        }, lazy=lazy, source=source, compact=compact)
         
-        if 'hits' in resp_json:
-            entry_list = [] 
+    def _scroll_pages(self,
+                      query: Optional[dict[str, Any]] = None,
+                      source: Any = None,
+                      scroll_size: int = 1000,
+                      scroll_time: str = '5m',
+                      slice_id: Optional[int] = None,
+                      num_slices: int = 1,
+                      log_scroll_id: bool = False) -> Iterator[list[dict[str, Any]]]:
+        body = {
+            'query': query or { 'match_all': {} }, 
+            'sort': ['_doc'], 
+        }
+        
+        if source is not None:
+            body['_source'] = source 
+        if num_slices > 1:
+            body['slice'] = { 'id': slice_id, 'max': num_slices }
             
-            for item in resp_json['hits']['hits']:
-                entry = item['_source']
-                entry['_id'] = item['_id']
-                entry_list.append(entry)
-                
-            return entry_list
-        else:
-            raise UnknownError(resp_json)
+        search_path = f"{self.index_name}/_search?scroll={scroll_time}&size={scroll_size}"
+        scroll_path = f"_search/scroll?scroll={scroll_time}"
         
-    def scroll(self,
-               scroll_size: int = 1000,
-               scroll_time: str = '5m',
-               log_scroll_id: bool = False) -> Iterable[dict[str, Any]]:
-        query = { 'query': { 'match_all': {} } }
-        search_url = f"http://{self.host}:{self.port}/{self.index_name}/_search?scroll={scroll_time}&size={scroll_size}"
-        scroll_url = f"http://{self.host}:{self.port}/_search/scroll?scroll={scroll_time}"
+        resp = self._request(method='POST', path=search_path, json=body, idempotent=True)
+        resp_json = json_decode(resp.content)
         
-        resp = requests.post(url=search_url, json=query)
-        resp_json = resp.json()
+        if '_scroll_id' not in resp_json:
+            if explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+                raise IndexNotExistError
+            else:
+                raise UnknownError(resp_json)
 
         scroll_id = resp_json['_scroll_id'].strip() 
+        
+        try:
+            while True:
+                hits = resp_json["hits"]["hits"]
 
-        while True:
-            hits = resp_json["hits"]["hits"]
+                if not hits:
+                    break 
+                
+                yield [_hit_entry(hit) for hit in hits]
 
-            if not hits:
-                break 
-            
-            for hit in hits:
-                entry = hit['_source']
-                entry['_id'] = hit['_id']
+                resp = self._request(method='POST', path=scroll_path, json={ 'scroll_id': scroll_id }, idempotent=True)
+                resp_json = json_decode(resp.content) 
                 
-                yield entry 
+                if '_scroll_id' not in resp_json:
+                    raise UnknownError(resp_json)
 
-            resp = requests.post(url=scroll_url, json={ 'scroll_id': scroll_id })
-            resp_json = resp.json() 
+                scroll_id = resp_json['_scroll_id'].strip()
+                
+                if log_scroll_id:
+                    print(f"scroll id: {scroll_id}") 
+        finally:
+            self._request(method='DELETE', path='_search/scroll', json={ 'scroll_id': [scroll_id] })
 
-            scroll_id = resp_json['_scroll_id'].strip()
+    def scroll(self,
+               scroll_size: int = 1000,
+               scroll_time: str = '5m',
+               log_scroll_id: bool = False,
+               query: Optional[dict[str, Any]] = None,
+               source: Any = None) -> Iterable[dict[str, Any]]:
+        for page in self._scroll_pages(query=query, source=source, scroll_size=scroll_size, scroll_time=scroll_time, log_scroll_id=log_scroll_id):
+            yield from page 
             
-            if log_scroll_id:
-                print(f"scroll id: {scroll_id}") 
+    def parallel_scroll(self,
+                        num_slices: int = 4,
+                        scroll_size: int = 1000,
+                        scroll_time: str = '5m',
+                        query: Optional[dict[str, Any]] = None,
+                        source: Any = None,
+                        ordered: bool = False,
+                        queue_size: int = 8) -> Iterator[dict[str, Any]]:
+        page_iter_factories = [
+            functools.partial(
+                self._scroll_pages, 
+                query = query, 
+                source = source, 
+                scroll_size = scroll_size, 
+                scroll_time = scroll_time, 
+                slice_id = slice_id, 
+                num_slices = num_slices, 
+            )
+            for slice_id in range(num_slices)
+        ]
+        
+        return iter_parallel(page_iter_factories, ordered=ordered, queue_size=queue_size)
+
+    def _bulk_item(self,
+                   entry: dict[str, Any]) -> bytes:
+        if self.encoder is not None:
+            entry = self.encoder.coerce(entry)
+            
+        return bulk_index_item(self.index_name, self.type_name, entry)
+    
+    def _bulk_items(self,
+                    entries: Iterable[dict[str, Any]]) -> Iterator[Union[bytes, dict[str, Any]]]:
+        for entry in entries:
+            try:
+                yield self._bulk_item(entry)
+            except SchemaError as e:
+                yield schema_failure(e, entry)
+                
+    def _checked_items(self,
+                       items: Iterable[Union[bytes, dict[str, Any]]],
+                       dead_letter: Optional[Callable[[dict[str, Any]], None]],
+                       stats: BulkStats) -> Iterator[bytes]:
+        # Items are encoded bulk items, or `schema_failure` records for documents 
+        # that failed the schema; those go to `dead_letter` and count as failed. 
+        for item in items:
+            if isinstance(item, bytes):
+                yield item 
+            elif dead_letter is None:
+                raise SchemaError(item['error']['path'], item['error']['reason'])
+            else:
+                stats.num_failed += 1 
+                dead_letter(item)
+    
+    def _send_bulk(self,
+                   batch: list[bytes],
+                   max_retries: int = 3,
+                   retry_backoff: float = 0.5,
+                   dead_letter: Optional[Callable[[dict[str, Any]], None]] = None,
+                   controller: Optional[AdaptiveBulkController] = None) -> int:
+        failed = [] 
+        
+        for attempt in range(max_retries + 1):
+            epoch = controller.epoch if controller is not None else None 
+            start = time.perf_counter() 
+            resp = self._request(
+                method = 'POST', 
+                path = '_bulk',
+                headers = { 'Content-Type': 'application/json' }, 
+                data = b''.join(batch), 
+                timeout = (self.timeout, self.bulk_timeout), 
+            )           
+            resp_json = json_decode(resp.content)
+            
+            retry, permanent = split_bulk_response(batch, resp.status_code, resp_json)
+            failed.extend(permanent)
+            
+            if controller is not None:
+                controller.observe(time.perf_counter() - start, took=resp_json.get('took'), rejected=bool(retry), epoch=epoch)
+            
+            if self.cache is not None:
+                for result in resp_json.get('items', []):
+                    self.cache.invalidate(next(iter(result.values())).get('_id'))
+                        
+            if not retry:
+                break 
+            elif attempt == max_retries:
+                failed.extend(bulk_failure(item, result) for item, result in retry)
+            else:
+                batch = [item for item, _ in retry]
+                time.sleep(backoff_delay(attempt, retry_backoff))
+                
+        if failed:
+            if dead_letter is None:
+                raise BulkError(failed)
+            
+            for failure in failed:
+                dead_letter(failure)
+                
+        return len(failed)
 
     def bulk_insert(self,
-                    entry_list: list[dict[str, Any]]):
+                    entry_list: list[dict[str, Any]],
+                    max_retries: int = 3,
+                    retry_backoff: float = 0.5,
+                    dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None) -> int:
         if not entry_list:
-            return 
+            return 0 
         
-        batch_json = ''
+        dead_letter = self._dead_letter_sink(dead_letter)
+        stats = BulkStats() 
+        batch = list(self._checked_items(self._bulk_items(entry_list), dead_letter, stats))
         
-        for entry in entry_list:
-            if '_id' in entry: 
-                _id = str(entry.pop('_id')) 
-            else:
-                _id = None 
+        if not batch:
+            return stats.num_failed 
+        
+        return stats.num_failed + self._send_bulk(
+            batch = batch, 
+            max_retries = max_retries, 
+            retry_backoff = retry_backoff, 
+            dead_letter = dead_letter, 
+        )
+        
+    def _dead_letter_sink(self,
+                          dead_letter: Union[None, str, Callable[[dict[str, Any]], None]]) -> Optional[Callable[[dict[str, Any]], None]]:
+        if isinstance(dead_letter, str):
+            return DeadLetterFile(dead_letter)
+        else:
+            return dead_letter 
+        
+    def parallel_bulk_insert(self,
+                             entry_sequence: Iterable[dict[str, Any]],
+                             batch_size: int = 1000,
+                             batch_bytes: Optional[int] = 10 * 1024 * 1024,
+                             num_workers: int = 4,
+                             max_in_flight: Optional[int] = None,
+                             use_tqdm: bool = False,
+                             total: Optional[int] = None,
+                             log_stats: bool = False,
+                             max_retries: int = 3,
+                             retry_backoff: float = 0.5,
+                             dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None,
+                             controller: Optional[AdaptiveBulkController] = None) -> BulkStats:
+        entry_iter = tqdm(entry_sequence, desc='Bulk Inserting', disable=not use_tqdm, total=total)
+        dead_letter = self._dead_letter_sink(dead_letter)
+        stats = BulkStats() 
+        
+        parallel_bulk(
+            send_batch = functools.partial(
+                self._send_bulk, 
+                max_retries = max_retries, 
+                retry_backoff = retry_backoff, 
+                dead_letter = dead_letter, 
+                controller = controller, 
+            ), 
+            items = self._checked_items(self._bulk_items(entry_iter), dead_letter, stats), 
+            batch_size = batch_size, 
+            batch_bytes = batch_bytes, 
+            num_workers = num_workers, 
+            max_in_flight = max_in_flight, 
+            controller = controller, 
+            stats = stats, 
+        )
+        
+        if log_stats:
+            print(stats)
+            
+        return stats 
+    
+    def _vector_coerce(self,
+                       field: str,
+                       dims: int) -> Optional[Callable[[dict[str, Any]], dict[str, Any]]]:
+        if self.encoder is None:
+            return None 
+        
+        vector_field = self.encoder.schema.fields.get(field)
+        
+        if isinstance(vector_field, DenseVector) and vector_field.dims != dims:
+            raise SchemaError(field, f"vectors have {dims} dims, the schema expects {vector_field.dims}")
+        
+        placeholder = [0.0] * dims 
+        
+        def coerce(entry: dict[str, Any]) -> dict[str, Any]:
+            # The vector is spliced in after encoding, so a placeholder stands in for it 
+            # to let the required and unknown-field checks see the whole document. 
+            document = self.encoder.coerce({ **entry, field: placeholder })
             
-            if _id:
-                if self.type_name == '_doc':
-                    batch_json += json_dump({ 'index': { '_index': self.index_name, '_id': _id } }) + '\n'
-                else:
-                    batch_json += json_dump({ 'index': { '_index': self.index_name, '_type': self.type_name, '_id': _id } }) + '\n'
+            return { key: value for key, value in document.items() if key != field }
+        
+        return coerce 
+    
+    def bulk_insert_vectors(self,
+                            field: str,
+                            vectors: Any,
+                            metadata: Optional[Iterable[dict[str, Any]]] = None,
+                            batch_size: int = 1000,
+                            batch_bytes: Optional[int] = 10 * 1024 * 1024,
+                            num_workers: int = 4,
+                            max_in_flight: Optional[int] = None,
+                            log_stats: bool = False,
+                            max_retries: int = 3,
+                            retry_backoff: float = 0.5,
+                            dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None) -> BulkStats:
+        matrix = as_vector_matrix(vectors)
+        dead_letter = self._dead_letter_sink(dead_letter)
+        stats = BulkStats() 
+        
+        parallel_bulk(
+            send_batch = functools.partial(
+                self._send_bulk, 
+                max_retries = max_retries, 
+                retry_backoff = retry_backoff, 
+                dead_letter = dead_letter, 
+            ), 
+            items = self._checked_items(
+                iter_vector_bulk_items(self.index_name, self.type_name, field, matrix, metadata, coerce=self._vector_coerce(field, matrix.shape[1])), 
+                dead_letter, 
+                stats, 
+            ), 
+            batch_size = batch_size, 
+            batch_bytes = batch_bytes, 
+            num_workers = num_workers, 
+            max_in_flight = max_in_flight, 
+            stats = stats, 
+        )
+        
+        if log_stats:
+            print(stats)
+            
+        return stats 
+    
+    def bulk_update(self,
+                    updates: Iterable[tuple],
+                    doc_as_upsert: bool = False,
+                    retry_on_conflict: Optional[int] = 3,
+                    collapse: bool = True,
+                    lang: str = 'painless',
+                    batch_size: int = 1000,
+                    batch_bytes: Optional[int] = 10 * 1024 * 1024,
+                    num_workers: int = 4,
+                    max_in_flight: Optional[int] = None,
+                    use_tqdm: bool = False,
+                    total: Optional[int] = None,
+                    log_stats: bool = False,
+                    max_retries: int = 3,
+                    retry_backoff: float = 0.5,
+                    dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None,
+                    controller: Optional[AdaptiveBulkController] = None) -> BulkStats:
+        """
+        Stream `(id, partial_doc)` or `(id, script, params)` tuples into bulk `update` 
+        actions, batched and retried like `parallel_bulk_insert`. With `collapse`, 
+        partial-doc updates to the same id are merged before they are sent. 
+        """
+        def encode(update: tuple) -> bytes:
+            if isinstance(update[1], dict):
+                _id, doc = update 
+                script, params = None, None 
             else:
-                if self.type_name == '_doc':
-                    batch_json += json_dump({ 'index': { '_index': self.index_name } }) + '\n'
-                else:
-                    batch_json += json_dump({ 'index': { '_index': self.index_name, '_type': self.type_name } }) + '\n'
+                _id, script, *rest = update 
+                doc, params = None, rest[0] if rest else None 
                 
-            batch_json += json_dump(entry) + '\n'
+            if doc is not None and self.encoder is not None:
+                try:
+                    doc = self.encoder.coerce(doc, partial=True)
+                except SchemaError as e:
+                    return schema_failure(e, { 'doc': doc }, action={ 'update': { '_index': self.index_name, '_id': str(_id) } })
+                
+            return bulk_update_item(
+                index_name = self.index_name, 
+                type_name = self.type_name, 
+                _id = _id, 
+                doc = doc, 
+                script = script, 
+                params = params, 
+                doc_as_upsert = doc_as_upsert, 
+                retry_on_conflict = retry_on_conflict, 
+                lang = lang, 
+            )
+        
+        updates = tqdm(updates, desc='Bulk Updating', disable=not use_tqdm, total=total)
+        
+        if collapse:
+            updates = collapse_updates(updates, window=batch_size)
             
-        resp = requests.post(
-            url = f"http://{self.host}:{self.port}/_bulk",
-            headers = { 'Content-Type': 'application/json' }, 
-            data = batch_json.encode('utf-8'), 
-            auth = self.auth, 
-        )           
-        resp_json = resp.json()
+        dead_letter = self._dead_letter_sink(dead_letter)
+        stats = BulkStats() 
         
-        if resp_json.get('errors') == False:
-            pass 
+        parallel_bulk(
+            send_batch = functools.partial(
+                self._send_bulk, 
+                max_retries = max_retries, 
+                retry_backoff = retry_backoff, 
+                dead_letter = dead_letter, 
+                controller = controller, 
+            ), 
+            items = self._checked_items(map(encode, updates), dead_letter, stats), 
+            batch_size = batch_size, 
+            batch_bytes = batch_bytes, 
+            num_workers = num_workers, 
+            max_in_flight = max_in_flight, 
+            controller = controller, 
+            stats = stats, 
+        )
+        
+        if log_stats:
+            print(stats)
+            
+        return stats 
+    
+    def bulk_delete(self,
+                    ids: Iterable[Any],
+                    batch_size: int = 1000,
+                    batch_bytes: Optional[int] = 10 * 1024 * 1024,
+                    num_workers: int = 4,
+                    max_in_flight: Optional[int] = None,
+                    use_tqdm: bool = False,
+                    total: Optional[int] = None,
+                    log_stats: bool = False,
+                    max_retries: int = 3,
+                    retry_backoff: float = 0.5,
+                    dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None,
+                    controller: Optional[AdaptiveBulkController] = None) -> BulkStats:
+        """
+        Stream ids into bulk `delete` actions. Ids that don't exist are not failures. 
+        """
+        stats = parallel_bulk(
+            send_batch = functools.partial(
+                self._send_bulk, 
+                max_retries = max_retries, 
+                retry_backoff = retry_backoff, 
+                dead_letter = self._dead_letter_sink(dead_letter), 
+                controller = controller, 
+            ), 
+            items = (
+                bulk_delete_item(self.index_name, self.type_name, _id) 
+                for _id in tqdm(ids, desc='Bulk Deleting', disable=not use_tqdm, total=total)
+            ), 
+            batch_size = batch_size, 
+            batch_bytes = batch_bytes, 
+            num_workers = num_workers, 
+            max_in_flight = max_in_flight, 
+            controller = controller, 
+        )
+        
+        if log_stats:
+            print(stats)
+            
+        return stats 
+    
+    def import_file(self,
+                    path: str,
+                    format: Optional[str] = None,
+                    compression: Optional[str] = None,
+                    id_field: Optional[str] = None,
+                    converters: Optional[dict[str, Callable[[str], Any]]] = None,
+                    chunk_size: int = 1000,
+                    num_processes: int = 0,
+                    batch_size: int = 1000,
+                    batch_bytes: Optional[int] = 10 * 1024 * 1024,
+                    num_workers: int = 4,
+                    max_in_flight: Optional[int] = None,
+                    use_tqdm: bool = False,
+                    log_stats: bool = False,
+                    max_retries: int = 3,
+                    retry_backoff: float = 0.5,
+                    dead_letter: Union[None, str, Callable[[dict[str, Any]], None]] = None,
+                    controller: Optional[AdaptiveBulkController] = None) -> BulkStats:
+        """
+        Bulk load an NDJSON, CSV or Parquet file (optionally gzip/bz2/xz/zstd 
+        compressed, guessed from the file name) without reading it into memory. 
+        `id_field` names the field used as the document id. With a schema set, 
+        documents are checked and coerced like `parallel_bulk_insert` does. 
+        """
+        items = iter_import_items(
+            path = path, 
+            index_name = self.index_name, 
+            type_name = self.type_name, 
+            format = format, 
+            compression = compression, 
+            chunk_size = chunk_size, 
+            id_field = id_field, 
+            converters = converters, 
+            num_processes = num_processes, 
+            schema = self.encoder.schema if self.encoder is not None else None, 
+        )
+        dead_letter = self._dead_letter_sink(dead_letter)
+        stats = BulkStats() 
+        
+        parallel_bulk(
+            send_batch = functools.partial(
+                self._send_bulk, 
+                max_retries = max_retries, 
+                retry_backoff = retry_backoff, 
+                dead_letter = dead_letter, 
+                controller = controller, 
+            ), 
+            items = self._checked_items(tqdm(items, desc='Importing', disable=not use_tqdm), dead_letter, stats), 
+            batch_size = batch_size, 
+            batch_bytes = batch_bytes, 
+            num_workers = num_workers, 
+            max_in_flight = max_in_flight, 
+            controller = controller, 
+            stats = stats, 
+        )
+        
+        if log_stats:
+            print(stats)
+            
+        return stats 
+    
+    def export_file(self,
+                    path: str,
+                    format: Optional[str] = None,
+                    compression: Optional[str] = None,
+                    query: Union[None, Query, dict[str, Any]] = None,
+                    source: Any = None,
+                    num_slices: int = 1,
+                    scroll_size: int = 1000,
+                    use_pit: bool = False,
+                    batch_size: int = 10000,
+                    columns: Optional[list[str]] = None,
+                    use_tqdm: bool = False) -> int:
+        """
+        Write the matching documents (with their `_id`) to an NDJSON, CSV or Parquet 
+        file and return how many were written. Documents come from a scroll, a sliced 
+        scroll when `num_slices` > 1, or PIT + search_after with `use_pit`. `columns` 
+        is passed to `ExportWriter`. 
+        """
+        if isinstance(query, Query):
+            query = query.to_dict() 
+        
+        if use_pit:
+            entries = self._search_iter(build_search_body(query=query, source=source), page_size=scroll_size)
+        elif num_slices > 1:
+            entries = self.parallel_scroll(num_slices=num_slices, scroll_size=scroll_size, query=query, source=source)
         else:
-            raise UnknownError(resp_json)
+            entries = self.scroll(scroll_size=scroll_size, query=query, source=source)
+            
+        with ExportWriter(path, format=format, compression=compression, batch_size=batch_size, columns=columns) as writer:
+            writer.write_many(tqdm(entries, desc='Exporting', disable=not use_tqdm))
+            
+        return writer.num_docs 
     
     def bulk_insert_old(self,
                     entry_sequence: Iterable[dict[str, Any]],
                     batch_size: int = 10000,
                     use_tqdm: bool = True,
                     total: Optional[int] = None):
-        def send_batch_json(batch_json: str):
-            resp = requests.post(
-                url = f"http://{self.host}:{self.port}/_bulk",
-                headers = { 'Content-Type': 'application/json' }, 
-                data = batch_json.encode('utf-8'), 
-                auth = self.auth, 
-            )           
-            resp_json = resp.json()
-            
-            if resp_json.get('errors') == False:
-                pass 
-            else:
-                raise UnknownError(resp_json)
+        self.parallel_bulk_insert(
+            entry_sequence = entry_sequence, 
+            batch_size = batch_size, 
+            batch_bytes = None, 
+            num_workers = 1, 
+            max_in_flight = 1, 
+            use_tqdm = use_tqdm, 
+            total = total, 
+        )
+
+    def flush(self):
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/_flush",
+        )           
+        resp_json = json_decode(resp.content) 
+
+        if resp.status_code == 200:
+            pass 
+        else:
+            raise UnknownError(resp_json)
+
+    def refresh(self):
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/_refresh",
+        )           
+        resp_json = json_decode(resp.content) 
+
+        if resp.status_code == 200:
+            pass 
+        else:
+            raise UnknownError(resp_json)
         
-        batch_json = ''
-        batch_cnt = 0 
+    def force_merge(self,
+                    max_num_segments: int = 1):
+        resp = self._request(
+            method = 'POST', 
+            path = f"{self.index_name}/_forcemerge?max_num_segments={max_num_segments}",
+            timeout = None, 
+        )           
+        resp_json = json_decode(resp.content) 
+
+        if resp.status_code == 200:
+            pass 
+        else:
+            raise UnknownError(resp_json)
         
-        for entry in tqdm(entry_sequence, desc='Bulk Inserting', disable=not use_tqdm, total=total):
-            if '_id' in entry: 
-                _id = str(entry.pop('_id')) 
-            else:
-                _id = None 
+    def get_settings(self) -> dict[str, Any]:
+        resp = self._request(
+            method = 'GET', 
+            path = f"{self.index_name}/_settings?flat_settings=true",
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if self.index_name in resp_json:
+            return resp_json[self.index_name]['settings']
+        elif explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+            raise IndexNotExistError
+        else:
+            raise UnknownError(resp_json)
+        
+    def put_settings(self,
+                     settings: dict[str, Any]):
+        resp = self._request(
+            method = 'PUT', 
+            path = f"{self.index_name}/_settings",
+            json = settings, 
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if resp_json.get('acknowledged') == True:
+            pass 
+        else:
+            raise UnknownError(resp_json)
+        
+    def wait_for_status(self,
+                        status: str = 'green',
+                        timeout: str = '5m'):
+        resp = self._request(
+            method = 'GET', 
+            path = f"_cluster/health/{self.index_name}?wait_for_status={status}&timeout={timeout}",
+            timeout = None, 
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if 'status' in resp_json and not resp_json.get('timed_out'):
+            pass 
+        else:
+            raise UnknownError(resp_json)
+        
+    @contextmanager
+    def bulk_load_mode(self,
+                       refresh_interval: str = '-1',
+                       number_of_replicas: int = 0,
+                       extra_settings: Optional[dict[str, Any]] = None,
+                       force_merge: Optional[int] = None,
+                       wait_for_status: Optional[str] = 'green',
+                       timeout: str = '5m') -> Iterator['ESIndex']:
+        ingest_settings = {
+            'index.refresh_interval': refresh_interval, 
+            'index.number_of_replicas': number_of_replicas, 
+            **(extra_settings or dict()), 
+        }
+        
+        # Settings left at their defaults are absent here; restoring them as None 
+        # resets them to the default again. 
+        current_settings = self.get_settings() 
+        original_settings = { key: current_settings.get(key) for key in ingest_settings }
+        
+        self.put_settings(ingest_settings)
+        
+        try:
+            yield self 
+        finally:
+            self.put_settings(original_settings)
+            self.refresh() 
+        
+        if force_merge is not None:
+            self.force_merge(max_num_segments=force_merge)
             
-            if _id:
-                batch_json += json_dump({ 'index': { '_index': self.index_name, '_id': _id } }) + '\n'
-            else:
-                batch_json += json_dump({ 'index': { '_index': self.index_name } }) + '\n'
+        if wait_for_status is not None:
+            self.wait_for_status(wait_for_status, timeout=timeout)
+        
+    def _sibling(self,
+                 index_name: str) -> 'ESIndex':
+        index = ESIndex(
+            host = self.host, 
+            port = self.port, 
+            auth = self.auth, 
+            index_name = index_name, 
+            type_name = self.type_name, 
+            session = self.session, 
+            hooks = self.hooks, 
+            nodes = self.nodes, 
+            compressor = self.compressor, 
+            timeout = self.timeout, 
+            bulk_timeout = self.bulk_timeout, 
+            retry_non_idempotent = self.retry_non_idempotent, 
+        )
+        
+        return index 
+    
+    def get_task(self,
+                 task_id: str) -> dict[str, Any]:
+        resp = self._request(
+            method = 'GET', 
+            path = f"_tasks/{task_id}",
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if 'completed' in resp_json:
+            return resp_json 
+        else:
+            raise UnknownError(resp_json)
+    
+    def wait_for_task(self,
+                      task_id: str,
+                      poll_interval: float = 5.0,
+                      use_tqdm: bool = True,
+                      desc: str = 'Task',
+                      progress: Optional[Callable[[dict[str, Any]], None]] = None,
+                      cancel_on_interrupt: bool = True) -> dict[str, Any]:
+        """
+        Poll `_tasks` until the task completes and return its response. `progress` 
+        gets the task status after every poll. Interrupting the wait (Ctrl-C) 
+        cancels the task on the server unless `cancel_on_interrupt` is False. 
+        """
+        try:
+            with tqdm(desc=desc, disable=not use_tqdm) as pbar:
+                while True:
+                    task = self.get_task(task_id)
+                    status = explore_dict(task, 'task/status', default=dict())
+                    done = sum(status.get(key, 0) for key in ['created', 'updated', 'deleted', 'noops'])
+                    
+                    pbar.total = status.get('total') or pbar.total 
+                    pbar.update(done - pbar.n)
+                    
+                    if progress is not None:
+                        progress(status)
+                    
+                    if task['completed']:
+                        break 
+                    
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            if cancel_on_interrupt:
+                self.cancel_task(task_id)
+                
+            raise 
                 
-            batch_json += json_dump(entry) + '\n'
-            batch_cnt += 1 
+        if 'error' in task or explore_dict(task, 'response/failures'):
+            raise UnknownError(task)
+        
+        return task.get('response', dict())
+    
+    def cancel_task(self,
+                    task_id: str):
+        resp = self._request(
+            method = 'POST', 
+            path = f"_tasks/{task_id}/_cancel",
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if 'node_failures' in resp_json or 'task_failures' in resp_json or 'error' in resp_json:
+            raise UnknownError(resp_json)
+        
+    def _by_query_task(self,
+                       endpoint: str,
+                       body: dict[str, Any],
+                       slices: Union[int, str],
+                       requests_per_second: Optional[float],
+                       conflicts: str,
+                       wait: bool,
+                       poll_interval: float,
+                       use_tqdm: bool,
+                       progress: Optional[Callable[[dict[str, Any]], None]]) -> Union[str, dict[str, Any]]:
+        path = f"{self.index_name}/{endpoint}?slices={slices}&conflicts={conflicts}&wait_for_completion=false"
+        
+        if requests_per_second is not None:
+            path += f"&requests_per_second={requests_per_second}"
+            
+        resp = self._request(
+            method = 'POST', 
+            path = path,
+            json = body, 
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if 'task' in resp_json:
+            task_id = resp_json['task']
+        elif explore_dict(resp_json, 'error/type') == 'index_not_found_exception':
+            raise IndexNotExistError
+        else:
+            raise UnknownError(resp_json)
+        
+        if not wait:
+            return task_id 
+        
+        # Lookups made while the task runs can cache documents it is about to change, 
+        # so the cache is cleared once it has finished (or was cancelled) as well. 
+        try:
+            return self.wait_for_task(task_id, poll_interval=poll_interval, use_tqdm=use_tqdm, desc=endpoint, progress=progress)
+        finally:
+            if self.cache is not None:
+                self.cache.clear() 
+    
+    def delete_by_query(self,
+                        query: Union[None, Query, dict[str, Any]],
+                        slices: Union[int, str] = 'auto',
+                        requests_per_second: Optional[float] = None,
+                        conflicts: str = 'proceed',
+                        wait: bool = True,
+                        poll_interval: float = 5.0,
+                        use_tqdm: bool = True,
+                        progress: Optional[Callable[[dict[str, Any]], None]] = None) -> Union[str, dict[str, Any]]:
+        """
+        Delete the matching documents with a background `_delete_by_query` task. With 
+        `wait` the task is polled to completion and its response returned; otherwise 
+        the task id is returned for `wait_for_task` or `cancel_task`. 
+        
+        The document cache is cleared when the task completes. Without `wait` that 
+        is left to the caller: `cache.clear()` after `wait_for_task`, as lookups in 
+        the meantime may cache documents the task then deletes. 
+        """
+        if self.cache is not None:
+            self.cache.clear() 
             
-            if batch_cnt >= batch_size:
-                send_batch_json(batch_json)        
+        return self._by_query_task(
+            endpoint = '_delete_by_query', 
+            body = { 'query': build_search_body(query=query)['query'] }, 
+            slices = slices, 
+            requests_per_second = requests_per_second, 
+            conflicts = conflicts, 
+            wait = wait, 
+            poll_interval = poll_interval, 
+            use_tqdm = use_tqdm, 
+            progress = progress, 
+        )
+        
+    def update_by_query(self,
+                        query: Union[None, Query, dict[str, Any]],
+                        script: Optional[str] = None,
+                        params: Optional[dict[str, Any]] = None,
+                        lang: str = 'painless',
+                        slices: Union[int, str] = 'auto',
+                        requests_per_second: Optional[float] = None,
+                        conflicts: str = 'proceed',
+                        wait: bool = True,
+                        poll_interval: float = 5.0,
+                        use_tqdm: bool = True,
+                        progress: Optional[Callable[[dict[str, Any]], None]] = None) -> Union[str, dict[str, Any]]:
+        """
+        Run `script` over the matching documents with a background `_update_by_query` 
+        task; without a script the documents are just reindexed in place (e.g. to pick 
+        up a new mapping). `wait` and the document cache work as in `delete_by_query`. 
+        """
+        body = { 'query': build_search_body(query=query)['query'] }
+        
+        if script is not None:
+            body['script'] = { 'source': script, 'lang': lang }
             
-                batch_cnt = 0 
-                batch_json = ''
+            if params:
+                body['script']['params'] = params 
                 
-        if batch_cnt > 0:
-            send_batch_json(batch_json)
-
-    def flush(self):
-        resp = requests.post(
-            url = f"http://{self.host}:{self.port}/{self.index_name}/_flush",
-            auth = self.auth, 
+        if self.cache is not None:
+            self.cache.clear() 
+        
+        return self._by_query_task(
+            endpoint = '_update_by_query', 
+            body = body, 
+            slices = slices, 
+            requests_per_second = requests_per_second, 
+            conflicts = conflicts, 
+            wait = wait, 
+            poll_interval = poll_interval, 
+            use_tqdm = use_tqdm, 
+            progress = progress, 
+        )
+    
+    def _alias_indices(self,
+                       alias: str) -> list[str]:
+        resp = self._request(
+            method = 'GET', 
+            path = f"_alias/{alias}",
         )           
-        resp_json = resp.json() 
-
-        if resp.status_code == 200:
+        resp_json = json_decode(resp.content) 
+        
+        if resp.status_code == 404:
+            return [] 
+        elif resp.status_code == 200:
+            return list(resp_json)
+        else:
+            raise UnknownError(resp_json)
+        
+    def _next_versioned_name(self,
+                             alias: str) -> str:
+        resp = self._request(
+            method = 'GET', 
+            path = f"_cat/indices/{alias}_v*?format=json&h=index",
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if not isinstance(resp_json, list):
+            raise UnknownError(resp_json)
+        
+        versions = [] 
+        
+        for row in resp_json:
+            suffix = row['index'][len(alias) + 2:]
+            
+            if suffix.isdigit():
+                versions.append(int(suffix))
+                
+        return f"{alias}_v{max(versions, default=0) + 1}"
+    
+    def swap_alias(self,
+                   alias: str,
+                   new_index_name: str,
+                   remove_index: bool = False):
+        """
+        Atomically point `alias` at `new_index_name` only. 
+        
+        A concrete index can't share its name with the alias, so when `alias` is 
+        one it has to be deleted in the same request; that only happens with 
+        `remove_index=True`, otherwise ValueError is raised. 
+        """
+        old_index_names = [name for name in self._alias_indices(alias) if name != new_index_name]
+        actions = [{ 'remove': { 'index': name, 'alias': alias } } for name in old_index_names]
+        
+        if not old_index_names and self._sibling(alias).exists():
+            if not remove_index:
+                raise ValueError(f"{alias} is a concrete index; pass remove_index=True to delete it and replace it with an alias")
+            
+            actions.append({ 'remove_index': { 'index': alias } })
+            
+        actions.append({ 'add': { 'index': new_index_name, 'alias': alias } })
+        
+        resp = self._request(
+            method = 'POST', 
+            path = '_aliases',
+            json = { 'actions': actions }, 
+        )           
+        resp_json = json_decode(resp.content) 
+        
+        if resp_json.get('acknowledged') == True:
             pass 
         else:
             raise UnknownError(resp_json)
+    
+    def reindex(self,
+                mapping: Union[Schema, dict[str, Union[int, dict[str, Any]]]],
+                alias: Optional[str] = None,
+                dynamic: bool = False,
+                transform: Optional[Callable[[dict[str, Any]], Optional[dict[str, Any]]]] = None,
+                num_slices: int = 4,
+                requests_per_second: Optional[float] = None,
+                poll_interval: float = 5.0,
+                delete_old: bool = False,
+                wait_for_status: Optional[str] = 'green',
+                use_tqdm: bool = True,
+                log_stats: bool = False) -> 'ESIndex':
+        """
+        Copy this index (or alias) into a new versioned index `{alias}_v{N}` built 
+        with `mapping`, then atomically point `alias` at it. 
+        
+        Without `transform` the copy runs server-side as a sliced `_reindex` task; 
+        with one, documents go through a sliced scroll, `transform` (return None to 
+        drop a document) and a parallel bulk load on the client. 
+        
+        When `alias` is itself a concrete index (the first reindex of a plain 
+        index), it has to be deleted for the alias to take its name, which leaves 
+        nothing to roll back to. That is refused with ValueError unless 
+        `delete_old=True`. If the copy fails, the new index is deleted again 
+        before the error is raised. 
+        """
+        alias = alias or self.index_name 
+        old_index_names = self._alias_indices(alias)
+        
+        if not old_index_names and self._sibling(alias).exists() and not delete_old:
+            raise ValueError(f"{alias} is a concrete index and would be deleted by the alias swap; pass delete_old=True to allow it")
+        
+        new_index = self._sibling(self._next_versioned_name(alias))
+        new_index.create_mapping(mapping, dynamic=dynamic)
+        
+        start = time.perf_counter() 
+        
+        try:
+            num_docs = self._copy_into(new_index, transform, num_slices, requests_per_second, poll_interval, wait_for_status, use_tqdm)
+        except BaseException:
+            new_index.delete_index() 
+            
+            raise 
+        
+        self.swap_alias(alias, new_index.index_name, remove_index=delete_old)
+        
+        if delete_old:
+            for name in old_index_names:
+                self._sibling(name).delete_index() 
+                
+        if log_stats:
+            elapsed = time.perf_counter() - start 
+            print(f"Reindexed {num_docs} docs into {new_index.index_name} in {elapsed:.2f}s ({num_docs / elapsed if elapsed > 0 else 0.0:.0f} docs/s)")
+            
+        return new_index
+    
+    def _copy_into(self,
+                   new_index: 'ESIndex',
+                   transform: Optional[Callable[[dict[str, Any]], Optional[dict[str, Any]]]],
+                   num_slices: int,
+                   requests_per_second: Optional[float],
+                   poll_interval: float,
+                   wait_for_status: Optional[str],
+                   use_tqdm: bool) -> int:
+        with new_index.bulk_load_mode(wait_for_status=wait_for_status):
+            if transform is None:
+                path = f"_reindex?slices={num_slices}&wait_for_completion=false"
+                
+                if requests_per_second is not None:
+                    path += f"&requests_per_second={requests_per_second}"
+                    
+                resp = self._request(
+                    method = 'POST', 
+                    path = path,
+                    json = {
+                        'source': { 'index': self.index_name, 'size': 1000 }, 
+                        'dest': { 'index': new_index.index_name }, 
+                    }, 
+                )           
+                resp_json = json_decode(resp.content) 
+                
+                if 'task' not in resp_json:
+                    raise UnknownError(resp_json)
+                
+                response = self.wait_for_task(resp_json['task'], poll_interval=poll_interval, use_tqdm=use_tqdm, desc='Reindexing')
+                num_docs = response.get('created', 0) + response.get('updated', 0)
+            else:
+                entries = (transform(entry) for entry in self.parallel_scroll(num_slices=num_slices))
+                
+                stats = new_index.parallel_bulk_insert(
+                    entry_sequence = (entry for entry in entries if entry is not None), 
+                    num_workers = num_slices, 
+                    use_tqdm = use_tqdm, 
+                    total = self.count(), 
+                )
+                num_docs = stats.num_docs 
+                
+        return num_docs  
@@ -0,0 +1,255 @@
+import bisect 
+import re 
+import threading 
+import time 
+from typing import Any, Optional 
+
+try:
+    import prometheus_client 
+except ImportError:
+    prometheus_client = None 
+
+try:
+    from opentelemetry import metrics as otel_metrics 
+except ImportError:
+    otel_metrics = None 
+
+__all__ = [
+    'RequestEvent', 
+    'Instrumentation', 
+    'HistogramCollector', 
+    'PrometheusExporter', 
+    'OpenTelemetryExporter', 
+    'operation_name', 
+    'parse_took', 
+]
+
+_TOOK_PATTERN = re.compile(rb'"took"\s*:\s*(\d+)')
+
+
+def operation_name(path: str) -> str:
+    """
+    Name the Elasticsearch endpoint behind a request path, e.g. `_search`, 
+    `_search/scroll`, `_bulk`, `_doc` or `index` for index-level calls. 
+    """
+    segments = [seg for seg in path.split('?', 1)[0].split('/') if seg]
+    
+    for i, seg in enumerate(segments):
+        if seg == '_search' and i + 1 < len(segments) and segments[i + 1] == 'scroll':
+            return '_search/scroll'
+        elif seg.startswith('_') and seg != '_doc':
+            return seg 
+        
+    if len(segments) > 1:
+        return '_doc'
+    elif segments:
+        return 'index'
+    else:
+        return 'root'
+
+
+def parse_took(content: bytes) -> Optional[int]:
+    # Elasticsearch writes `took` near the start of the body; scanning a short 
+    # prefix avoids decoding the response a second time. 
+    match = _TOOK_PATTERN.search(content, 0, 256)
+    
+    return int(match.group(1)) if match else None 
+
+
+class RequestEvent:
+    __slots__ = [
+        'method', 'path', 'operation', 'request_bytes', 'response_bytes', 'status', 
+        'start_time', 'wall_time', 'took', 'retries', 'error', 'node', 
+    ]
+    
+    def __init__(self,
+                 method: str,
+                 path: str,
+                 request_bytes: int = 0):
+        self.method = method 
+        self.path = path 
+        self.operation = operation_name(path)
+        self.request_bytes = request_bytes 
+        self.response_bytes = 0 
+        self.status: Optional[int] = None 
+        self.start_time = time.time() 
+        self.wall_time = 0.0 
+        self.took: Optional[int] = None 
+        self.retries = 0 
+        self.error: Optional[BaseException] = None 
+        self.node: Optional[str] = None 
+        
+    def __repr__(self) -> str:
+        return (
+            f"RequestEvent({self.method} {self.operation} status={self.status} "
+            f"wall={self.wall_time * 1000:.2f}ms took={self.took}ms "
+            f"bytes={self.request_bytes}/{self.response_bytes} retries={self.retries})"
+        )
+
+
+class Instrumentation:
+    """
+    Base class of request hooks. `before_request` runs before a request is sent and 
+    `after_request` once it finished or failed, with the same `RequestEvent`. 
+    """
+    
+    def before_request(self, event: RequestEvent):
+        pass 
+    
+    def after_request(self, event: RequestEvent):
+        pass 
+
+
+# Log-spaced latency bucket bounds from 0.1ms to ~105s, four per doubling. 
+_BUCKET_BOUNDS = [0.0001 * 2 ** (i / 4) for i in range(81)]
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0 
+        self.total = 0.0 
+        self.max = 0.0 
+        self.request_bytes = 0 
+        self.response_bytes = 0 
+        self.took_total = 0 
+        self.took_count = 0 
+        self.retries = 0 
+        self.errors = 0 
+        
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0 
+        
+        rank = q * self.count 
+        seen = 0 
+        
+        for i, count in enumerate(self.counts):
+            seen += count 
+            
+            if seen >= rank:
+                return min(_BUCKET_BOUNDS[i], self.max) if i < len(_BUCKET_BOUNDS) else self.max 
+            
+        return self.max 
+
+
+class HistogramCollector(Instrumentation):
+    """
+    In-memory latency histograms per `METHOD operation`, with byte, `took`, retry 
+    and error totals. 
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock() 
+        self.histograms: dict[str, _Histogram] = dict() 
+        
+    def after_request(self, event: RequestEvent):
+        key = f"{event.method} {event.operation}"
+        
+        with self.lock:
+            histogram = self.histograms.get(key)
+            
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram() 
+                
+            histogram.counts[bisect.bisect_left(_BUCKET_BOUNDS, event.wall_time)] += 1 
+            histogram.count += 1 
+            histogram.total += event.wall_time 
+            histogram.max = max(histogram.max, event.wall_time)
+            histogram.request_bytes += event.request_bytes 
+            histogram.response_bytes += event.response_bytes 
+            
+            if event.took is not None:
+                histogram.took_total += event.took 
+                histogram.took_count += 1 
+                
+            histogram.retries += event.retries 
+            histogram.errors += event.error is not None or (event.status or 0) >= 500 
+            
+    def quantile(self,
+                 key: str,
+                 q: float) -> float:
+        with self.lock:
+            return self.histograms[key].quantile(q)
+        
+    def reset(self):
+        with self.lock:
+            self.histograms.clear() 
+            
+    def summary(self) -> dict[str, dict[str, Any]]:
+        with self.lock:
+            return {
+                key: {
+                    'count': h.count, 
+                    'mean_ms': h.total / h.count * 1000, 
+                    'p50_ms': h.quantile(0.50) * 1000, 
+                    'p90_ms': h.quantile(0.90) * 1000, 
+                    'p99_ms': h.quantile(0.99) * 1000, 
+                    'max_ms': h.max * 1000, 
+                    'mean_took_ms': h.took_total / h.took_count if h.took_count else None, 
+                    'request_bytes': h.request_bytes, 
+                    'response_bytes': h.response_bytes, 
+                    'retries': h.retries, 
+                    'errors': h.errors, 
+                }
+                for key, h in self.histograms.items() 
+            }
+
+
+class PrometheusExporter(Instrumentation):
+    def __init__(self,
+                 namespace: str = 'es_util',
+                 registry: Any = None):
+        if prometheus_client is None:
+            raise ImportError("PrometheusExporter requires prometheus_client: pip install prometheus-client")
+        
+        kwargs = dict() if registry is None else { 'registry': registry }
+        labels = ['method', 'operation']
+        
+        self.latency = prometheus_client.Histogram(f"{namespace}_request_seconds", 'Client wall time per request.', labels, **kwargs)
+        self.took = prometheus_client.Histogram(f"{namespace}_request_took_seconds", 'Server-reported took per request.', labels, **kwargs)
+        self.bytes = prometheus_client.Counter(f"{namespace}_request_bytes", 'Bytes sent and received.', labels + ['direction'], **kwargs)
+        self.retries = prometheus_client.Counter(f"{namespace}_request_retries", 'Transport-level retries.', labels, **kwargs)
+        self.errors = prometheus_client.Counter(f"{namespace}_request_errors", 'Failed requests.', labels, **kwargs)
+        
+    def after_request(self, event: RequestEvent):
+        labels = (event.method, event.operation)
+        
+        self.latency.labels(*labels).observe(event.wall_time)
+        
+        if event.took is not None:
+            self.took.labels(*labels).observe(event.took / 1000)
+            
+        self.bytes.labels(*labels, 'sent').inc(event.request_bytes)
+        self.bytes.labels(*labels, 'received').inc(event.response_bytes)
+        self.retries.labels(*labels).inc(event.retries)
+        
+        if event.error is not None or (event.status or 0) >= 500:
+            self.errors.labels(*labels).inc() 
+
+
+class OpenTelemetryExporter(Instrumentation):
+    def __init__(self,
+                 meter: Any = None):
+        if otel_metrics is None:
+            raise ImportError("OpenTelemetryExporter requires opentelemetry-api: pip install opentelemetry-api")
+        
+        if meter is None:
+            meter = otel_metrics.get_meter('es_util')
+            
+        self.latency = meter.create_histogram('es_util.request.duration', unit='s')
+        self.took = meter.create_histogram('es_util.request.took', unit='ms')
+        self.bytes = meter.create_counter('es_util.request.bytes', unit='By')
+        self.retries = meter.create_counter('es_util.request.retries')
+        
+    def after_request(self, event: RequestEvent):
+        attributes = { 'method': event.method, 'operation': event.operation, 'status': event.status or 0 }
+        
+        self.latency.record(event.wall_time, attributes)
+        
+        if event.took is not None:
+            self.took.record(event.took, attributes)
+            
+        self.bytes.add(event.request_bytes, { **attributes, 'direction': 'sent' })
+        self.bytes.add(event.response_bytes, { **attributes, 'direction': 'received' })
+        self.retries.add(event.retries, attributes)
@@ -0,0 +1,73 @@
+import threading 
+from typing import Any, Optional 
+from collections.abc import Callable 
+
+__all__ = [
+    'MGetCoalescer', 
+]
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.ids = [] 
+        self.results: Optional[list[Any]] = None 
+        self.error: Optional[BaseException] = None 
+        self.full = threading.Event() 
+        self.done = threading.Event() 
+
+
+class MGetCoalescer:
+    """
+    Merge concurrent single-document lookups into one multi-get. 
+    
+    The first caller of a batch becomes its leader: it waits up to `window` seconds 
+    (or until `max_batch` ids have joined), then runs `fetch` for the whole batch on 
+    its own thread and hands each waiting caller its result. 
+    """
+    
+    def __init__(self,
+                 fetch: Callable[[list[Any]], list[Any]],
+                 window: float = 0.002,
+                 max_batch: int = 1000):
+        self.fetch = fetch 
+        self.window = window 
+        self.max_batch = max_batch 
+        self.lock = threading.Lock() 
+        self.batch: Optional[_PendingBatch] = None 
+        
+    def get(self,
+            id: Any) -> Any:
+        with self.lock:
+            is_leader = self.batch is None 
+            
+            if is_leader:
+                self.batch = _PendingBatch() 
+                
+            batch = self.batch 
+            position = len(batch.ids)
+            batch.ids.append(id)
+            
+            if len(batch.ids) >= self.max_batch:
+                self.batch = None 
+                batch.full.set() 
+                
+        if is_leader:
+            batch.full.wait(self.window)
+            
+            with self.lock:
+                if self.batch is batch:
+                    self.batch = None 
+                    
+            try:
+                batch.results = self.fetch(batch.ids)
+            except BaseException as e:
+                batch.error = e 
+            finally:
+                batch.done.set() 
+        else:
+            batch.done.wait() 
+            
+        if batch.error is not None:
+            raise batch.error 
+        
+        return batch.results[position]
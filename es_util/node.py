@@ -0,0 +1,238 @@
+from .util import * 
+
+import threading 
+import time 
+from urllib.parse import urlsplit 
+from typing import Optional, Any, Callable, TypeVar 
+from collections.abc import Iterable 
+
+__all__ = [
+    'FAILOVER_STATUSES', 
+    'IDEMPOTENT_METHODS', 
+    'parse_node', 
+    'sniffed_urls', 
+    'Node', 
+    'NodePool', 
+]
+
+T = TypeVar('T')
+
+# Gateway errors mean the node itself could not serve the request, so it is 
+# marked dead and the request moves on to the next node. 
+FAILOVER_STATUSES = (502, 503, 504)
+
+# Methods that are safe to send again after the node may already have applied them. 
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+
+
+def parse_node(node: str,
+               scheme: str = 'http', 
+               default_port: int = 9200) -> str:
+    """
+    Normalise `host`, `host:port` or `scheme://host:port` into a base URL. 
+    """
+    if '://' not in node:
+        node = f"{scheme}://{node}" 
+    
+    parts = urlsplit(node)
+    hostname = f"[{parts.hostname}]" if ':' in parts.hostname else parts.hostname 
+    
+    return f"{parts.scheme}://{hostname}:{parts.port or default_port}" 
+
+
+def sniffed_urls(resp_json: dict[str, Any],
+                 scheme: str = 'http') -> list[str]:
+    """
+    Base URLs of the data nodes in a `_nodes/http` response. 
+    """
+    urls = []
+    
+    for node in resp_json.get('nodes', dict()).values():
+        roles = node.get('roles')
+        address = explore_dict(node, 'http/publish_address')
+        
+        if not address:
+            continue 
+        
+        if roles is not None and not any(role == 'data' or role.startswith('data_') for role in roles):
+            continue 
+        
+        # `publish_address` is `ip:port` or `hostname/ip:port`; the hostname is 
+        # preferred so that TLS certificates still match. 
+        if '/' in address:
+            hostname, address = address.split('/', 1)
+            address = f"{hostname}:{address.rsplit(':', 1)[1]}" if hostname else address 
+        
+        urls.append(parse_node(address, scheme=scheme))
+    
+    return urls 
+
+
+class Node:
+    __slots__ = ['url', 'outstanding', 'failures', 'dead_until']
+    
+    def __init__(self,
+                 url: str):
+        self.url = url 
+        self.outstanding = 0 
+        self.failures = 0 
+        self.dead_until = 0.0 
+    
+    def __repr__(self) -> str:
+        return f"Node({self.url} outstanding={self.outstanding} failures={self.failures})" 
+
+
+class NodePool:
+    """
+    Spreads requests over several nodes, either round-robin or to the node with 
+    the fewest outstanding requests. 
+    
+    A node that fails is skipped for `dead_timeout` seconds, doubling on each 
+    consecutive failure up to `max_dead_timeout`; when every node is dead the one 
+    due soonest is tried anyway. 
+    """
+    
+    def __init__(self,
+                 nodes: Iterable[str],
+                 selector: str = 'round_robin', 
+                 dead_timeout: float = 1.0, 
+                 max_dead_timeout: float = 60.0, 
+                 sniff_on_start: bool = False, 
+                 sniff_interval: Optional[float] = None, 
+                 sniffer: Optional[Callable[[str], dict[str, Any]]] = None, 
+                 scheme: str = 'http'):
+        if selector not in ('round_robin', 'least_outstanding'):
+            raise ValueError(f"unknown selector: {selector}")
+        
+        self.nodes = [Node(url) for url in nodes]
+        
+        if not self.nodes:
+            raise ValueError('at least one node is required')
+        
+        self.selector = selector 
+        self.dead_timeout = dead_timeout 
+        self.max_dead_timeout = max_dead_timeout 
+        self.sniff_interval = sniff_interval 
+        self.sniffer = sniffer 
+        self.scheme = scheme 
+        self.lock = threading.Lock() 
+        self._cursor = 0 
+        
+        if sniff_on_start:
+            self._next_sniff: Optional[float] = 0.0 
+        elif sniff_interval is not None:
+            self._next_sniff = time.monotonic() + sniff_interval 
+        else:
+            self._next_sniff = None 
+    
+    @property 
+    def urls(self) -> list[str]:
+        return [node.url for node in self.nodes]
+    
+    def select(self) -> Node:
+        with self.lock:
+            now = time.monotonic() 
+            alive = [node for node in self.nodes if node.dead_until <= now]
+            
+            if not alive:
+                alive = [min(self.nodes, key=lambda node: node.dead_until)]
+            
+            offset = self._cursor % len(alive)
+            self._cursor += 1 
+            
+            if self.selector == 'round_robin':
+                node = alive[offset]
+            else:
+                # Rotating first spreads ties instead of always favouring the first node. 
+                node = min(alive[offset:] + alive[:offset], key=lambda node: node.outstanding)
+            
+            node.outstanding += 1 
+            
+            return node 
+    
+    def release(self,
+                node: Node,
+                failed: bool = False):
+        with self.lock:
+            node.outstanding -= 1 
+            
+            if failed:
+                node.failures += 1 
+                timeout = min(self.dead_timeout * 2 ** (node.failures - 1), self.max_dead_timeout)
+                node.dead_until = time.monotonic() + timeout 
+            else:
+                node.failures = 0 
+                node.dead_until = 0.0 
+    
+    def perform(self,
+                send: Callable[[str], T],
+                errors: tuple[type[BaseException], ...] = (OSError,), 
+                failover: Optional[Callable[[T], bool]] = None, 
+                can_retry: Optional[Callable[[BaseException], bool]] = None) -> T:
+        """
+        Call `send(base_url)` on a selected node, moving on to the next node when 
+        it raises one of `errors` or `failover(result)` is true. Each node is tried 
+        at most once; the last error or result is passed through. 
+        
+        An error for which `can_retry(error)` is false still marks the node dead but 
+        is raised at once, e.g. a read error on a request that must not be repeated. 
+        """
+        num_attempts = len(self.nodes)
+        
+        for attempt in range(num_attempts):
+            node = self.select() 
+            
+            try:
+                result = send(node.url)
+            except errors as e:
+                self.release(node, failed=True)
+                
+                if attempt == num_attempts - 1 or (can_retry is not None and not can_retry(e)):
+                    raise 
+                
+                continue 
+            except BaseException:
+                self.release(node)
+                
+                raise 
+            
+            failed = failover is not None and failover(result)
+            self.release(node, failed=failed)
+            
+            if not failed or attempt == num_attempts - 1:
+                return result 
+    
+    def set_urls(self,
+                 urls: Iterable[str]):
+        with self.lock:
+            known = { node.url: node for node in self.nodes }
+            nodes = [known.get(url) or Node(url) for url in dict.fromkeys(urls)]
+            
+            if nodes:
+                self.nodes = nodes 
+    
+    def sniff_due(self) -> bool:
+        """
+        True at most once per `sniff_interval` (and once at start with `sniff_on_start`); 
+        the caller that sees True is expected to sniff. 
+        """
+        if self._next_sniff is None:
+            return False 
+        
+        with self.lock:
+            now = time.monotonic() 
+            
+            if self._next_sniff is None or now < self._next_sniff:
+                return False 
+            
+            self._next_sniff = now + self.sniff_interval if self.sniff_interval is not None else None 
+            
+            return True 
+    
+    def apply_sniff(self,
+                    resp_json: dict[str, Any]):
+        self.set_urls(sniffed_urls(resp_json, scheme=self.scheme))
+    
+    def sniff(self):
+        if self.sniffer is not None:
+            self.apply_sniff(self.perform(self.sniffer))
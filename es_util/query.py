@@ -0,0 +1,209 @@
+from typing import Any, Optional, Union 
+from collections.abc import Iterable 
+
+__all__ = [
+    'Query', 
+    'Eq', 
+    'In', 
+    'Range', 
+    'Exists', 
+    'Match', 
+    'And', 
+    'Or', 
+    'Not', 
+    'DEFAULT_SEARCH_SIZE', 
+    'build_search_body', 
+]
+
+# Hits returned by a non-lazy search without an explicit limit; Elasticsearch's 
+# default `index.max_result_window`. 
+DEFAULT_SEARCH_SIZE = 10000 
+
+
+class Query:
+    """
+    Base class of composable query predicates. 
+    
+    Predicates combine with `&`, `|` and `~`. Exact-match predicates compile into 
+    non-scoring filter clauses, which Elasticsearch can cache; only `Match` scores. 
+    """
+    
+    scoring = False 
+    
+    def to_dict(self) -> dict[str, Any]:
+        raise NotImplementedError 
+    
+    def __and__(self, other: 'Query') -> 'And':
+        return And(self, other)
+    
+    def __or__(self, other: 'Query') -> 'Or':
+        return Or(self, other)
+    
+    def __invert__(self) -> 'Not':
+        return Not(self)
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class Eq(Query):
+    def __init__(self,
+                 field: str,
+                 value: Any):
+        self.field = field 
+        self.value = value 
+        
+    def to_dict(self) -> dict[str, Any]:
+        return { 'term': { self.field: self.value } }
+
+
+class In(Query):
+    def __init__(self,
+                 field: str,
+                 values: Iterable[Any]):
+        self.field = field 
+        self.values = list(values)
+        
+    def to_dict(self) -> dict[str, Any]:
+        if self.field == '_id':
+            return { 'ids': { 'values': self.values } }
+        else:
+            return { 'terms': { self.field: self.values } }
+
+
+class Range(Query):
+    def __init__(self,
+                 field: str,
+                 gt: Any = None,
+                 gte: Any = None,
+                 lt: Any = None,
+                 lte: Any = None):
+        self.field = field 
+        self.bounds = {
+            k: v for k, v in [('gt', gt), ('gte', gte), ('lt', lt), ('lte', lte)] 
+            if v is not None 
+        }
+        
+    def to_dict(self) -> dict[str, Any]:
+        return { 'range': { self.field: self.bounds } }
+
+
+class Exists(Query):
+    def __init__(self,
+                 field: str):
+        self.field = field 
+        
+    def to_dict(self) -> dict[str, Any]:
+        return { 'exists': { 'field': self.field } }
+
+
+class Match(Query):
+    scoring = True 
+    
+    def __init__(self,
+                 field: str,
+                 text: Any):
+        self.field = field 
+        self.text = text 
+        
+    def to_dict(self) -> dict[str, Any]:
+        return { 'match': { self.field: self.text } }
+
+
+class And(Query):
+    def __init__(self, 
+                 *queries: Query):
+        # Flatten nested conjunctions so `a & b & c` compiles into a single bool. 
+        self.queries = [] 
+        
+        for query in queries:
+            if isinstance(query, And):
+                self.queries.extend(query.queries)
+            else:
+                self.queries.append(query)
+        
+    @property
+    def scoring(self) -> bool:
+        return any(query.scoring for query in self.queries)
+    
+    def to_dict(self) -> dict[str, Any]:
+        must = [query.to_dict() for query in self.queries if query.scoring]
+        filter_ = [query.to_dict() for query in self.queries if not query.scoring]
+        bool_ = dict() 
+        
+        if must:
+            bool_['must'] = must 
+        if filter_:
+            bool_['filter'] = filter_ 
+            
+        return { 'bool': bool_ }
+
+
+class Or(Query):
+    def __init__(self, 
+                 *queries: Query):
+        self.queries = [] 
+        
+        for query in queries:
+            if isinstance(query, Or):
+                self.queries.extend(query.queries)
+            else:
+                self.queries.append(query)
+        
+    @property
+    def scoring(self) -> bool:
+        return any(query.scoring for query in self.queries)
+        
+    def to_dict(self) -> dict[str, Any]:
+        return { 
+            'bool': {
+                'should': [query.to_dict() for query in self.queries], 
+                'minimum_should_match': 1, 
+            }
+        }
+
+
+class Not(Query):
+    def __init__(self,
+                 query: Query):
+        self.query = query 
+        
+    def to_dict(self) -> dict[str, Any]:
+        return { 'bool': { 'must_not': [self.query.to_dict()] } }
+
+
+def _compile(query: Union[None, Query, dict[str, Any]]) -> dict[str, Any]:
+    if query is None:
+        return { 'match_all': {} }
+    elif isinstance(query, dict):
+        return query 
+    elif query.scoring:
+        return query.to_dict() 
+    elif isinstance(query, And):
+        return query.to_dict() 
+    else:
+        return { 'bool': { 'filter': [query.to_dict()] } }
+
+
+def build_search_body(query: Union[None, Query, dict[str, Any]] = None,
+                      source: Any = None,
+                      size: Optional[int] = None,
+                      sort: Optional[list[Any]] = None,
+                      track_total_hits: Union[bool, int, None] = False) -> dict[str, Any]:
+    """
+    Build a _search body. `query` is a `Query`, a raw query clause, or None for 
+    match_all. `source` is passed through as `_source`: False, a list of fields, or 
+    a dict with `includes`/`excludes`. 
+    """
+    body = { 'query': _compile(query) }
+    
+    if source is not None:
+        body['_source'] = source 
+    if size is not None:
+        body['size'] = size 
+    if sort is not None:
+        body['sort'] = sort 
+    if track_total_hits is not None:
+        body['track_total_hits'] = track_total_hits 
+        
+    return body 
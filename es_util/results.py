@@ -0,0 +1,139 @@
+from .codec import * 
+from .error import * 
+
+import array 
+import math 
+from typing import Any, Optional, Union 
+from collections.abc import Iterable, Iterator, Sequence 
+
+try:
+    import msgspec 
+except ImportError:
+    msgspec = None 
+
+__all__ = [
+    'COMPACT_FILTER_PATH', 
+    'CompactHits', 
+]
+
+# Only what CompactHits reads is sent back; `took` keeps an empty result from 
+# coming back as `{}`. 
+COMPACT_FILTER_PATH = 'took,hits.hits._id,hits.hits._source,error' 
+
+if msgspec is not None:
+    class _Hits(msgspec.Struct):
+        hits: list[msgspec.Raw] = []
+    
+    class _Response(msgspec.Struct):
+        hits: Optional[_Hits] = None 
+        error: Any = None 
+    
+    class _IdHit(msgspec.Struct):
+        id: Any = msgspec.field(name='_id')
+    
+    _response_decoder = msgspec.json.Decoder(_Response)
+    _hit_decoder = msgspec.json.Decoder() 
+    _id_decoder = msgspec.json.Decoder(_IdHit)
+
+
+def _lookup(entry: dict[str, Any],
+            path: list[str]) -> Any:
+    for key in path:
+        if not isinstance(entry, dict):
+            return None 
+        
+        entry = entry.get(key)
+    
+    return entry 
+
+
+class CompactHits(Sequence):
+    """
+    Search hits kept as raw JSON and decoded one at a time, on indexing or 
+    iteration, into the usual `{**_source, '_id': ...}` dicts. Nothing is cached, 
+    so a hit decoded twice costs twice; call `list()` on it to keep the dicts. 
+    
+    With msgspec installed each hit is a zero-copy slice of the response buffer 
+    and no parse tree is ever built. Otherwise the response is decoded once and 
+    each hit re-encoded to bytes, so the dicts are only alive while that runs. 
+    """
+    
+    def __init__(self,
+                 content: bytes):
+        self.nbytes = len(content)
+        
+        if msgspec is not None:
+            resp = _response_decoder.decode(content)
+            
+            if resp.error is not None:
+                raise UnknownError({ 'error': resp.error })
+            
+            self._hits = resp.hits.hits if resp.hits is not None else []
+        else:
+            resp_json = json_decode(content)
+            
+            if 'error' in resp_json:
+                raise UnknownError(resp_json)
+            
+            self._hits = [json_encode(hit) for hit in resp_json.get('hits', dict()).get('hits', [])]
+    
+    def _decode(self,
+                raw: Any) -> dict[str, Any]:
+        hit = _hit_decoder.decode(raw) if msgspec is not None else json_decode(raw)
+        entry = hit.get('_source') or dict() 
+        entry['_id'] = hit['_id']
+        
+        return entry 
+    
+    def __len__(self) -> int:
+        return len(self._hits)
+    
+    def __getitem__(self,
+                    i: Union[int, slice]) -> Union[dict[str, Any], list[dict[str, Any]]]:
+        if isinstance(i, slice):
+            return [self._decode(raw) for raw in self._hits[i]]
+        
+        return self._decode(self._hits[i])
+    
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for raw in self._hits:
+            yield self._decode(raw)
+    
+    def __repr__(self) -> str:
+        return f"CompactHits({len(self)} hits, {self.nbytes} bytes)" 
+    
+    @property 
+    def ids(self) -> list[Any]:
+        if msgspec is not None:
+            # Decodes `_id` alone; `_source` is skipped without being built. 
+            return [_id_decoder.decode(raw).id for raw in self._hits]
+        
+        return [json_decode(raw)['_id'] for raw in self._hits]
+    
+    def column(self,
+               field: str,
+               typecode: str = 'd', 
+               default: Any = math.nan) -> array.array:
+        """
+        Values of a numeric `field` (dotted for nested objects) as an `array.array` 
+        of `typecode`, with `default` where the field is missing or null. Wrap it 
+        in `numpy.frombuffer` for a zero-copy numpy view. 
+        """
+        return self.columns([field], typecode=typecode, default=default)[field]
+    
+    def columns(self,
+                fields: Iterable[str],
+                typecode: str = 'd', 
+                default: Any = math.nan) -> dict[str, array.array]:
+        """
+        `column` for several fields, decoding each hit only once. 
+        """
+        paths = { field: field.split('.') for field in fields }
+        result = { field: array.array(typecode) for field in paths }
+        
+        for entry in self:
+            for field, path in paths.items():
+                value = _lookup(entry, path)
+                result[field].append(default if value is None else value)
+        
+        return result 
@@ -0,0 +1,553 @@
+from .error import * 
+from .codec import * 
+from .es_type import * 
+
+import datetime 
+import re 
+from typing import Any, Optional, Union 
+from collections.abc import Callable 
+
+__all__ = [
+    'Field', 
+    'Keyword', 
+    'Text', 
+    'KeywordText', 
+    'Long', 
+    'Integer', 
+    'Short', 
+    'Double', 
+    'Float', 
+    'Boolean', 
+    'Date', 
+    'DenseVector', 
+    'Object', 
+    'Nested', 
+    'RawField', 
+    'Schema', 
+    'SchemaEncoder', 
+]
+
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+
+_MISSING = object() 
+
+
+class Field:
+    """
+    Base class of schema field types. Subclasses set `es_type` and override `coerce` 
+    to validate a single value, returning it converted to its JSON form or raising 
+    `ValueError`. Keyword arguments are passed through as mapping parameters 
+    (`index`, `doc_values`, `analyzer`, ...). 
+    
+    Elasticsearch accepts an array wherever it accepts a value, so list values are 
+    checked element by element unless `array_value` is set. 
+    """
+    
+    es_type: Optional[str] = None 
+    array_value = False 
+    
+    def __init__(self,
+                 required: bool = False, 
+                 **options):
+        self.required = required 
+        self.options = options 
+    
+    def mapping(self) -> dict[str, Any]:
+        return { 'type': self.es_type, **self.options }
+    
+    def coerce(self,
+               value: Any) -> Any:
+        return value 
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        # A Python expression that is true when `var` needs no coercion; the compiled 
+        # encoder inlines it and skips `coerce` on the common path. None: always coerce. 
+        return None 
+    
+    def compile(self) -> Callable[[Any, str], Any]:
+        coerce = self.coerce 
+        array_value = self.array_value 
+        
+        def check(value: Any,
+                  path: str) -> Any:
+            if value is None:
+                return None 
+            
+            try:
+                if isinstance(value, list) and not array_value:
+                    return [None if item is None else coerce(item) for item in value]
+                else:
+                    return coerce(value)
+            except (ValueError, TypeError) as e:
+                raise SchemaError(path, str(e)) from None 
+        
+        return check 
+
+
+class Keyword(Field):
+    es_type = 'keyword' 
+    
+    def __init__(self,
+                 ignore_above: Optional[int] = 512, 
+                 required: bool = False, 
+                 **options):
+        if ignore_above is not None:
+            options['ignore_above'] = ignore_above 
+        
+        super().__init__(required=required, **options)
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if isinstance(value, str):
+            return value 
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        else:
+            raise TypeError(f"expected a string, got {type(value).__name__}")
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        return f"type({var}) is str"
+
+
+class Text(Field):
+    es_type = 'text' 
+    
+    def __init__(self,
+                 analyzer: Optional[str] = None, 
+                 search_analyzer: Optional[str] = None, 
+                 required: bool = False, 
+                 **options):
+        if analyzer is not None:
+            options['analyzer'] = analyzer 
+        if search_analyzer is not None:
+            options['search_analyzer'] = search_analyzer 
+        
+        super().__init__(required=required, **options)
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if not isinstance(value, str):
+            raise TypeError(f"expected a string, got {type(value).__name__}")
+        
+        return value 
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        return f"type({var}) is str"
+
+
+class KeywordText(Keyword):
+    """
+    A keyword with a `text` sub-field, as `KEYWORD_TEXT` maps it. 
+    """
+    
+    def __init__(self,
+                 ignore_above: Optional[int] = 512, 
+                 analyzer: Optional[str] = None, 
+                 required: bool = False, 
+                 **options):
+        text = { 'type': 'text' }
+        
+        if analyzer is not None:
+            text['analyzer'] = analyzer 
+        
+        options.setdefault('fields', { 'text': text })
+        
+        super().__init__(ignore_above=ignore_above, required=required, **options)
+
+
+class _Integral(Field):
+    bits = 64 
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if isinstance(value, bool):
+            raise TypeError('expected an integer, got bool')
+        elif isinstance(value, int):
+            pass 
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif isinstance(value, str):
+            value = int(value)
+        else:
+            raise TypeError(f"expected an integer, got {type(value).__name__}")
+        
+        if not -2 ** (self.bits - 1) <= value < 2 ** (self.bits - 1):
+            raise ValueError(f"{value} is out of range for {self.es_type}")
+        
+        return value 
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        return f"(type({var}) is int and {-2 ** (self.bits - 1)} <= {var} < {2 ** (self.bits - 1)})"
+
+
+class Long(_Integral):
+    es_type = 'long' 
+    bits = 64 
+
+
+class Integer(_Integral):
+    es_type = 'integer' 
+    bits = 32 
+
+
+class Short(_Integral):
+    es_type = 'short' 
+    bits = 16 
+
+
+class Double(Field):
+    es_type = 'double' 
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if isinstance(value, bool):
+            raise TypeError('expected a number, got bool')
+        elif isinstance(value, (int, float)):
+            pass 
+        elif isinstance(value, str):
+            value = float(value)
+        else:
+            raise TypeError(f"expected a number, got {type(value).__name__}")
+        
+        if value != value or value in (float('inf'), float('-inf')):
+            raise ValueError(f"{value} is not a finite number")
+        
+        return value 
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        # `x - x` is 0.0 only for finite floats. 
+        return f"(type({var}) is int or (type({var}) is float and {var} - {var} == 0.0))"
+
+
+class Float(Double):
+    es_type = 'float' 
+
+
+class Boolean(Field):
+    es_type = 'boolean' 
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if isinstance(value, bool):
+            return value 
+        elif value in ('true', 'false'):
+            return value == 'true' 
+        else:
+            raise TypeError(f"expected a bool, got {value!r}")
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        return f"type({var}) is bool"
+
+
+class Date(Field):
+    """
+    A date, by default in the repo's `yyyy-MM-dd HH:mm:ss` format: `datetime` and 
+    `date` values are formatted and strings must already match it. With another 
+    `format`, datetimes are sent as ISO 8601 and strings are passed through. 
+    """
+    
+    es_type = 'date' 
+    
+    def __init__(self,
+                 required: bool = False, 
+                 **options):
+        options.setdefault('format', 'yyyy-MM-dd HH:mm:ss')
+        
+        super().__init__(required=required, **options)
+        self.default_format = options['format'] == 'yyyy-MM-dd HH:mm:ss' 
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if isinstance(value, datetime.datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S') if self.default_format else value.isoformat() 
+        elif isinstance(value, datetime.date):
+            return value.strftime('%Y-%m-%d 00:00:00') if self.default_format else value.isoformat() 
+        elif isinstance(value, str) and (not self.default_format or _DATE_RE.fullmatch(value)):
+            return value 
+        else:
+            raise ValueError(f"expected a datetime or 'yyyy-MM-dd HH:mm:ss', got {value!r}")
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        if self.default_format:
+            return f"(type({var}) is str and _DATE_RE.fullmatch({var}) is not None)"
+        else:
+            return f"type({var}) is str"
+
+
+class DenseVector(Field):
+    es_type = 'dense_vector' 
+    array_value = True 
+    
+    def __init__(self,
+                 dims: int,
+                 similarity: str = 'l2_norm', 
+                 index: bool = True, 
+                 quantization: Optional[str] = None, 
+                 required: bool = False):
+        super().__init__(required=required)
+        self.dims = dims 
+        self.similarity = similarity 
+        self.index = index 
+        self.quantization = quantization 
+    
+    def mapping(self) -> dict[str, Any]:
+        return dense_vector(self.dims, similarity=self.similarity, index=self.index, quantization=self.quantization)
+    
+    def coerce(self,
+               value: Any) -> Any:
+        if hasattr(value, 'tolist'):
+            value = value.tolist() 
+        
+        if not isinstance(value, list) or len(value) != self.dims:
+            raise ValueError(f"expected a vector of {self.dims} numbers")
+        if not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in value):
+            raise TypeError('vector elements must be numbers')
+        
+        return value 
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        return f"(type({var}) is list and len({var}) == {self.dims} and all(type(x) is float for x in {var}))"
+
+
+class Object(Field):
+    """
+    An object field with its own `fields`. Unknown sub-fields are rejected unless 
+    `dynamic` is True. 
+    """
+    
+    es_type = 'object' 
+    
+    def __init__(self,
+                 fields: dict[str, Field],
+                 dynamic: Optional[bool] = None, 
+                 required: bool = False, 
+                 **options):
+        super().__init__(required=required, **options)
+        self.fields = fields 
+        self.dynamic = dynamic 
+    
+    def mapping(self) -> dict[str, Any]:
+        mapping = { 'properties': { name: field.mapping() for name, field in self.fields.items() }, **self.options }
+        
+        if self.es_type != 'object':
+            mapping['type'] = self.es_type 
+        if self.dynamic is not None:
+            mapping['dynamic'] = 'true' if self.dynamic else 'strict' 
+        
+        return mapping 
+    
+    def compile(self,
+                dynamic: bool = False) -> Callable[[Any, str, bool], Any]:
+        check_object = _compile_object(self.fields, dynamic if self.dynamic is None else self.dynamic)
+        
+        def check(value: Any,
+                  path: str,
+                  partial: bool = False) -> Any:
+            # A partial update merges into an object but replaces an array whole, so 
+            # array items are checked as complete objects either way. 
+            if value is None:
+                return None 
+            elif isinstance(value, dict):
+                return check_object(value, path + '.', partial)
+            elif isinstance(value, list):
+                items = [None if item is None else check_object(item, f"{path}[{i}].") for i, item in enumerate(value)]
+                
+                # Unchanged items keep the list, and so the document, uncopied. 
+                return value if all(new is old for new, old in zip(items, value)) else items 
+            else:
+                raise SchemaError(path, f"expected an object, got {type(value).__name__}")
+        
+        return check 
+
+
+class Nested(Object):
+    es_type = 'nested' 
+
+
+class RawField(Field):
+    """
+    Any mapping dict, for field types the schema doesn't model; values are not checked. 
+    """
+    
+    def __init__(self,
+                 mapping: dict[str, Any],
+                 required: bool = False):
+        super().__init__(required=required)
+        self.raw_mapping = mapping 
+    
+    def mapping(self) -> dict[str, Any]:
+        return dict(self.raw_mapping)
+    
+    def fast_check(self,
+                   var: str) -> Optional[str]:
+        return 'True'
+
+
+def _compile_object(fields: dict[str, Field],
+                    dynamic: bool,
+                    top_level: bool = False) -> Callable[[dict[str, Any], str, bool], dict[str, Any]]:
+    # Generates one straight-line function per object that looks each schema field 
+    # up once and tests it with the field's inline `fast_check`. Only values failing 
+    # it (coercion, errors) go through the field's general checker, the input dict 
+    # is copied only when a value changes, and unknown keys are searched for only 
+    # when the key count doesn't add up. 
+    namespace = { 'SchemaError': SchemaError, '_DATE_RE': _DATE_RE, 'MISSING': _MISSING, 'known': set(fields) }
+    lines = [
+        'def check(obj, prefix, partial=False):', 
+        '    out = obj', 
+        '    found = 0', 
+    ]
+    
+    for i, (name, field) in enumerate(fields.items()):
+        if isinstance(field, Object):
+            namespace[f"slow_{i}"] = field.compile(dynamic)
+            namespace[f"sub_{i}"] = _compile_object(field.fields, dynamic if field.dynamic is None else field.dynamic)
+            fix = f"new = sub_{i}(value, prefix + {name + '.'!r}, partial) if type(value) is dict else slow_{i}(value, prefix + {name!r}, partial)"
+            fast = None 
+        else:
+            namespace[f"slow_{i}"] = field.compile() 
+            fix = f"new = slow_{i}(value, prefix + {name!r})"
+            fast = field.fast_check('value')
+            
+            if fast is not None and not field.array_value:
+                fast = f"{fast} or (type(value) is list and all({field.fast_check('x')} for x in value))"
+                
+        lines += [
+            f"    value = obj.get({name!r}, MISSING)", 
+            '    if value is not MISSING:', 
+            '        found += 1', 
+            f"        if value is not None{f' and not ({fast})' if fast else ''}:", 
+            f"            {fix}", 
+            '            if new is not value:', 
+            '                if out is obj: out = dict(obj)', 
+            f"                out[{name!r}] = new", 
+        ]
+        
+        if field.required:
+            lines += [f"    elif not partial: raise SchemaError(prefix + {name!r}, 'required field is missing')"]
+            
+    if not dynamic:
+        # A document's own `_id` is metadata, not a field. 
+        if top_level and '_id' not in fields:
+            namespace['known'].add('_id')
+            lines += ["    if '_id' in obj: found += 1"]
+            
+        lines += [
+            '    if found != len(obj):', 
+            '        for key in obj:', 
+            '            if key not in known:', 
+            "                raise SchemaError(prefix + key, 'field is not in the schema')", 
+        ]
+        
+    lines += ['    return out']
+    
+    exec('\n'.join(lines), namespace)
+    
+    return namespace['check']
+
+
+class Schema:
+    """
+    Typed index mapping: `fields` maps names to `Field` objects, `analyzers`, 
+    `tokenizers` and `filters` go to the `analysis` index settings. 
+    """
+    
+    def __init__(self,
+                 fields: dict[str, Field],
+                 dynamic: bool = False, 
+                 analyzers: Optional[dict[str, Any]] = None, 
+                 tokenizers: Optional[dict[str, Any]] = None, 
+                 filters: Optional[dict[str, Any]] = None):
+        self.fields = fields 
+        self.dynamic = dynamic 
+        self.analyzers = analyzers 
+        self.tokenizers = tokenizers 
+        self.filters = filters 
+    
+    @classmethod 
+    def from_mapping(cls,
+                     mapping: dict[str, Union[int, dict[str, Any]]],
+                     dynamic: bool = False) -> 'Schema':
+        """
+        Build a schema from the old `{name: es_type constant or mapping dict}` form. 
+        """
+        return cls({ name: _from_constant(value) for name, value in mapping.items() }, dynamic=dynamic)
+    
+    def mapping(self) -> dict[str, Any]:
+        return {
+            'properties': { name: field.mapping() for name, field in self.fields.items() }, 
+            'dynamic': 'true' if self.dynamic else 'strict', 
+        }
+    
+    def settings(self) -> dict[str, Any]:
+        analysis = dict() 
+        
+        if self.analyzers:
+            analysis['analyzer'] = self.analyzers 
+        if self.tokenizers:
+            analysis['tokenizer'] = self.tokenizers 
+        if self.filters:
+            analysis['filter'] = self.filters 
+        
+        return { 'analysis': analysis } if analysis else dict() 
+    
+    def compile(self) -> 'SchemaEncoder':
+        return SchemaEncoder(self)
+
+
+class SchemaEncoder:
+    """
+    Validating, coercing serializer compiled from a `Schema`. `coerce` returns the 
+    document as it will be sent, and `encode` its JSON bytes; both raise 
+    `SchemaError` before anything reaches the wire. 
+    """
+    
+    def __init__(self,
+                 schema: Schema):
+        self.schema = schema 
+        self._check = _compile_object(schema.fields, schema.dynamic, top_level=True)
+    
+    def coerce(self,
+               document: dict[str, Any],
+               partial: bool = False) -> dict[str, Any]:
+        # `partial` skips the required-field check, for partial updates. The document 
+        # itself is returned when nothing needed coercion. 
+        return self._check(document, '', partial)
+    
+    def encode(self,
+               document: dict[str, Any],
+               partial: bool = False) -> bytes:
+        return json_encode(self._check(document, '', partial))
+
+
+def _from_constant(value: Union[int, dict[str, Any]]) -> Field:
+    if isinstance(value, dict):
+        return RawField(value)
+    elif value == KEYWORD:
+        return Keyword() 
+    elif value == TEXT:
+        return Text() 
+    elif value == LONG:
+        return Long() 
+    elif value == INTEGER:
+        return Integer() 
+    elif value == DOUBLE:
+        return Double() 
+    elif value == KEYWORD_TEXT:
+        return KeywordText() 
+    elif value == BOOLEAN:
+        return Boolean() 
+    elif value == DATE:
+        return Date() 
+    elif value == DENSE_VECTOR_768:
+        return DenseVector(768)
+    else:
+        raise TypeError 
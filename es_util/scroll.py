@@ -0,0 +1,99 @@
+import queue 
+import threading 
+from contextlib import closing 
+from typing import Any, TypeVar 
+from collections.abc import Callable, Iterator 
+
+__all__ = [
+    'iter_parallel', 
+]
+
+T = TypeVar('T')
+
+_DONE = object() 
+
+
+class _Failure:
+    def __init__(self,
+                 exc: BaseException):
+        self.exc = exc 
+
+
+def _put(q: queue.Queue,
+         item: Any,
+         stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            
+            return True 
+        except queue.Full:
+            pass 
+        
+    return False 
+
+
+def iter_parallel(page_iter_factories: list[Callable[[], Iterator[list[T]]]],
+                  ordered: bool = False,
+                  queue_size: int = 8) -> Iterator[T]:
+    """
+    Run each page iterator on its own thread and yield the items of every page. 
+    
+    Pages pass through bounded queues, so producers block once the consumer falls 
+    behind. With `ordered` each producer has its own queue and the producers are 
+    drained one after another; otherwise pages are yielded as soon as they arrive. 
+    Page iterators are closed when the consumer stops early or a producer fails, 
+    which lets them release server-side resources in their `finally` blocks. 
+    """
+    num_producers = len(page_iter_factories)
+    stop = threading.Event() 
+    
+    if ordered:
+        queues = [queue.Queue(queue_size) for _ in range(num_producers)]
+    else:
+        queues = [queue.Queue(queue_size)] * num_producers 
+        
+    def produce(i: int):
+        q = queues[i]
+        
+        try:
+            with closing(page_iter_factories[i]()) as page_iter:
+                for page in page_iter:
+                    if not _put(q, page, stop):
+                        return 
+        except BaseException as e:
+            _put(q, _Failure(e), stop)
+        finally:
+            _put(q, _DONE, stop)
+    
+    threads = [
+        threading.Thread(target=produce, args=(i,), daemon=True)
+        for i in range(num_producers)
+    ]
+    
+    for thread in threads:
+        thread.start() 
+        
+    def drain(q: queue.Queue, 
+              num_done: int) -> Iterator[T]:
+        while num_done > 0:
+            page = q.get() 
+            
+            if page is _DONE:
+                num_done -= 1 
+            elif isinstance(page, _Failure):
+                raise page.exc 
+            else:
+                yield from page 
+        
+    try:
+        if ordered:
+            for q in queues:
+                yield from drain(q, 1)
+        elif num_producers > 0:
+            yield from drain(queues[0], num_producers)
+    finally:
+        stop.set() 
+        
+        for thread in threads:
+            thread.join() 
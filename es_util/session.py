@@ -0,0 +1,76 @@
+import contextlib 
+import threading 
+from collections.abc import Iterator 
+
+import requests 
+from requests.adapters import HTTPAdapter 
+from urllib3.util.retry import Retry 
+
+__all__ = [
+    'create_session', 
+    'idempotent_requests', 
+]
+
+_local = threading.local() 
+
+
+class _Retry(Retry):
+    # Also retries read errors for requests sent inside `idempotent_requests`, such 
+    # as searches sent as POST. 
+    def _is_method_retryable(self,
+                             method: str) -> bool:
+        return getattr(_local, 'idempotent', False) or super()._is_method_retryable(method)
+
+
+@contextlib.contextmanager 
+def idempotent_requests() -> Iterator[None]:
+    """
+    Treat requests sent by this thread inside the block as idempotent whatever 
+    their method, so a session from `create_session` retries their read errors. 
+    """
+    previous = getattr(_local, 'idempotent', False)
+    _local.idempotent = True 
+    
+    try:
+        yield 
+    finally:
+        _local.idempotent = previous 
+
+
+def create_session(pool_connections: int = 10,
+                   pool_maxsize: int = 10,
+                   pool_block: bool = False,
+                   keep_alive: bool = True,
+                   max_retries: int = 3,
+                   retry_backoff: float = 0.1,
+                   retry_non_idempotent: bool = False) -> requests.Session:
+    # Connection errors are always retried: the request never left. Read errors 
+    # (including a pooled keep-alive socket the server closed while idle) are only 
+    # retried for idempotent methods and inside `idempotent_requests`, since a POST 
+    # such as _bulk, an auto-id insert or a scripted update may already have been 
+    # applied; `retry_non_idempotent` retries them for every method. 
+    retry = _Retry(
+        total = max_retries, 
+        connect = max_retries, 
+        read = max_retries, 
+        status = 0, 
+        allowed_methods = None if retry_non_idempotent else Retry.DEFAULT_ALLOWED_METHODS, 
+        backoff_factor = retry_backoff, 
+        raise_on_status = False, 
+    )
+    
+    adapter = HTTPAdapter(
+        pool_connections = pool_connections, 
+        pool_maxsize = pool_maxsize, 
+        pool_block = pool_block, 
+        max_retries = retry, 
+    )
+    
+    session = requests.Session() 
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+        
+    return session 
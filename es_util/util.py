@@ -1,4 +1,5 @@
-import json 
+from .codec import * 
+
 from typing import Any 
 
 __all__ = [
@@ -22,4 +23,4 @@ def explore_dict(dict_: dict[str, Any],
 
 
 def json_dump(obj: Any) -> str:
-    return json.dumps(obj, ensure_ascii=False).strip() 
+    return json_encode(obj).decode('utf-8')
@@ -0,0 +1,136 @@
+from typing import Any, Optional, Union 
+from collections.abc import Callable, Iterable, Iterator 
+
+from .codec import * 
+from .error import * 
+from .bulk import * 
+
+try:
+    import numpy as np 
+except ImportError:
+    np = None 
+
+__all__ = [
+    'as_vector_matrix', 
+    'is_single_vector', 
+    'encode_vector_rows', 
+    'iter_vector_bulk_items', 
+    'vector_to_json', 
+]
+
+
+_END = object() 
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("vector support requires numpy: pip install numpy")
+
+
+def as_vector_matrix(vectors: Any) -> 'np.ndarray':
+    _require_numpy() 
+    
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    elif matrix.ndim != 2:
+        raise ValueError(f"expected a 1-D or 2-D array of vectors, got shape {matrix.shape}")
+    
+    # NaN and infinity are not valid JSON (orjson would silently write null). 
+    if not np.isfinite(matrix).all():
+        raise ValueError('vectors must not contain NaN or infinity')
+    
+    return matrix 
+
+
+def is_single_vector(vectors: Any) -> bool:
+    _require_numpy() 
+    
+    return np.ndim(vectors) == 1 
+
+
+def vector_to_json(vector: 'np.ndarray') -> Any:
+    # orjson serializes numpy arrays natively; other backends need Python floats. 
+    if get_json_backend() == 'orjson':
+        return vector 
+    else:
+        return vector.tolist() 
+
+
+def encode_vector_rows(matrix: 'np.ndarray') -> list[bytes]:
+    """
+    Encode each row of a float32 matrix as a JSON array. orjson encodes the rows 
+    natively; other backends get them through one `tolist()` per chunk, which beats 
+    formatting the elements with numpy. 
+    """
+    if get_json_backend() == 'orjson':
+        return [json_encode(row) for row in matrix]
+    
+    return [json_encode(row) for row in matrix.tolist()]
+
+
+def iter_vector_bulk_items(index_name: str,
+                           type_name: str,
+                           field: str,
+                           vectors: Any,
+                           metadata: Optional[Iterable[dict[str, Any]]] = None,
+                           chunk_size: int = 1024,
+                           coerce: Optional[Callable[[dict[str, Any]], dict[str, Any]]] = None) -> Iterator[Union[bytes, dict[str, Any]]]:
+    """
+    Yield _bulk index items for the rows of `vectors`, each merged into the matching 
+    metadata document. Rows are encoded `chunk_size` at a time and spliced into the 
+    already-encoded metadata, so the vector never becomes a Python list. 
+    
+    `metadata` must have one document per row, or ValueError is raised: up front when 
+    it has a length, otherwise as soon as it runs out or turns out to be longer. A 
+    metadata document that has `field` itself raises ValueError too. 
+    
+    `coerce` is applied to each metadata document first; one that raises SchemaError 
+    is yielded as a `schema_failure` record instead of an item. 
+    """
+    matrix = as_vector_matrix(vectors)
+    
+    if metadata is not None and hasattr(metadata, '__len__') and len(metadata) != len(matrix):
+        raise ValueError(f"got {len(metadata)} metadata documents for {len(matrix)} vectors")
+    
+    metadata_iter = iter(metadata) if metadata is not None else None 
+    field_prefix = b',' + json_encode(field) + b':'
+    
+    for start in range(0, len(matrix), chunk_size):
+        for row in encode_vector_rows(matrix[start: start + chunk_size]):
+            entry = next(metadata_iter, _END) if metadata_iter is not None else dict() 
+            
+            if entry is _END:
+                raise ValueError(f"metadata ran out before the {len(matrix)} vectors did")
+            if field in entry:
+                # The spliced vector would be a second `field` key in `_source`. 
+                raise ValueError(f"metadata document already has the vector field {field!r}")
+            
+            if coerce is not None:
+                try:
+                    entry = coerce(entry)
+                except SchemaError as e:
+                    yield schema_failure(e, entry)
+                    
+                    continue 
+                
+            action = { '_index': index_name }
+            
+            if type_name != '_doc':
+                action['_type'] = type_name 
+            if '_id' in entry:
+                entry = dict(entry)
+                action['_id'] = str(entry.pop('_id'))
+                
+            source = json_encode(entry)
+            
+            if source == b'{}':
+                source = b'{' + field_prefix[1:] + row + b'}'
+            else:
+                source = source[:-1] + field_prefix + row + b'}'
+                
+            yield b''.join([json_encode({ 'index': action }), b'\n', source, b'\n'])
+            
+    if metadata_iter is not None and next(metadata_iter, _END) is not _END:
+        raise ValueError(f"got more metadata documents than the {len(matrix)} vectors")
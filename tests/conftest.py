@@ -0,0 +1,32 @@
+import os 
+import sys 
+
+import pytest 
+
+# Run against the working tree without installing it. 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.fake_es import FakeES 
+
+
+@pytest.fixture 
+def fake_es():
+    with FakeES() as es:
+        yield es 
+
+
+@pytest.fixture 
+def make_fake_es():
+    # Extra stub servers, e.g. to fake the other nodes of a cluster. 
+    servers = []
+    
+    def make(**kwargs) -> FakeES:
+        es = FakeES(**kwargs).start() 
+        servers.append(es)
+        
+        return es 
+    
+    yield make 
+    
+    for es in servers:
+        es.stop() 
@@ -0,0 +1,91 @@
+import pytest 
+
+from es_util import ESClient, Eq, Terms, DateHistogram, Cardinality, Stats, to_columns 
+from es_util.error import IndexNotExistError 
+
+
+@pytest.fixture 
+def index(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([
+        { '_id': i, 'cat': f"c{i % 3}", 'user': f"u{i % 4}", 'n': i, 'time': f"2024-01-0{1 + i // 10} 12:00:00" } 
+        for i in range(30)
+    ])
+    index.refresh() 
+    
+    return index 
+
+
+def test_to_dict():
+    assert Terms('cat', size=5, aggs={ 'users': Cardinality('user') }).to_dict() == {
+        'terms': { 'field': 'cat', 'size': 5, 'min_doc_count': 1 }, 
+        'aggs': { 'users': { 'cardinality': { 'field': 'user' } } }, 
+    }
+    
+    with pytest.raises(ValueError):
+        DateHistogram('time')
+    with pytest.raises(ValueError):
+        DateHistogram('time', calendar_interval='day', fixed_interval='1d')
+
+
+def test_aggregate(index):
+    results = index.aggregate({
+        'cats': Terms('cat'), 
+        'days': DateHistogram('time', calendar_interval='day'), 
+        'users': Cardinality('user'), 
+        'n': Stats('n'), 
+        'raw': { 'cardinality': { 'field': 'cat' } }, 
+    })
+    
+    assert results['cats'] == { 'c0': 10, 'c1': 10, 'c2': 10 }
+    assert results['days'] == { '2024-01-01 00:00:00': 10, '2024-01-02 00:00:00': 10, '2024-01-03 00:00:00': 10 }
+    assert results['users'] == 4 
+    assert results['n'] == { 'count': 30, 'min': 0, 'max': 29, 'avg': 14.5, 'sum': 435 }
+    assert results['raw'] == { 'value': 3 }
+    
+    
+def test_aggregate_with_a_query_and_sub_aggregations(index):
+    results = index.aggregate({ 'cats': Terms('cat', aggs={ 'users': Cardinality('user') }) }, query=Eq('user', 'u0'))
+    
+    assert results['cats'] == { 
+        'c0': { 'doc_count': 3, 'users': 1 }, 
+        'c1': { 'doc_count': 3, 'users': 1 }, 
+        'c2': { 'doc_count': 2, 'users': 1 }, 
+    }
+
+
+def test_columnar(index):
+    results = index.aggregate({ 'cats': Terms('cat', aggs={ 'n': Stats('n') }) }, columnar=True)
+    
+    assert results['cats']['key'] == ['c0', 'c1', 'c2']
+    assert results['cats']['doc_count'] == [10, 10, 10]
+    assert results['cats']['n.min'] == [0, 1, 2]
+    
+    assert to_columns([{ 'a': 1, 'b': { 'c': 2 } }, { 'a': 3 }]) == { 'a': [1, 3], 'b.c': [2, None] }
+
+
+@pytest.mark.parametrize('page_size', [1, 5, 12, 1000])
+def test_iter_composite(index, page_size):
+    rows = list(index.iter_composite({ 'cat': 'cat', 'user': Terms('user') }, page_size=page_size))
+    
+    assert len(rows) == 12 
+    assert rows[0] == { 'cat': 'c0', 'user': 'u0', 'doc_count': 3 }
+    assert sum(row['doc_count'] for row in rows) == 30 
+    assert len({ (row['cat'], row['user']) for row in rows }) == 12 
+    
+    
+def test_iter_composite_columnar(index):
+    pages = list(index.iter_composite(
+        { 'day': DateHistogram('time', calendar_interval='day') }, 
+        aggs = { 'n': Stats('n') }, 
+        page_size = 2, 
+        columnar = True, 
+    ))
+    
+    assert [page['day'] for page in pages] == [['2024-01-01 00:00:00', '2024-01-02 00:00:00'], ['2024-01-03 00:00:00']]
+    assert pages[1]['n.sum'] == [sum(range(20, 30))]
+    
+
+def test_missing_index(fake_es):
+    with pytest.raises(IndexNotExistError):
+        ESClient(fake_es.host, fake_es.port).get_index('missing').aggregate({ 'cats': Terms('cat') })
@@ -0,0 +1,158 @@
+import asyncio 
+
+import pytest 
+
+pytest.importorskip('aiohttp')
+
+from es_util import ESClient, AsyncESClient, Eq 
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture 
+def indices(fake_es):
+    # The same index through both clients, filled through the sync one. 
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': i, 'cat': f"c{i % 3}", 'tag': f"t{i % 2}", 'n': i } for i in range(30)])
+    index.refresh() 
+    
+    return index, AsyncESClient(fake_es.host, fake_es.port)
+
+
+def by_id(entries):
+    return sorted(entries, key=lambda entry: int(entry['_id']))
+
+
+def test_count_and_exists(indices, fake_es):
+    index, client = indices 
+    
+    async def main():
+        async with client:
+            return (
+                await client.get_index('docs').count(),
+                await client.get_index('docs').exists(),
+                await client.get_index('missing').exists(),
+            )
+    
+    assert run(main()) == (index.count(), True, False)
+
+
+def test_document_crud_matches_sync(indices):
+    index, client = indices 
+    
+    async def main():
+        async with client:
+            aindex = client.get_index('docs')
+            new_id = await aindex.insert({ 'cat': 'new' })
+            await aindex.insert({ '_id': 100, 'cat': 'x' })
+            await aindex.update_by_id(100, n=1)
+            doc = await aindex.query_by_id(100)
+            deleted = await aindex.delete_by_id(100)
+            missing = await aindex.query_by_id(100)
+            
+            return new_id, doc, deleted, missing, await aindex.delete_by_id(100)
+    
+    new_id, doc, deleted, missing, deleted_again = run(main())
+    
+    assert index.query_by_id(new_id) == { 'cat': 'new' }
+    assert doc == { 'cat': 'x', 'n': 1 }
+    assert (deleted, missing, deleted_again) == (True, None, False)
+
+
+@pytest.mark.parametrize('method, args', [
+    ('query_id_in_x', ([1, 2, 3],)),
+    ('query_X_eq_x', ('cat', 'c1')),
+    ('query_X_in_x', ('cat', ['c0', 'c2'])),
+    ('query_X_eq_x_and_Y_eq_y', ('cat', 'c1', 'tag', 't0')),
+    ('query_X_eq_x_or_Y_eq_y', ('cat', 'c1', 'tag', 't0')),
+    ('query_X_in_x_or_Y_in_y', ('cat', ['c1'], 'tag', ['t0'])),
+    ('query_X_in_x_and_Y_eq_y', ('cat', ['c1', 'c2'], 'tag', 't1')),
+    ('query_X_in_x_and_Y_in_y', ('cat', ['c1', 'c2'], 'tag', ['t1'])),
+])
+def test_query_methods_match_sync(indices, method, args):
+    index, client = indices 
+    
+    async def main():
+        async with client:
+            aindex = client.get_index('docs')
+            eager = await getattr(aindex, method)(*args)
+            lazy = [entry async for entry in await getattr(aindex, method)(*args, lazy=True)]
+            
+            return eager, lazy 
+    
+    eager, lazy = run(main())
+    expected = by_id(getattr(index, method)(*args))
+    
+    assert expected 
+    assert by_id(eager) == expected 
+    assert by_id(lazy) == expected 
+
+
+def test_search_matches_sync(indices):
+    index, client = indices 
+    
+    async def main():
+        async with client:
+            aindex = client.get_index('docs')
+            
+            return (
+                await aindex.search(Eq('cat', 'c2'), source=['n']),
+                [entry async for entry in await aindex.search(lazy=True, size=5)],
+            )
+    
+    eager, limited = run(main())
+    
+    assert by_id(eager) == by_id(index.search(Eq('cat', 'c2'), source=['n']))
+    assert len(limited) == 5 
+
+
+def test_scroll_matches_sync(indices):
+    index, client = indices 
+    
+    async def main():
+        async with client:
+            return [entry async for entry in client.get_index('docs').scroll(scroll_size=7)]
+    
+    assert by_id(run(main())) == by_id(index.scroll(scroll_size=7))
+
+
+def test_bulk_insert_matches_sync(fake_es):
+    entries = [{ '_id': i, 'n': i } for i in range(2500)]
+    
+    async def main():
+        async with AsyncESClient(fake_es.host, fake_es.port) as client:
+            failed = await client.get_index('small').bulk_insert(entries[:10])
+            stats = await client.get_index('large').parallel_bulk_insert(iter(entries), batch_size=300)
+            
+            return failed, stats 
+    
+    failed, stats = run(main())
+    index = ESClient(fake_es.host, fake_es.port).get_index('large')
+    
+    assert failed == 0 
+    assert (stats.num_docs, stats.num_failed) == (2500, 0)
+    assert stats.num_batches == 9 
+    assert index.count() == 2500 
+    assert index.query_by_id(2499) == { 'n': 2499 }
+
+
+def test_bulk_rejections_go_to_dead_letter(fake_es):
+    fake_es.reject_rate = 1.0 
+    dead = []
+    
+    async def main():
+        async with AsyncESClient(fake_es.host, fake_es.port) as client:
+            return await client.get_index('docs').parallel_bulk_insert(
+                [{ '_id': i } for i in range(5)],
+                max_retries = 1, 
+                retry_backoff = 0.0, 
+                dead_letter = dead.append, 
+            )
+    
+    stats = run(main())
+    
+    assert stats.num_failed == 5 
+    assert sorted(failure['action']['index']['_id'] for failure in dead) == ['0', '1', '2', '3', '4']
+    assert all(failure['status'] == 429 for failure in dead)
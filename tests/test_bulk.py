@@ -0,0 +1,266 @@
+import json 
+import threading 
+import time 
+
+import pytest 
+
+from es_util import ESClient 
+from es_util.bulk import AdaptiveBulkController, bulk_index_item, collapse_updates, iter_bulk_batches, merge_partial_docs, parallel_bulk 
+from es_util.error import BulkError, UnknownError 
+
+
+def test_rejected_items_are_retried(make_fake_es):
+    es = make_fake_es(reject_rate=0.3)
+    index = ESClient(es.host, es.port).get_index('docs')
+    
+    assert index.bulk_insert([{ '_id': i } for i in range(200)], max_retries=20, retry_backoff=0.001) == 0 
+    
+    stats = index.parallel_bulk_insert(({ '_id': i } for i in range(200, 1000)), batch_size=100, max_retries=20, retry_backoff=0.001)
+    index.refresh() 
+    
+    assert stats.num_failed == 0 
+    assert index.count() == 1000 
+
+
+def test_failures_raise_without_a_sink(make_fake_es):
+    es = make_fake_es(reject_rate=1.0)
+    index = ESClient(es.host, es.port).get_index('docs')
+    
+    with pytest.raises(BulkError) as e:
+        index.bulk_insert([{ '_id': 1, 'a': 1 }], max_retries=1, retry_backoff=0.001)
+    
+    assert e.value.failed_items == [{ 
+        'status': 429, 
+        'error': { 'type': 'es_rejected_execution_exception', 'reason': 'rejected execution' }, 
+        'action': { 'index': { '_index': 'docs', '_id': '1' } }, 
+        'source': { 'a': 1 }, 
+    }]
+    
+    # Bulk failures used to raise UnknownError; handlers for it still work. 
+    with pytest.raises(UnknownError):
+        index.parallel_bulk_insert([{ '_id': 1 }], max_retries=0)
+
+
+def test_permanent_failures_are_not_retried(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': 1, 'n': 1 }])
+    failed = [] 
+    
+    stats = index.bulk_update([(1, { 'n': 2 }), (2, { 'n': 2 })], dead_letter=failed.append)
+    
+    assert stats.num_failed == 1 
+    assert [(record['status'], record['action']['update']['_id']) for record in failed] == [(404, '2')]
+
+
+def test_dead_letter_file(make_fake_es, tmp_path):
+    es = make_fake_es(reject_rate=1.0)
+    index = ESClient(es.host, es.port).get_index('docs')
+    path = tmp_path / 'failed.jsonl' 
+    
+    assert index.bulk_insert([{ '_id': i } for i in range(3)], max_retries=0, dead_letter=str(path)) == 3 
+    assert index.bulk_insert([{ '_id': 3 }], max_retries=0, dead_letter=str(path)) == 1 
+    
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    
+    assert [record['action']['index']['_id'] for record in records] == ['0', '1', '2', '3']
+
+
+def test_batches_flush_on_count_or_bytes():
+    items = [b'x' * size for size in (4, 4, 4, 10, 1, 1, 1)]
+    
+    assert [len(batch) for batch in iter_bulk_batches(items, batch_size=3, batch_bytes=None)] == [3, 3, 1]
+    assert [[len(item) for item in batch] for batch in iter_bulk_batches(items, batch_size=100, batch_bytes=10)] == [
+        [4, 4], [4], [10], [1, 1, 1], 
+    ]
+
+
+def test_parallel_bulk_blocks_the_producer():
+    lock = threading.Lock() 
+    produced = 0 
+    sent = 0 
+    ahead = [] 
+    
+    def items():
+        nonlocal produced 
+        
+        for i in range(200):
+            with lock:
+                produced += 1 
+                ahead.append(produced - sent)
+            
+            yield b'%d\n' % i 
+    
+    def send(batch):
+        nonlocal sent 
+        
+        time.sleep(0.005)
+        
+        with lock:
+            sent += len(batch)
+        
+        return 1 
+    
+    stats = parallel_bulk(send, items(), batch_size=10, num_workers=2, max_in_flight=3)
+    
+    assert (stats.num_docs, stats.num_batches, stats.num_failed) == (200, 20, 20)
+    # Never more than the batches in flight plus the one being built. 
+    assert max(ahead) <= 10 * 4 
+
+
+def test_parallel_bulk_stops_on_a_failed_batch():
+    consumed = 0 
+    
+    def items():
+        nonlocal consumed 
+        
+        for i in range(10000):
+            consumed += 1 
+            yield b'x\n' 
+    
+    def send(batch):
+        raise UnknownError({ 'error': 'boom' })
+    
+    with pytest.raises(UnknownError):
+        parallel_bulk(send, items(), batch_size=10, num_workers=2, max_in_flight=2)
+    
+    assert consumed < 10000 
+
+
+def test_bulk_index_item_leaves_the_document_alone():
+    entry = { '_id': 7, 'a': 1 }
+    
+    def lines(item):
+        assert item.endswith(b'\n')
+        
+        return [json.loads(line) for line in item.splitlines()]
+    
+    assert lines(bulk_index_item('docs', '_doc', entry)) == [{ 'index': { '_index': 'docs', '_id': '7' } }, { 'a': 1 }]
+    assert lines(bulk_index_item('docs', 'kind', { 'a': 1 })) == [{ 'index': { '_index': 'docs', '_type': 'kind' } }, { 'a': 1 }]
+    assert entry == { '_id': 7, 'a': 1 }
+
+
+def test_parallel_bulk_insert_streams_a_generator(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    
+    stats = index.parallel_bulk_insert(({ '_id': i, 'n': i } for i in range(5000)), batch_size=300, batch_bytes=4096)
+    index.refresh() 
+    
+    assert (stats.num_docs, stats.num_failed) == (5000, 0)
+    assert stats.num_batches > 5000 // 300 
+    assert index.count() == 5000 
+    assert index.query_by_id(4999) == { 'n': 4999 }
+
+
+def test_controller_converges_around_the_target_latency():
+    # A server whose latency grows linearly with the batch: 1s at 2000 documents. 
+    controller = AdaptiveBulkController(target_latency=1.0, batch_size=100, batch_size_step=100, max_batch_size=100000)
+    sizes = [] 
+    
+    for _ in range(500):
+        controller.observe(controller.batch_size / 2000)
+        sizes.append(controller.batch_size)
+        
+    steady = sizes[100:]
+    
+    assert max(steady) <= 2100 
+    assert min(steady) >= 1000 
+    assert controller.snapshot()['decreases'] > 10 
+
+
+def test_controller_decreases_once_per_epoch():
+    controller = AdaptiveBulkController(batch_size=1000, concurrency=4)
+    epochs = [controller.epoch] * 4 
+    
+    for epoch in epochs:
+        controller.observe(0.1, rejected=True, epoch=epoch)
+        
+    assert (controller.batch_size, controller.concurrency) == (500, 3)
+    assert controller.snapshot()['rejections'] == 4 
+    
+    controller.observe(0.1, rejected=True, epoch=controller.epoch)
+    assert (controller.batch_size, controller.concurrency) == (250, 2)
+
+
+def test_controller_reacts_to_took_spikes_and_grows_concurrency():
+    controller = AdaptiveBulkController(batch_size=1000, concurrency=2, increase_every=2)
+    
+    for _ in range(4):
+        controller.observe(0.1, took=10)
+        
+    assert (controller.batch_size, controller.concurrency) == (2000, 4)
+    
+    controller.observe(0.1, took=100)
+    assert (controller.batch_size, controller.concurrency) == (1000, 3)
+
+
+def test_parallel_bulk_insert_with_a_controller(make_fake_es):
+    es = make_fake_es(reject_rate=0.2)
+    index = ESClient(es.host, es.port).get_index('docs')
+    controller = AdaptiveBulkController(batch_size=200, min_batch_size=10, batch_size_step=50, concurrency=4)
+    
+    stats = index.parallel_bulk_insert(({ '_id': i } for i in range(3000)), max_retries=20, retry_backoff=0.001, controller=controller)
+    index.refresh() 
+    
+    assert stats.num_failed == 0 
+    assert index.count() == 3000 
+    assert controller.snapshot()['rejections'] > 0 
+    assert controller.snapshot()['decreases'] > 0 
+
+
+def test_merge_partial_docs():
+    old = { 'a': 1, 'obj': { 'x': 1, 'y': 1 }, 'tags': ['a', 'b'] }
+    new = { 'b': 2, 'obj': { 'y': 2 }, 'tags': ['c'] }
+    
+    assert merge_partial_docs(old, new) == { 'a': 1, 'b': 2, 'obj': { 'x': 1, 'y': 2 }, 'tags': ['c'] }
+    assert old == { 'a': 1, 'obj': { 'x': 1, 'y': 1 }, 'tags': ['a', 'b'] }
+    
+    
+def test_collapse_updates():
+    updates = [
+        (1, { 'a': 1 }), 
+        (2, { 'a': 1 }), 
+        (1, { 'b': 2 }), 
+        (2, 'ctx._source.n += 1'), 
+        (2, { 'a': 2 }), 
+        (1, { 'a': 3 }), 
+    ]
+    
+    assert list(collapse_updates(updates, window=100)) == [
+        (1, { 'a': 3, 'b': 2 }), 
+        (2, { 'a': 1 }), 
+        (2, 'ctx._source.n += 1'), 
+        (2, { 'a': 2 }), 
+    ]
+    # Updates are only merged within a window. 
+    assert list(collapse_updates(updates[:3], window=2)) == updates[:3]
+    
+
+def test_bulk_update(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': i, 'n': i, 'obj': { 'x': i } } for i in range(3)])
+    
+    stats = index.bulk_update([
+        (0, { 'obj': { 'y': 1 } }), 
+        (0, { 'tag': 'a' }), 
+        (1, 'ctx._source.n += params.step', { 'step': 10 }), 
+        (2, 'ctx._source.n = 7'), 
+    ], num_workers=1)
+    
+    assert (stats.num_docs, stats.num_failed) == (3, 0)
+    assert index.query_by_id(0) == { 'n': 0, 'obj': { 'x': 0, 'y': 1 }, 'tag': 'a' }
+    assert index.query_by_id(1) == { 'n': 11, 'obj': { 'x': 1 } }
+    assert index.query_by_id(2) == { 'n': 7, 'obj': { 'x': 2 } }
+
+
+def test_bulk_update_missing_documents(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    failed = [] 
+    
+    index.bulk_update([(5, { 'a': 1 })], dead_letter=failed.append)
+    
+    assert failed[0]['error']['type'] == 'document_missing_exception'
+    
+    index.bulk_update([(5, { 'a': 1 }), (6, 'ctx._source.n += 1')], doc_as_upsert=True)
+    
+    assert index.query_by_id(5) == { 'a': 1 }
+    assert index.query_by_id(6) == { 'n': 1 }
@@ -0,0 +1,71 @@
+import time 
+
+from es_util import ESClient 
+from es_util.cache import DocumentCache, MISSING 
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = DocumentCache(max_size=2)
+    cache.put(1, { 'n': 1 })
+    cache.put(2, { 'n': 2 })
+    cache.get(1)
+    cache.put(3, { 'n': 3 })
+    
+    assert cache.get(2) is MISSING 
+    assert cache.get(1) == { 'n': 1 }
+    assert cache.stats()['evictions'] == 1 
+
+
+def test_entries_expire():
+    cache = DocumentCache(ttl=0.05)
+    cache.put(1, None)
+    
+    # A cached None means the document is known not to exist. 
+    assert cache.get(1) is None 
+    
+    time.sleep(0.1)
+    
+    assert cache.get(1) is MISSING 
+    assert cache.stats()['expirations'] == 1 
+
+
+def test_callers_get_copies():
+    cache = DocumentCache() 
+    doc = { 'n': 1 }
+    cache.put('1', doc)
+    doc['n'] = 2 
+    cache.get(1)['n'] = 3 
+    
+    assert cache.get(1) == { 'n': 1 }
+
+
+def test_index_reads_through_and_invalidates_on_writes(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    other = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.enable_cache() 
+    index.insert({ '_id': 1, 'n': 1 })
+    other.insert({ '_id': 2, 'n': 2 })
+    
+    assert index.query_by_id(2) == { 'n': 2 }
+    assert index.query_by_id(3) is None 
+    
+    # Writes made through another client are not seen while the entries live. 
+    other.update_by_id(2, n=20)
+    other.insert({ '_id': 3, 'n': 3 })
+    
+    assert index.get_many([1, 2, 3]) == [{ 'n': 1 }, { 'n': 2 }, None]
+    
+    # Writes through the index itself invalidate its entries. 
+    index.update_by_id(2, n=21)
+    index.delete_by_id(1)
+    
+    assert index.get_many([1, 2]) == [None, { 'n': 21 }]
+    
+    index.bulk_insert([{ '_id': 3, 'n': 30 }])
+    
+    assert index.query_by_id(3) == { 'n': 30 }
+    assert index.cache.stats()['hits'] > 0 
+    
+    index.disable_cache() 
+    
+    assert index.query_by_id(2) == { 'n': 21 }
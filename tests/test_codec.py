@@ -0,0 +1,55 @@
+import json 
+
+import pytest 
+
+from es_util import ESClient 
+from es_util.codec import json_encode, json_decode, get_json_backend, set_json_backend 
+
+BACKENDS = ['json', 'orjson', 'msgspec']
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param != 'json':
+        pytest.importorskip(request.param)
+        
+    previous = get_json_backend() 
+    set_json_backend(request.param)
+    
+    yield request.param 
+    
+    set_json_backend(previous)
+
+
+DOCUMENT = { 'name': 'naïve ☃', 'n': 1, 'x': 1.5, 'ok': True, 'none': None, 'list': [1, 'a', { 'b': [] }] }
+
+
+def test_backends_agree_with_the_stdlib(backend):
+    encoded = json_encode(DOCUMENT)
+    
+    assert get_json_backend() == backend 
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == DOCUMENT 
+    assert json_decode(encoded) == DOCUMENT 
+    assert json_decode(encoded.decode('utf-8')) == DOCUMENT 
+    # Compact and not ASCII-escaped, so bulk bodies stay small. 
+    assert b' ' not in json_encode({ 'a': [1, 2] })
+    assert '☃'.encode('utf-8') in encoded 
+
+
+def test_int_keys_encode_as_strings(backend):
+    assert json_decode(json_encode({ 1: 'a' })) == { '1': 'a' }
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        set_json_backend('yaml')
+
+
+def test_index_round_trip(backend, fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': 1, **DOCUMENT }])
+    index.refresh() 
+    
+    assert index.query_by_id(1) == DOCUMENT 
+    assert index.search()[0] == { '_id': '1', **DOCUMENT }
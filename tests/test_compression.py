@@ -0,0 +1,85 @@
+import asyncio 
+
+import pytest 
+
+from es_util import ESClient 
+from es_util.compression import BodyCompressor, compress, decompress 
+
+
+def docs(num_docs: int = 500):
+    return [{ '_id': i, 'text': 'the quick brown fox jumps over the lazy dog', 'n': i } for i in range(num_docs)]
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'deflate', 'zstd'])
+def test_round_trip(encoding):
+    if encoding == 'zstd':
+        pytest.importorskip('zstandard')
+        
+    data = b'{"index": {}}\n' * 1000 
+    
+    assert len(compress(data, encoding)) < len(data)
+    assert decompress(compress(data, encoding), encoding) == data 
+    
+    
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        BodyCompressor('brotli')
+    with pytest.raises(ValueError):
+        compress(b'', 'brotli')
+        
+        
+def test_small_bodies_are_sent_as_they_are():
+    compressor = BodyCompressor(min_size=100)
+    
+    assert not compressor.should_compress(b'x' * 99)
+    assert compressor.should_compress(b'x' * 100)
+    assert not compressor.should_compress(None)
+
+
+def test_compressed_requests(fake_es):
+    plain = ESClient(fake_es.host, fake_es.port).get_index('plain')
+    plain.bulk_insert(docs())
+    plain_bytes = fake_es.bytes_in 
+    
+    index = ESClient(fake_es.host, fake_es.port, compression='gzip').get_index('docs')
+    index.bulk_insert(docs())
+    index.refresh() 
+    
+    assert fake_es.bytes_in - plain_bytes < plain_bytes / 5 
+    assert index.count() == 500 
+    assert index.query_by_id(7) == { 'text': 'the quick brown fox jumps over the lazy dog', 'n': 7 }
+
+
+@pytest.mark.parametrize('http_compression', [False, True])
+def test_compressed_responses(make_fake_es, http_compression):
+    es = make_fake_es(http_compression=http_compression)
+    index = ESClient(es.host, es.port).get_index('docs')
+    index.bulk_insert(docs())
+    index.refresh() 
+    
+    before = es.bytes_out 
+    entries = index.search(None, size=500)
+    response_bytes = es.bytes_out - before 
+    
+    assert len(entries) == 500 
+    assert (response_bytes < 10000) == http_compression 
+    
+
+def test_async_compression(make_fake_es):
+    pytest.importorskip('aiohttp')
+    from es_util import AsyncESClient 
+    
+    es = make_fake_es(http_compression=True)
+    
+    async def main():
+        async with AsyncESClient(es.host, es.port, compression='gzip') as client:
+            index = client.get_index('docs')
+            await index.bulk_insert(docs())
+            await index.flush() 
+            
+            return await index.count(), await index.search(None, size=500)
+        
+    count, entries = asyncio.run(main())
+    
+    assert count == 500 and len(entries) == 500 
+    assert es.bytes_in < 10000 and es.bytes_out < 10000 
@@ -0,0 +1,139 @@
+import csv 
+import json 
+
+import pytest 
+
+from es_util import ESClient 
+from es_util.file_io import ExportWriter, iter_import_items 
+
+DOCS = [
+    { '_id': '1', 'name': 'a', 'n': 1, 'tags': ['x', 'y'] }, 
+    { '_id': '2', 'name': 'b', 'n': 2, 'extra': 'late' }, 
+    { '_id': '3', 'name': 'c', 'n': 3, 'obj': { 'k': 1 } }, 
+]
+
+
+@pytest.fixture 
+def index(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert(DOCS)
+    index.refresh() 
+    
+    return index 
+
+
+def by_id(entries):
+    return sorted(entries, key=lambda entry: entry['_id'])
+
+
+def imported(index, path, **kwargs):
+    target = ESClient(index.host, index.port).get_index('copy')
+    target.import_file(path, id_field='_id', **kwargs)
+    target.refresh() 
+    
+    return by_id({ **doc, '_id': doc['_id'] } for doc in target.scroll())
+
+
+@pytest.mark.parametrize('name', ['docs.ndjson', 'docs.jsonl.gz', 'docs.ndjson.bz2', 'docs.ndjson.xz'])
+def test_ndjson_round_trip(index, tmp_path, name):
+    path = str(tmp_path / name)
+    
+    assert index.export_file(path) == 3 
+    assert imported(index, path) == by_id(DOCS)
+
+
+def test_csv_keeps_fields_missing_from_the_first_document(index, tmp_path):
+    path = str(tmp_path / 'docs.csv')
+    index.export_file(path)
+    
+    with open(path, newline='', encoding='utf-8') as fp:
+        rows = by_id(csv.DictReader(fp))
+    
+    assert set(rows[0]) == { '_id', 'name', 'n', 'tags', 'extra', 'obj' }
+    assert rows[1]['extra'] == 'late' 
+    assert json.loads(rows[2]['obj']) == { 'k': 1 }
+    
+    converters = { 'n': int, 'tags': json.loads, 'obj': json.loads }
+    
+    assert imported(index, path, converters=converters) == by_id(DOCS)
+
+
+def test_csv_columns_stream_and_reject_unknown_fields(tmp_path):
+    path = str(tmp_path / 'docs.csv')
+    
+    with ExportWriter(path, columns=['_id', 'name']) as writer:
+        writer.write({ '_id': '1', 'name': 'a' })
+        
+        with pytest.raises(ValueError, match='n'):
+            writer.write({ '_id': '2', 'name': 'b', 'n': 2 })
+    
+    with open(path, newline='', encoding='utf-8') as fp:
+        assert list(csv.DictReader(fp)) == [{ '_id': '1', 'name': 'a' }]
+
+
+def test_empty_csv_export_has_a_header(tmp_path):
+    path = str(tmp_path / 'docs.csv')
+    
+    with ExportWriter(path, columns=['_id', 'name']):
+        pass 
+    
+    with open(path, encoding='utf-8') as fp:
+        assert fp.read().strip() == '_id,name' 
+
+
+def test_parquet_round_trip(index, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'docs.parquet')
+    
+    source = ESClient(index.host, index.port).get_index('uniform')
+    docs = [{ '_id': str(i), 'name': f"n{i}", 'n': i, 'tags': ['a', 'b'] } for i in range(5)]
+    source.bulk_insert(docs)
+    source.refresh() 
+    
+    assert source.export_file(path, batch_size=2) == 5 
+    assert imported(source, path) == docs 
+
+
+def test_parquet_export(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'docs.parquet')
+    docs = [{ '_id': str(i), 'n': i, 'tags': ['a'] } for i in range(5)]
+    
+    with ExportWriter(path, batch_size=2) as writer:
+        writer.write_many(docs)
+    
+    assert pq.read_table(path).to_pylist() == docs 
+    assert [json.loads(item.split(b'\n')[1]) for item in iter_import_items(path, 'copy', chunk_size=2)] == [
+        { 'n': i, 'tags': ['a'] } for i in range(5)
+    ]
+
+
+def test_parquet_rejects_fields_after_the_first_row_group(tmp_path):
+    pytest.importorskip('pyarrow')
+    
+    with pytest.raises(ValueError, match='extra'):
+        with ExportWriter(str(tmp_path / 'docs.parquet'), batch_size=1) as writer:
+            writer.write({ '_id': '1', 'n': 1 })
+            writer.write({ '_id': '2', 'n': 2, 'extra': 'x' })
+
+
+def test_parquet_columns_fix_the_schema(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'docs.parquet')
+    
+    with ExportWriter(path, columns=['_id', 'n', 'extra'], batch_size=1) as writer:
+        writer.write({ '_id': '1', 'n': 1 })
+    
+    assert pq.read_table(path).to_pylist() == [{ '_id': '1', 'n': 1, 'extra': None }]
+
+
+def test_empty_parquet_export_writes_the_schema(index, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'empty.parquet')
+    
+    assert index.export_file(path, query={ 'term': { 'name': 'none' } }, columns=['_id', 'name']) == 0 
+    
+    table = pq.read_table(path)
+    
+    assert table.num_rows == 0 
+    assert table.column_names == ['_id', 'name']
@@ -0,0 +1,52 @@
+import pytest 
+
+from es_util import ESClient, ESType, Eq 
+
+
+def test_by_query_clears_cache_once_task_finishes(fake_es, monkeypatch):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.enable_cache() 
+    index.bulk_insert([{ '_id': i, 'n': i } for i in range(10)])
+    index.refresh() 
+    wait_for_task = index.wait_for_task 
+    
+    def wait_with_lookup(task_id, **kwargs):
+        # A lookup made while the task runs caches a document it then deletes. 
+        index.cache.put('1', { 'n': 1 })
+        
+        return wait_for_task(task_id, **kwargs)
+    
+    monkeypatch.setattr(index, 'wait_for_task', wait_with_lookup)
+    index.delete_by_query(Eq('n', 1), use_tqdm=False)
+    
+    assert index.query_by_id('1') is None 
+    assert index.count() == 9 
+
+
+def test_bulk_load_mode_restores_settings(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.create_mapping({ 'n': ESType.INTEGER })
+    index.put_settings({ 'index.refresh_interval': '5s' })
+    
+    with index.bulk_load_mode(extra_settings={ 'index.translog.durability': 'async' }, force_merge=1):
+        assert index.get_settings() == { 
+            'index.refresh_interval': '-1', 
+            'index.number_of_replicas': '0', 
+            'index.translog.durability': 'async', 
+        }
+        index.bulk_insert([{ '_id': i } for i in range(10)])
+        
+    # Settings that were at their defaults are reset rather than pinned. 
+    assert index.get_settings() == { 'index.refresh_interval': '5s' }
+    assert index.count() == 10 
+
+
+def test_bulk_load_mode_restores_settings_on_error(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.create_mapping({ 'n': ESType.INTEGER })
+    
+    with pytest.raises(RuntimeError):
+        with index.bulk_load_mode():
+            raise RuntimeError 
+        
+    assert index.get_settings() == dict() 
@@ -0,0 +1,98 @@
+import pytest 
+import requests 
+
+from es_util import ESClient 
+from es_util.instrument import Instrumentation, HistogramCollector, RequestEvent, operation_name, parse_took 
+
+
+class Recorder(Instrumentation):
+    def __init__(self):
+        self.before = [] 
+        self.after = [] 
+        
+    def before_request(self, event: RequestEvent):
+        self.before.append(event)
+        
+    def after_request(self, event: RequestEvent):
+        self.after.append(event)
+
+
+@pytest.mark.parametrize('path, operation', [
+    ('docs/_search?size=10', '_search'), 
+    ('_search/scroll', '_search/scroll'), 
+    ('docs/_bulk', '_bulk'), 
+    ('docs/_doc/1', '_doc'), 
+    ('docs', 'index'), 
+    ('', 'root'), 
+])
+def test_operation_name(path, operation):
+    assert operation_name(path) == operation 
+    
+
+def test_parse_took():
+    assert parse_took(b'{"took": 12, "hits": {}}') == 12 
+    assert parse_took(b'{"acknowledged": true}') is None 
+
+
+def test_hooks_see_every_request(fake_es):
+    recorder = Recorder() 
+    client = ESClient(fake_es.host, fake_es.port, hooks=[recorder])
+    index = client.get_index('docs')
+    index.bulk_insert([{ '_id': i, 'n': i } for i in range(10)])
+    index.refresh() 
+    index.search(None)
+    
+    assert recorder.before == recorder.after 
+    
+    bulk, = [event for event in recorder.after if event.operation == '_bulk']
+    assert bulk.method == 'POST' and bulk.status == 200 and bulk.took == 1 
+    assert bulk.request_bytes > 0 and bulk.response_bytes > 0 
+    assert bulk.node == f"http://{fake_es.host}:{fake_es.port}"
+    assert any(event.operation == '_search' for event in recorder.after)
+    
+    client.remove_hook(recorder)
+    index.count() 
+    assert len(recorder.after) == len(recorder.before)
+    
+    
+def test_hook_sees_errors():
+    recorder = Recorder() 
+    client = ESClient('127.0.0.1', 1, hooks=[recorder], max_retries=0)
+    
+    with pytest.raises(requests.RequestException):
+        client.get_index('docs').count() 
+        
+    assert recorder.after and recorder.after[-1].error is not None 
+    
+    
+def test_histogram_collector(fake_es):
+    collector = HistogramCollector() 
+    client = ESClient(fake_es.host, fake_es.port)
+    client.add_hook(collector)
+    index = client.get_index('docs')
+    
+    for i in range(20):
+        index.bulk_insert([{ '_id': i, 'n': i }])
+    
+    summary = collector.summary()['POST _bulk']
+    assert summary['count'] == 20 
+    assert summary['mean_took_ms'] == 1 
+    assert summary['errors'] == 0 
+    assert summary['request_bytes'] > 0 and summary['response_bytes'] > 0 
+    assert 0 < summary['p50_ms'] <= summary['p90_ms'] <= summary['p99_ms'] <= summary['max_ms']
+    assert collector.quantile('POST _bulk', 1.0) == summary['max_ms'] / 1000 
+    
+    collector.reset() 
+    assert collector.summary() == dict() 
+
+
+def test_histogram_quantile_buckets():
+    collector = HistogramCollector() 
+    
+    for wall_time in [0.001] * 90 + [0.5] * 10:
+        event = RequestEvent('GET', 'docs/_search')
+        event.wall_time = wall_time 
+        collector.after_request(event)
+        
+    assert collector.quantile('GET _search', 0.5) == pytest.approx(0.001, rel=0.2)
+    assert collector.quantile('GET _search', 0.99) == pytest.approx(0.5, rel=0.2)
@@ -0,0 +1,87 @@
+import threading 
+from concurrent.futures import ThreadPoolExecutor 
+
+import pytest 
+
+from es_util import ESClient 
+from es_util.mget import MGetCoalescer 
+
+
+@pytest.fixture 
+def index(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': i, 'n': i } for i in range(100)])
+    index.refresh() 
+    
+    return index 
+
+
+def test_get_many_keeps_order_and_missing_ids(index):
+    ids = [5, 'missing', 99, 5, 0]
+    
+    assert index.get_many(ids) == [{ 'n': 5 }, None, { 'n': 99 }, { 'n': 5 }, { 'n': 0 }]
+    assert index.get_many(range(100), chunk_size=7, num_workers=3) == [{ 'n': i } for i in range(100)]
+    assert index.get_many([]) == []
+
+
+def test_coalescer_merges_concurrent_lookups():
+    calls = [] 
+    barrier = threading.Barrier(20)
+    
+    def fetch(ids):
+        calls.append(list(ids))
+        
+        return [f"doc {id}" for id in ids]
+    
+    coalescer = MGetCoalescer(fetch, window=0.2, max_batch=10)
+    
+    def get(id):
+        barrier.wait() 
+        
+        return coalescer.get(id)
+    
+    with ThreadPoolExecutor(20) as executor:
+        results = list(executor.map(get, range(20)))
+    
+    assert results == [f"doc {i}" for i in range(20)]
+    assert len(calls) < 20 
+    assert all(len(ids) <= 10 for ids in calls)
+    assert sorted(id for ids in calls for id in ids) == list(range(20))
+
+
+def test_coalescer_hands_the_error_to_every_caller():
+    def fetch(ids):
+        raise RuntimeError('mget failed')
+    
+    coalescer = MGetCoalescer(fetch, window=0.1)
+    
+    with ThreadPoolExecutor(5) as executor:
+        futures = [executor.submit(coalescer.get, i) for i in range(5)]
+    
+    for future in futures:
+        with pytest.raises(RuntimeError, match='mget failed'):
+            future.result() 
+
+
+def test_coalesced_query_by_id(index):
+    index.enable_coalescing(window=0.05)
+    fetched = [] 
+    mget = index._mget 
+    
+    def counting_mget(ids):
+        fetched.append(len(ids))
+        
+        return mget(ids)
+    
+    index.coalescer.fetch = counting_mget 
+    
+    with ThreadPoolExecutor(10) as executor:
+        results = list(executor.map(index.query_by_id, range(50)))
+    
+    assert results == [{ 'n': i } for i in range(50)]
+    assert sum(fetched) == 50 
+    assert len(fetched) < 50 
+    
+    index.disable_coalescing() 
+    
+    assert index.query_by_id('missing') is None 
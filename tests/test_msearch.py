@@ -0,0 +1,35 @@
+import pytest 
+
+from es_util import ESClient, Eq 
+from es_util.error import IndexNotExistError, UnknownError 
+
+
+@pytest.fixture 
+def index(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': i, 'n': i, 'cat': f"c{i % 5}" } for i in range(50)])
+    index.refresh() 
+    
+    return index 
+
+
+@pytest.mark.parametrize('max_searches, num_workers', [(100, 1), (3, 1), (3, 4)])
+def test_results_come_back_in_query_order(index, max_searches, num_workers):
+    queries = [Eq('cat', f"c{i % 5}") for i in range(17)] + [None]
+    results = index.multi_search(queries, source=['n'], size=20, max_searches=max_searches, num_workers=num_workers)
+    
+    assert [sorted(entry['n'] % 5 for entry in hits) for hits in results[:17]] == [[i % 5] * 10 for i in range(17)]
+    assert len(results[17]) == 20 
+
+
+def test_a_failed_query_is_returned_as_its_error(index):
+    results = index.multi_search([Eq('cat', 'c1'), { 'fuzzy': { 'cat': 'c' } }, Eq('cat', 'c2')])
+    
+    assert len(results[0]) == 10 and len(results[2]) == 10 
+    assert isinstance(results[1], UnknownError)
+
+
+def test_missing_index(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('missing')
+    
+    assert all(isinstance(result, IndexNotExistError) for result in index.multi_search([None, None]))
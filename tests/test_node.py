@@ -0,0 +1,211 @@
+import asyncio 
+import time 
+
+import pytest 
+import requests 
+
+from es_util import ESClient, AsyncESClient, Eq, Terms 
+from es_util.node import NodePool, parse_node, sniffed_urls 
+from es_util.session import create_session, idempotent_requests 
+
+# Nothing listens on port 1, so connecting fails straight away. 
+DEAD_NODE = '127.0.0.1:1' 
+
+
+def test_parse_node():
+    assert parse_node('es1') == 'http://es1:9200' 
+    assert parse_node('es1:9201', scheme='https') == 'https://es1:9201' 
+    assert parse_node('https://es1') == 'https://es1:9200' 
+    assert parse_node('[::1]', default_port=9300) == 'http://[::1]:9300' 
+
+
+def test_sniffed_urls_keeps_data_nodes_and_prefers_hostnames():
+    resp_json = { 'nodes': {
+        'a': { 'roles': ['data'], 'http': { 'publish_address': 'es1/10.0.0.1:9200' } }, 
+        'b': { 'roles': ['master'], 'http': { 'publish_address': '10.0.0.2:9200' } }, 
+        'c': { 'roles': ['data_hot'], 'http': { 'publish_address': '10.0.0.3:9201' } }, 
+    } }
+    
+    assert sniffed_urls(resp_json) == ['http://es1:9200', 'http://10.0.0.3:9201']
+
+
+def test_dead_node_backs_off_exponentially():
+    pool = NodePool(['http://a:1', 'http://b:1'], dead_timeout=1.0)
+    node = pool.nodes[0]
+    
+    pool.select() 
+    pool.release(node, failed=True)
+    first = node.dead_until - time.monotonic() 
+    
+    pool.select() 
+    pool.release(node, failed=True)
+    second = node.dead_until - time.monotonic() 
+    
+    assert 0.5 < first <= 1.0 
+    assert 1.5 < second <= 2.0 
+    assert all(pool.select() is pool.nodes[1] for _ in range(4))
+
+
+def test_failover_on_connection_error(fake_es):
+    client = ESClient([DEAD_NODE, f"{fake_es.host}:{fake_es.port}"])
+    index = client.get_index('docs')
+    index.insert({ '_id': 1, 'a': 1 })
+    
+    for _ in range(4):
+        assert index.query_by_id(1) == { 'a': 1 }
+    
+    assert client.nodes.nodes[0].failures == 1 
+
+
+def test_failover_on_gateway_status(fake_es, make_fake_es):
+    failing = make_fake_es(failure_rate=1.0)
+    client = ESClient([f"{failing.host}:{failing.port}", f"{fake_es.host}:{fake_es.port}"])
+    
+    client.test_connection() 
+    client.test_connection() 
+    
+    assert client.nodes.nodes[0].failures == 1 
+
+
+def test_failover_on_timeout(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    client = ESClient([f"{hanging.host}:{hanging.port}", f"{fake_es.host}:{fake_es.port}"], timeout=0.2, max_retries=0)
+    
+    start = time.perf_counter() 
+    assert client.get_index('docs').exists() is False 
+    assert time.perf_counter() - start < 2.0 
+    assert client.nodes.nodes[0].dead_until > time.monotonic() 
+
+
+def test_sniff_replaces_nodes(fake_es, make_fake_es):
+    peer = make_fake_es() 
+    fake_es.peers = [f"{peer.host}:{peer.port}"]
+    
+    client = ESClient(f"{fake_es.host}:{fake_es.port}", sniff_on_start=True)
+    client.get_index('docs').exists() 
+    
+    assert client.nodes.urls == [f"http://{fake_es.host}:{fake_es.port}", f"http://{peer.host}:{peer.port}"]
+
+
+def test_async_failover_on_timeout(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    
+    async def main():
+        async with AsyncESClient([f"{hanging.host}:{hanging.port}", f"{fake_es.host}:{fake_es.port}"], timeout=0.2) as client:
+            await client.test_connection() 
+            
+            return client.nodes.nodes[0].failures 
+    
+    start = time.perf_counter() 
+    assert asyncio.run(main()) == 1 
+    assert time.perf_counter() - start < 2.0 
+
+
+def test_post_fails_over_only_before_reaching_a_node(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    good = f"{fake_es.host}:{fake_es.port}" 
+    
+    # A refused connection never reached the node, so an auto-id insert moves on. 
+    index = ESClient([DEAD_NODE, good]).get_index('docs')
+    assert index.insert({ 'a': 1 })
+    
+    # A timed-out POST may have been applied, so it is neither retried nor sent elsewhere. 
+    index = ESClient([f"{hanging.host}:{hanging.port}", good], timeout=0.2).get_index('docs')
+    start = time.perf_counter() 
+    
+    with pytest.raises(requests.ReadTimeout):
+        index.insert({ 'a': 2 })
+    
+    assert time.perf_counter() - start < 1.0 
+    assert index.count() == 1 
+
+
+def test_post_failover_can_be_opted_into(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    client = ESClient([f"{hanging.host}:{hanging.port}", f"{fake_es.host}:{fake_es.port}"], timeout=0.2, max_retries=0, retry_non_idempotent=True)
+    
+    assert client.get_index('docs').insert({ 'a': 1 })
+
+
+def test_async_post_is_not_sent_twice(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    
+    async def main():
+        async with AsyncESClient([f"{hanging.host}:{hanging.port}", f"{fake_es.host}:{fake_es.port}"], timeout=0.2) as client:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.get_index('docs').insert({ 'a': 1 })
+    
+    asyncio.run(main())
+
+
+def test_session_retries_read_errors_only_for_idempotent_requests():
+    retry = create_session().get_adapter('http://es1:9200').max_retries 
+    
+    assert retry._is_method_retryable('GET')
+    assert not retry._is_method_retryable('POST')
+    
+    with idempotent_requests():
+        assert retry.new()._is_method_retryable('POST')
+    
+    assert not retry._is_method_retryable('POST')
+
+
+def test_read_only_posts_fail_over(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    good = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    good.bulk_insert([{ '_id': i, 'cat': f"c{i % 2}" } for i in range(10)])
+    good.refresh() 
+    
+    index = ESClient([f"{hanging.host}:{hanging.port}", f"{fake_es.host}:{fake_es.port}"], timeout=0.2, max_retries=0).get_index('docs')
+    
+    # Each call starts on the hanging node at least once across the round robin. 
+    for _ in range(2):
+        assert [doc['cat'] for doc in index.get_many([0, 1])] == ['c0', 'c1']
+        assert index.aggregate({ 'cats': Terms('cat') })['cats'] == { 'c0': 5, 'c1': 5 }
+        assert [len(hits) for hits in index.multi_search([Eq('cat', 'c0'), Eq('cat', 'c1')])] == [5, 5]
+        assert len(list(index.search(Eq('cat', 'c0'), lazy=True))) == 5 
+        assert len(list(index.scroll(scroll_size=3))) == 10 
+
+
+def test_async_read_only_posts_fail_over(fake_es, make_fake_es):
+    hanging = make_fake_es(latency=5.0)
+    good = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    good.bulk_insert([{ '_id': i, 'cat': f"c{i % 2}" } for i in range(10)])
+    good.refresh() 
+    
+    async def main():
+        async with AsyncESClient([f"{hanging.host}:{hanging.port}", f"{fake_es.host}:{fake_es.port}"], timeout=0.2) as client:
+            index = client.get_index('docs')
+            
+            return [len([hit async for hit in await index.search(Eq('cat', 'c0'), lazy=True)]) for _ in range(2)]
+    
+    assert asyncio.run(main()) == [5, 5]
+
+
+def test_bulk_waits_past_the_request_timeout(make_fake_es):
+    slow = make_fake_es(latency=0.5)
+    index = ESClient(slow.host, slow.port, timeout=0.2, max_retries=0).get_index('docs')
+    
+    # A bulk that takes longer than `timeout` is not cut off, nor its node marked dead. 
+    assert index.bulk_insert([{ '_id': 1 }]) == 0 
+    
+    with pytest.raises(requests.RequestException):
+        index.count() 
+    
+    index = ESClient(slow.host, slow.port, timeout=0.2, bulk_timeout=0.1, max_retries=0).get_index('docs')
+    
+    with pytest.raises(requests.RequestException):
+        index.bulk_insert([{ '_id': 2 }])
+
+
+def test_async_bulk_waits_past_the_request_timeout(make_fake_es):
+    slow = make_fake_es(latency=0.5)
+    
+    async def main():
+        async with AsyncESClient(slow.host, slow.port, timeout=0.2) as client:
+            await client.get_index('docs').bulk_insert([{ '_id': 1 }])
+            
+            with pytest.raises(asyncio.TimeoutError):
+                await client.get_index('docs').count() 
+    
+    asyncio.run(main())
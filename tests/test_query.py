@@ -0,0 +1,73 @@
+import pytest 
+
+from es_util import ESClient, Eq, In, Range, Exists, Match, And, Or, Not, build_search_body 
+
+
+def test_predicates_compile_to_filters():
+    query = Eq('a', 1) & In('b', [1, 2]) & Range('c', gte=0, lt=5)
+    
+    assert isinstance(query, And) and len(query.queries) == 3 
+    assert build_search_body(query) == {
+        'query': { 'bool': { 'filter': [
+            { 'term': { 'a': 1 } }, 
+            { 'terms': { 'b': [1, 2] } }, 
+            { 'range': { 'c': { 'gte': 0, 'lt': 5 } } }, 
+        ] } }, 
+        'track_total_hits': False, 
+    }
+
+
+def test_only_match_scores():
+    assert (Match('t', 'hello') & Eq('a', 1)).to_dict() == { 'bool': { 
+        'must': [{ 'match': { 't': 'hello' } }], 
+        'filter': [{ 'term': { 'a': 1 } }], 
+    } }
+    assert build_search_body(Match('t', 'hello'))['query'] == { 'match': { 't': 'hello' } }
+    assert build_search_body(Exists('a'))['query'] == { 'bool': { 'filter': [{ 'exists': { 'field': 'a' } }] } }
+
+
+def test_or_and_not():
+    query = Eq('a', 1) | Eq('a', 2) | ~Exists('b')
+    
+    assert isinstance(query, Or) and len(query.queries) == 3 
+    assert query.to_dict()['bool']['should'][2] == { 'bool': { 'must_not': [{ 'exists': { 'field': 'b' } }] } }
+    assert In('_id', [1]).to_dict() == { 'ids': { 'values': [1] } }
+
+
+def test_search_body_options():
+    assert build_search_body(None, source=['a'], size=5, sort=[{ 'n': 'asc' }], track_total_hits=None) == {
+        'query': { 'match_all': {} }, 
+        '_source': ['a'], 
+        'size': 5, 
+        'sort': [{ 'n': 'asc' }], 
+    }
+    assert build_search_body({ 'term': { 'a': 1 } })['query'] == { 'term': { 'a': 1 } }
+
+
+DOCS = [{ '_id': i, 'cat': f"c{i % 3}", 'n': i, **({ 'tag': 't' } if i % 2 else dict()) } for i in range(30)]
+
+
+@pytest.mark.parametrize('query, expected', [
+    (Eq('cat', 'c1'), lambda doc: doc['cat'] == 'c1'), 
+    (In('cat', ['c0', 'c2']) & Range('n', gte=10), lambda doc: doc['cat'] != 'c1' and doc['n'] >= 10), 
+    (Eq('cat', 'c0') | Exists('tag'), lambda doc: doc['cat'] == 'c0' or 'tag' in doc), 
+    (~Exists('tag') & ~Eq('cat', 'c0'), lambda doc: 'tag' not in doc and doc['cat'] != 'c0'), 
+    (In('_id', [1, 2, 3]), lambda doc: doc['_id'] in (1, 2, 3)), 
+])
+def test_search_matches_the_predicate(fake_es, query, expected):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert(DOCS)
+    index.refresh() 
+    
+    assert sorted(int(entry['_id']) for entry in index.search(query)) == [doc['_id'] for doc in DOCS if expected(doc)]
+
+
+def test_legacy_query_methods_still_work(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert(DOCS)
+    index.refresh() 
+    
+    assert len(index.query_X_eq_x('cat', 'c1')) == 10 
+    assert len(index.query_X_in_x('cat', ['c1', 'c2'], limit=5)) == 5 
+    assert len(index.query_X_eq_x_and_Y_eq_y('cat', 'c1', 'tag', 't')) == 5 
+    assert sorted(entry['_id'] for entry in index.query_id_in_x([3, 4])) == ['3', '4']
@@ -0,0 +1,86 @@
+import pytest 
+
+from es_util import ESClient, ESType 
+
+
+@pytest.fixture 
+def client(fake_es):
+    return ESClient(fake_es.host, fake_es.port)
+
+
+def load(index, num_docs: int = 20):
+    index.create_mapping({ 'n': ESType.INTEGER })
+    index.bulk_insert([{ '_id': i, 'n': i } for i in range(num_docs)])
+    index.refresh() 
+
+
+def test_reindex_moves_the_alias(client, fake_es):
+    load(client.get_index('docs_v1'))
+    client.get_index('docs_v1').swap_alias('docs', 'docs_v1')
+    
+    new_index = client.get_index('docs').reindex({ 'n': ESType.LONG }, use_tqdm=False)
+    
+    assert new_index.index_name == 'docs_v2'
+    assert fake_es.aliases['docs'] == { 'docs_v2' }
+    assert new_index.count() == 20 
+    assert 'docs_v1' in fake_es.indices 
+    
+    client.get_index('docs').reindex({ 'n': ESType.LONG }, delete_old=True, use_tqdm=False)
+    
+    assert fake_es.aliases['docs'] == { 'docs_v3' }
+    assert 'docs_v2' not in fake_es.indices 
+    assert client.get_index('docs').count() == 20 
+    
+    
+def test_reindex_with_a_transform(client):
+    load(client.get_index('docs_v1'))
+    client.get_index('docs_v1').swap_alias('docs', 'docs_v1')
+    
+    new_index = client.get_index('docs').reindex(
+        { 'n': ESType.INTEGER, 'even': ESType.BOOLEAN }, 
+        transform = lambda entry: { **entry, 'even': entry['n'] % 2 == 0 } if entry['n'] < 10 else None, 
+        use_tqdm = False, 
+    )
+    new_index.refresh() 
+    
+    assert new_index.count() == 10 
+    assert new_index.query_by_id(4) == { 'n': 4, 'even': True }
+
+
+def test_reindex_refuses_to_delete_a_concrete_index(client, fake_es):
+    load(client.get_index('docs'))
+    
+    with pytest.raises(ValueError):
+        client.get_index('docs').reindex({ 'n': ESType.LONG }, use_tqdm=False)
+        
+    assert list(fake_es.indices) == ['docs']
+    
+    new_index = client.get_index('docs').reindex({ 'n': ESType.LONG }, delete_old=True, use_tqdm=False)
+    
+    assert fake_es.aliases['docs'] == { new_index.index_name }
+    assert list(fake_es.indices) == [new_index.index_name]
+    assert client.get_index('docs').count() == 20 
+    
+
+def test_swap_alias_refuses_to_delete_a_concrete_index(client, fake_es):
+    load(client.get_index('docs'))
+    load(client.get_index('other'))
+    
+    with pytest.raises(ValueError):
+        client.get_index('other').swap_alias('docs', 'other')
+        
+    assert 'docs' in fake_es.indices 
+    
+
+def test_failed_copy_deletes_the_new_index(client, fake_es):
+    load(client.get_index('docs_v1'))
+    client.get_index('docs_v1').swap_alias('docs', 'docs_v1')
+    
+    def fail(entry):
+        raise RuntimeError 
+    
+    with pytest.raises(RuntimeError):
+        client.get_index('docs').reindex({ 'n': ESType.LONG }, transform=fail, use_tqdm=False)
+        
+    assert set(fake_es.indices) == { 'docs_v1' }
+    assert fake_es.aliases['docs'] == { 'docs_v1' }
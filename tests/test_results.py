@@ -0,0 +1,73 @@
+import json 
+import math 
+
+import pytest 
+
+from es_util import ESClient, CompactHits 
+from es_util.error import UnknownError 
+import es_util.results 
+
+
+RESPONSE = json.dumps({ 'took': 1, 'hits': { 'hits': [
+    { '_id': '1', '_source': { 'n': 1, 'obj': { 'x': 1.5 }, 'tag': 'a' } }, 
+    { '_id': '2', '_source': { 'n': 2, 'obj': { 'x': None } } }, 
+    { '_id': '3' }, 
+] } }).encode('utf-8')
+
+
+@pytest.fixture(params=['msgspec', 'json'])
+def decoder(request, monkeypatch):
+    if request.param == 'msgspec':
+        pytest.importorskip('msgspec')
+    else:
+        monkeypatch.setattr(es_util.results, 'msgspec', None)
+        
+    return request.param 
+
+
+def test_hits(decoder):
+    hits = CompactHits(RESPONSE)
+    
+    assert len(hits) == 3 
+    assert hits[0] == { 'n': 1, 'obj': { 'x': 1.5 }, 'tag': 'a', '_id': '1' }
+    assert hits[-1] == { '_id': '3' }
+    assert hits[1:] == [{ 'n': 2, 'obj': { 'x': None }, '_id': '2' }, { '_id': '3' }]
+    assert list(hits) == hits[:]
+    assert hits.ids == ['1', '2', '3']
+    
+    # Every access decodes a fresh dict. 
+    hits[0]['n'] = 10 
+    assert hits[0]['n'] == 1 
+    
+    
+def test_columns(decoder):
+    hits = CompactHits(RESPONSE)
+    columns = hits.columns(['n', 'obj.x'])
+    
+    assert columns['n'].typecode == 'd'
+    assert list(columns['n'])[:2] == [1.0, 2.0] and math.isnan(columns['n'][2])
+    assert list(columns['obj.x'])[:1] == [1.5] and all(map(math.isnan, columns['obj.x'][1:]))
+    assert list(hits.column('n', typecode='q', default=-1)) == [1, 2, -1]
+    
+    
+def test_empty_and_error_responses(decoder):
+    assert len(CompactHits(b'{"took": 1}')) == 0 
+    assert CompactHits(b'{"took": 1}').ids == [] 
+    
+    with pytest.raises(UnknownError):
+        CompactHits(b'{"error": {"type": "parsing_exception"}, "status": 400}')
+        
+        
+def test_compact_search(fake_es, decoder):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': i, 'n': i } for i in range(20)])
+    index.refresh() 
+    
+    hits = index.search(None, compact=True)
+    
+    assert isinstance(hits, CompactHits)
+    assert sorted(hits, key=lambda entry: entry['n']) == sorted(index.search(None), key=lambda entry: entry['n'])
+    assert sorted(hits.column('n', typecode='q')) == list(range(20))
+    
+    with pytest.raises(ValueError):
+        index.search(None, lazy=True, compact=True)
@@ -0,0 +1,96 @@
+import pytest 
+
+from es_util import ESClient, Schema, Keyword, Long, Double, Date, DenseVector, Object, Nested 
+from es_util.error import SchemaError 
+
+
+@pytest.fixture 
+def schema():
+    return Schema({
+        'name': Keyword(required=True), 
+        'n': Long(), 
+        'score': Double(), 
+        'created': Date(), 
+        'obj': Object({ 'a': Long(required=True), 'b': Long() }), 
+        'items': Nested({ 'k': Keyword(required=True) }), 
+        'vec': DenseVector(dims=3), 
+    })
+
+
+def test_valid_document_is_returned_unchanged(schema):
+    encoder = schema.compile() 
+    document = { '_id': 1, 'name': 'x', 'n': 1, 'obj': { 'a': 1 }, 'items': [{ 'k': 'a' }], 'vec': [1.0, 2.0, 3.0] }
+    
+    assert encoder.coerce(document) is document 
+
+
+def test_values_are_coerced_without_touching_the_input(schema):
+    encoder = schema.compile() 
+    document = { 'name': 'x', 'n': '5', 'score': 1, 'obj': { 'a': '2' } }
+    
+    assert encoder.coerce(document) == { 'name': 'x', 'n': 5, 'score': 1.0, 'obj': { 'a': 2 } }
+    assert document['n'] == '5' 
+    assert document['obj'] == { 'a': '2' }
+
+
+@pytest.mark.parametrize('document, path', [
+    ({ 'n': 1 }, 'name'), 
+    ({ 'name': 'x', 'n': 'many' }, 'n'), 
+    ({ 'name': 'x', 'other': 1 }, 'other'), 
+    ({ 'name': 'x', 'obj': { 'b': 1 } }, 'obj.a'), 
+    ({ 'name': 'x', 'obj': { 'a': 1, 'c': 1 } }, 'obj.c'), 
+    ({ 'name': 'x', 'items': [{ 'k': 'a' }, {}] }, 'items[1].k'), 
+    ({ 'name': 'x', 'vec': [1.0, 2.0] }, 'vec'), 
+    ({ 'name': 'x', 'created': 'yesterday' }, 'created'), 
+])
+def test_bad_documents_raise_with_the_field_path(schema, document, path):
+    with pytest.raises(SchemaError) as e:
+        schema.compile().coerce(document)
+    
+    assert e.value.path == path 
+
+
+def test_partial_skips_required_fields_at_every_level(schema):
+    encoder = schema.compile() 
+    
+    assert encoder.coerce({ 'n': '1' }, partial=True) == { 'n': 1 }
+    assert encoder.coerce({ 'obj': { 'b': '2' } }, partial=True) == { 'obj': { 'b': 2 } }
+    
+    # Arrays are replaced whole by an update, so their items must still be complete. 
+    with pytest.raises(SchemaError):
+        encoder.coerce({ 'items': [{}] }, partial=True)
+    
+    # Unknown fields are still rejected. 
+    with pytest.raises(SchemaError):
+        encoder.coerce({ 'obj': { 'c': 1 } }, partial=True)
+
+
+def test_encode_matches_coerce(schema):
+    import json 
+    
+    encoder = schema.compile() 
+    
+    assert json.loads(encoder.encode({ 'name': 'x', 'n': '3' })) == { 'name': 'x', 'n': 3 }
+
+
+def test_from_mapping_round_trips(schema):
+    assert Schema.from_mapping(schema.mapping()['properties']).mapping() == schema.mapping() 
+
+
+def test_bulk_paths_use_the_schema(fake_es, schema):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.create_mapping(schema)
+    rejected = [] 
+    
+    assert index.bulk_insert([{ '_id': 1, 'name': 'a', 'n': '1', 'obj': { 'a': 1 } }, { '_id': 2, 'n': 2 }], dead_letter=rejected.append) == 1 
+    assert [record['error']['type'] for record in rejected] == ['schema_error']
+    
+    with pytest.raises(SchemaError):
+        index.bulk_insert([{ '_id': 3, 'n': 3 }])
+    
+    stats = index.bulk_update([(1, { 'obj': { 'b': 2 } })], dead_letter=rejected.append)
+    index.refresh() 
+    
+    assert stats.num_failed == 0 
+    assert len(rejected) == 1 
+    assert index.query_by_id(1) == { 'name': 'a', 'n': 1, 'obj': { 'a': 1, 'b': 2 } }
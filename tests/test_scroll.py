@@ -0,0 +1,58 @@
+import pytest 
+
+from es_util import ESClient 
+from es_util.scroll import iter_parallel 
+
+
+@pytest.fixture 
+def index(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('docs')
+    index.bulk_insert([{ '_id': i, 'n': i, 'even': i % 2 == 0 } for i in range(500)])
+    index.refresh() 
+    
+    return index 
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_parallel_scroll_yields_every_document_once(index, fake_es, ordered):
+    ids = [entry['_id'] for entry in index.parallel_scroll(num_slices=4, scroll_size=30, ordered=ordered)]
+    
+    assert sorted(ids, key=int) == [str(i) for i in range(500)]
+    assert fake_es.scrolls == dict() 
+
+
+def test_parallel_scroll_applies_query_and_source(index):
+    entries = list(index.parallel_scroll(num_slices=3, scroll_size=50, query={ 'term': { 'even': True } }, source=['n']))
+    
+    assert len(entries) == 250 
+    assert all(set(entry) == { '_id', 'n' } and entry['n'] % 2 == 0 for entry in entries)
+
+
+def test_stopping_early_clears_every_scroll(index, fake_es):
+    entries = index.parallel_scroll(num_slices=4, scroll_size=10, queue_size=1)
+    
+    assert len([entry for _, entry in zip(range(15), entries)]) == 15 
+    assert fake_es.scrolls 
+    
+    entries.close() 
+    
+    assert fake_es.scrolls == dict() 
+
+
+def test_a_failing_producer_stops_the_others():
+    closed = [] 
+    
+    def pages(fail):
+        try:
+            for i in range(1000):
+                if fail and i == 3:
+                    raise RuntimeError('slice failed')
+                
+                yield [i]
+        finally:
+            closed.append(fail)
+    
+    with pytest.raises(RuntimeError, match='slice failed'):
+        list(iter_parallel([lambda: pages(False), lambda: pages(True)], queue_size=1))
+    
+    assert sorted(closed) == [False, True]
@@ -0,0 +1,59 @@
+import pytest 
+
+from es_util import ESClient, Eq, DEFAULT_SEARCH_SIZE 
+
+NUM_DOCS = DEFAULT_SEARCH_SIZE + 1500 
+
+
+@pytest.fixture(scope='module')
+def deep_index():
+    from benchmark.fake_es import FakeES 
+    
+    with FakeES() as es:
+        index = ESClient(es.host, es.port).get_index('docs')
+        index.parallel_bulk_insert(({ '_id': i, 'n': i, 'bucket': i % 7 } for i in range(NUM_DOCS)), batch_size=2000)
+        index.refresh() 
+        
+        yield index, es 
+
+
+def test_lazy_search_goes_past_the_result_window(deep_index):
+    index, es = deep_index 
+    
+    # A plain search stops at the result window; a lazy one pages on with a PIT. 
+    assert len(index.search()) == DEFAULT_SEARCH_SIZE 
+    assert sorted(int(entry['_id']) for entry in index.search(lazy=True)) == list(range(NUM_DOCS))
+    assert es.pits == dict() 
+
+
+def test_search_iter_follows_the_sort_across_pages(deep_index):
+    index, es = deep_index 
+    entries = list(index.search_iter(Eq('bucket', 3), sort=[{ 'n': 'desc' }], page_size=250))
+    
+    assert [entry['n'] for entry in entries] == [n for n in range(NUM_DOCS - 1, -1, -1) if n % 7 == 3]
+
+
+def test_ties_are_neither_skipped_nor_repeated(deep_index):
+    index, es = deep_index 
+    
+    # Every page boundary falls inside a run of equal sort values. 
+    entries = list(index.search_iter(sort=[{ 'bucket': 'asc' }], page_size=333))
+    
+    assert sorted(int(entry['_id']) for entry in entries) == list(range(NUM_DOCS))
+    assert [entry['bucket'] for entry in entries] == sorted(entry['bucket'] for entry in entries)
+
+
+def test_limit_and_early_stop_close_the_pit(deep_index):
+    index, es = deep_index 
+    
+    assert len(list(index.search_iter(limit=1234, page_size=500))) == 1234 
+    assert len(list(index.query_X_eq_x('bucket', 1, limit=20, lazy=True))) == 20 
+    
+    entries = index.search(lazy=True)
+    next(entries)
+    
+    assert len(es.pits) == 1 
+    
+    entries.close() 
+    
+    assert es.pits == dict() 
@@ -0,0 +1,66 @@
+import json 
+
+import pytest 
+
+np = pytest.importorskip('numpy')
+
+from es_util import ESClient 
+from es_util.vector import as_vector_matrix, iter_vector_bulk_items 
+
+
+def decoded(items):
+    return [[json.loads(line) for line in item.splitlines()] for item in items]
+
+
+def test_vectors_are_spliced_into_the_metadata():
+    vectors = np.arange(6, dtype=np.float32).reshape(3, 2)
+    metadata = [{ '_id': 1, 'name': 'a' }, dict(), { 'nested': { 'k': [1] } }]
+    
+    assert decoded(iter_vector_bulk_items('docs', '_doc', 'vec', vectors, metadata, chunk_size=2)) == [
+        [{ 'index': { '_index': 'docs', '_id': '1' } }, { 'name': 'a', 'vec': [0.0, 1.0] }], 
+        [{ 'index': { '_index': 'docs' } }, { 'vec': [2.0, 3.0] }], 
+        [{ 'index': { '_index': 'docs' } }, { 'nested': { 'k': [1] }, 'vec': [4.0, 5.0] }], 
+    ]
+    
+    # The caller's metadata is left as it was. 
+    assert metadata[0] == { '_id': 1, 'name': 'a' }
+
+
+def test_metadata_with_the_vector_field_is_rejected():
+    with pytest.raises(ValueError, match='vec'):
+        list(iter_vector_bulk_items('docs', '_doc', 'vec', np.zeros((1, 2)), [{ 'vec': [1.0, 1.0] }]))
+
+
+@pytest.mark.parametrize('metadata', [
+    [dict()], 
+    [dict()] * 3, 
+    iter([dict()]), 
+    iter([dict()] * 3), 
+])
+def test_metadata_must_match_the_vectors(metadata):
+    with pytest.raises(ValueError):
+        list(iter_vector_bulk_items('docs', '_doc', 'vec', np.zeros((2, 2)), metadata))
+
+
+def test_non_finite_vectors_are_rejected():
+    with pytest.raises(ValueError):
+        as_vector_matrix([[1.0, float('nan')]])
+    
+    with pytest.raises(ValueError):
+        as_vector_matrix([[1.0, float('inf')]])
+
+
+def test_bulk_insert_and_knn_search(fake_es):
+    index = ESClient(fake_es.host, fake_es.port).get_index('vectors')
+    vectors = np.eye(4, dtype=np.float32)
+    
+    stats = index.bulk_insert_vectors('vec', vectors, metadata=[{ '_id': i, 'n': i } for i in range(4)])
+    index.refresh() 
+    
+    assert stats.num_docs == 4 
+    assert index.query_by_id(2) == { 'n': 2, 'vec': [0.0, 0.0, 1.0, 0.0] }
+    
+    hits = index.knn_search('vec', vectors[2], k=1)
+    
+    assert [hit['_id'] for hit in hits] == ['2']
+    assert [[hit['_id'] for hit in hits] for hits in index.knn_search('vec', vectors[:2], k=1)] == [['0'], ['1']]